@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class BaseConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "base"
+
+    def ready(self):
+        from . import tracing
+
+        tracing.configure()
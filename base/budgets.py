@@ -0,0 +1,126 @@
+"""
+Per-action query budgets.
+
+Views mixing in ``QueryBudgetMixin`` declare the most database queries each
+action may run, e.g. ``query_budgets = {"list": 3, "retrieve": 1}``, and
+``vendor_query_budgets`` where a database vendor runs more statements for the
+same work, e.g. ``{"sqlite": {"list": 4}}``. Budgets
+do not depend on the amount of data, so an N+1 query pattern blows them.
+Transaction control statements (``BEGIN``, ``SAVEPOINT``, ``RELEASE``...) are
+not counted: backends and transaction modes issue them differently, and the
+budgets are about the statements that read and write data.
+
+A request over budget is logged and counted in ``/metrics``
+(``http_query_budget_exceeded_total``) once it has been served. With
+``QUERY_BUDGET_ENFORCE``, as set by the test runner in ``base.testing``, its
+first query over budget raises ``QueryBudgetExceeded`` instead of running, so
+the regression fails CI without committing the write it was part of.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import metrics
+from .middleware import wrap_queries
+
+logger = logging.getLogger(__name__)
+
+
+TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its budget allows."""
+
+
+def is_transaction_control(sql):
+    """Return whether ``sql`` only begins, ends or marks a transaction."""
+    return sql.lstrip().upper().startswith(TRANSACTION_CONTROL)
+
+
+class QueryCounter:
+    """
+    ``execute_wrapper`` counting queries other than transaction control.
+
+    ``over_budget``, when given, is called before each counted query runs and
+    may raise to stop it.
+    """
+
+    def __init__(self, over_budget=None):
+        self.count = 0
+        self.over_budget = over_budget
+
+    def __call__(self, execute, sql, params, many, context):
+        if not is_transaction_control(sql):
+            self.count += 1
+            if self.over_budget is not None:
+                self.over_budget(self.count)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Count the queries run while dispatching a request and check them against
+    ``query_budgets``, keyed by viewset action or, for plain API views, by
+    lowercase HTTP method. Actions without a budget are not checked.
+
+    Only the queries run by ``dispatch()`` count: those of a streaming
+    response, read while it is sent, are not checked.
+    """
+
+    query_budgets = {}
+    vendor_query_budgets = {}
+
+    @classmethod
+    def get_query_budget(cls, handler, vendor=None):
+        """
+        Return the budget of ``handler`` on a ``vendor`` database, by default
+        the vendor of the default database.
+        """
+        vendor = vendor or connections[DEFAULT_DB_ALIAS].vendor
+        budgets = cls.vendor_query_budgets.get(vendor, {})
+        return budgets.get(handler, cls.query_budgets.get(handler))
+
+    def query_budget_units(self, handler):
+        """
+        Return how many times the budget of ``handler`` applies to the current
+        request, e.g. the number of chunks a batch is written in.
+        """
+        return 1
+
+    def dispatch(self, request, *args, **kwargs):
+        # Enforced budgets stop the first query over budget before it runs, so
+        # the transaction writing it rolls back instead of committing.
+        enforce = settings.QUERY_BUDGET_ENFORCE
+        counter = QueryCounter(
+            (lambda count: self.check_query_budget(request, count)) if enforce else None
+        )
+        with wrap_queries(counter):
+            response = super().dispatch(request, *args, **kwargs)
+        if not enforce:
+            self.check_query_budget(request, counter.count)
+        return response
+
+    def check_query_budget(self, request, count):
+        handler = getattr(self, "action", None) or request.method.lower()
+        budget = self.get_query_budget(handler)
+        if budget is None or count <= budget:
+            return
+        budget *= self.query_budget_units(handler)
+        if count > budget:
+            self.query_budget_exceeded(
+                request, f"{type(self).__name__}.{handler}", count, budget
+            )
+
+    def query_budget_exceeded(self, request, view, count, budget):
+        message = (
+            f"{view} ran {count} queries for {request.method} "
+            f"{request.get_full_path()}, over its budget of {budget}"
+        )
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        metrics.query_budget_exceeded.inc(view)
+        metrics.registry.flush()
@@ -0,0 +1,295 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Metrics are kept per worker process. Observations take one lock and a short
+bucket scan, so recording stays cheap enough to leave on for every request.
+
+Gunicorn workers share one port, so a scrape reaches a single worker. With
+``METRICS_DIR`` set, as ``entrypoint.sh`` does, every worker writes its
+metrics to a file there at most every ``FLUSH_INTERVAL`` seconds, from a timer
+when a request comes in sooner, and when it exits; ``/metrics`` serves the sum
+of every file. Files of workers that exited are
+kept so counters never go backwards; the directory must be emptied when the
+server starts. Without ``METRICS_DIR``, ``/metrics`` only covers the worker
+answering the scrape.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+FLUSH_INTERVAL = 1.0
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def state(self):
+        """Return the values as JSON-serializable ``[labelvalues, value]`` pairs."""
+        with self._lock:
+            return [
+                [list(labelvalues), value]
+                for labelvalues, value in self._values.items()
+            ]
+
+    @staticmethod
+    def merge(values, state):
+        """Add a ``state()`` of another process to ``values``."""
+        for labelvalues, value in state:
+            labelvalues = tuple(labelvalues)
+            values[labelvalues] = values.get(labelvalues, 0) + value
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, list(zip(self.labelnames, labelvalues)), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative histogram with labels."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * len(self.buckets), 0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def state(self):
+        """Return the values as JSON-serializable ``[labelvalues, state]`` pairs."""
+        with self._lock:
+            return [
+                [list(labelvalues), [list(counts), total, count]]
+                for labelvalues, (counts, total, count) in self._values.items()
+            ]
+
+    @staticmethod
+    def merge(values, state):
+        """Add a ``state()`` of another process to ``values``."""
+        for labelvalues, (counts, total, count) in state:
+            labelvalues = tuple(labelvalues)
+            merged = values.setdefault(labelvalues, [[0] * len(counts), 0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = {
+                    labelvalues: (list(counts), total, count)
+                    for labelvalues, (counts, total, count) in self._values.items()
+                }
+        for labelvalues, (counts, total, count) in sorted(values.items()):
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + [("le", bound)], cumulative
+            yield f"{self.name}_bucket", labels + [("le", "+Inf")], count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self.metrics = []
+        self._flushed = 0.0
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+    def flush(self, force=False):
+        """
+        Write this process's metrics to ``METRICS_DIR``. Unless ``force`` is
+        set, a flush less than ``FLUSH_INTERVAL`` seconds after the previous one
+        is postponed to the end of the interval, so the last observations of a
+        worker going idle are written too.
+        """
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        with self._flush_lock:
+            wait = self._flushed + FLUSH_INTERVAL - time.monotonic()
+            if not force and wait > 0:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(wait, self._flush_postponed)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+            self._flushed = time.monotonic()
+            state = {metric.name: metric.state() for metric in self.metrics}
+            path = Path(directory) / f"{os.getpid()}.json"
+            temporary = path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(state))
+            # Readers never see a half-written file.
+            os.replace(temporary, path)
+
+    def _flush_postponed(self):
+        with self._flush_lock:
+            self._flush_timer = None
+        self.flush(force=True)
+
+    def collect(self):
+        """
+        Return ``{metric name: values}`` summed over the processes that wrote
+        to ``METRICS_DIR``, or ``None`` without one.
+        """
+        directory = settings.METRICS_DIR
+        if not directory:
+            return None
+        self.flush(force=True)
+        collected = {metric.name: {} for metric in self.metrics}
+        for path in Path(directory).glob("*.json"):
+            state = json.loads(path.read_text())
+            for metric in self.metrics:
+                metric.merge(collected[metric.name], state.get(metric.name, []))
+        return collected
+
+    def render(self):
+        collected = self.collect()
+        lines = []
+        for metric in self.metrics:
+            values = None if collected is None else collected[metric.name]
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples(values):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "Requests handled, by view and status",
+        ["view", "status"],
+    )
+)
+request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Wall time spent handling a request",
+        ["view"],
+        DURATION_BUCKETS,
+    )
+)
+db_duration = registry.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Time spent executing database queries per request",
+        ["view"],
+        DURATION_BUCKETS,
+    )
+)
+db_queries = registry.register(
+    Histogram(
+        "http_request_db_queries",
+        "Database queries executed per request",
+        ["view"],
+        COUNT_BUCKETS,
+    )
+)
+render_duration = registry.register(
+    Histogram(
+        "http_request_render_duration_seconds",
+        "Time spent rendering the response body (serializing to JSON, CSV, ...)",
+        ["view"],
+        DURATION_BUCKETS,
+    )
+)
+response_size = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Size of non-streaming response bodies",
+        ["view"],
+        SIZE_BUCKETS,
+    )
+)
+query_budget_exceeded = registry.register(
+    Counter(
+        "http_query_budget_exceeded_total",
+        "Requests that ran more database queries than their view's budget",
+        ["view"],
+    )
+)
+
+
+def metrics_view(request):
+    """Expose the metrics of every worker process, or of this one, to Prometheus."""
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,255 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` times every sampled request and attributes it to
+the view that handled it (``SuperheroViewSet.list``, ``SuperheroStatsView.get``
+and so on). It records:
+
+* wall time;
+* the number of database queries and the time spent running them (through
+  ``connection.execute_wrapper`` on every database alias);
+* the time spent rendering the response body;
+* the size of the response body.
+
+It reports them in a ``Server-Timing`` header and in the histograms served at
+``/metrics`` (see ``base.metrics`` for how workers share them).
+``PERF_SAMPLE_RATE`` (0 to 1) sets the share of requests that are
+instrumented; the others are passed through untouched.
+
+Queries that async views run in worker threads use other connections and are
+not counted.
+
+``TracingMiddleware`` opens the OpenTelemetry span of each request; see
+``base.tracing``.
+
+``ReplicaPinMiddleware`` routes the reads of each request; see
+``base.replicas``.
+"""
+
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, replicas, tracing
+
+
+class QueryTimer:
+    """``execute_wrapper`` counting queries and their execution time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def wrap_queries(wrapper):
+    """
+    Return a context manager installing ``wrapper`` on every database alias.
+
+    Wrappers stick to the connection handlers, so they also apply to
+    connections opened later in the request.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+def view_name(view_func, method):
+    """
+    Name a view after its class and the method or action handling ``method``,
+    e.g. ``SuperheroViewSet.list``; plain functions use their qualified name.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if view_class is None:
+        return getattr(view_func, "__qualname__", repr(view_func))
+    actions = getattr(view_func, "actions", None) or {}
+    handler = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{handler}"
+
+
+class PerformanceMiddleware:
+    """Record wall, database and render time of sampled requests."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Async hooks keep Django from adapting them with a thread hop.
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        started = self.start(request)
+        with self.timing_queries(request):
+            response = self.get_response(request)
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        started = self.start(request)
+        with self.timing_queries(request):
+            response = await self.get_response(request)
+        return self.finish(request, response, started)
+
+    @staticmethod
+    def sampled():
+        sample_rate = settings.PERF_SAMPLE_RATE
+        return sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate)
+
+    @staticmethod
+    def start(request):
+        request._perf_timer = QueryTimer()
+        request._perf_render = 0.0
+        return time.perf_counter()
+
+    @staticmethod
+    def timing_queries(request):
+        return wrap_queries(request._perf_timer)
+
+    @staticmethod
+    def finish(request, response, started):
+        elapsed = time.perf_counter() - started
+        timer = request._perf_timer
+        match = getattr(request, "resolver_match", None)
+        view = view_name(match.func, request.method) if match else "unresolved"
+
+        metrics.requests_total.inc(view, response.status_code)
+        metrics.request_duration.observe(elapsed, view)
+        metrics.db_duration.observe(timer.duration, view)
+        metrics.db_queries.observe(timer.count, view)
+        metrics.render_duration.observe(request._perf_render, view)
+        if not response.streaming:
+            metrics.response_size.observe(len(response.content), view)
+        metrics.registry.flush()
+
+        response["Server-Timing"] = (
+            f"app;dur={elapsed * 1000:.2f}, "
+            f'db;dur={timer.duration * 1000:.2f};desc="{timer.count} queries", '
+            f"render;dur={request._perf_render * 1000:.2f}"
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # Runs last among the middleware, right before the response renders.
+        if hasattr(request, "_perf_timer"):
+            started = time.perf_counter()
+
+            def rendered(response):
+                request._perf_render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return PerformanceMiddleware.process_template_response(self, request, response)
+
+
+class TracingMiddleware:
+    """Trace requests while ``base.tracing`` is configured."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if tracing.tracer is None:
+            return self.get_response(request)
+        with tracing.request_span(request) as span:
+            response = self.get_response(request)
+            self.finish(request, response, span)
+        return response
+
+    async def __acall__(self, request):
+        if tracing.tracer is None:
+            return await self.get_response(request)
+        with tracing.request_span(request) as span:
+            response = await self.get_response(request)
+            self.finish(request, response, span)
+        return response
+
+    @staticmethod
+    def finish(request, response, span):
+        match = getattr(request, "resolver_match", None)
+        view = view_name(match.func, request.method) if match else "unresolved"
+        tracing.finish_request_span(span, request, response, view)
+
+    def process_template_response(self, request, response):
+        if tracing.tracer is not None:
+            tracing.start_render_span(response)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return TracingMiddleware.process_template_response(self, request, response)
+
+
+class ReplicaPinMiddleware:
+    """
+    Route the database reads of each request, and pin clients that wrote to
+    the primary for ``DATABASE_REPLICA_PIN_SECONDS`` with a cookie.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replicas.start_request(pinned=replicas.PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = replicas.end_request(token)
+        return self.finish(response, wrote)
+
+    async def __acall__(self, request):
+        token = replicas.start_request(pinned=replicas.PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = replicas.end_request(token)
+        return self.finish(response, wrote)
+
+    @staticmethod
+    def finish(response, wrote):
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                replicas.PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,138 @@
+"""
+Read-replica routing.
+
+``DATABASE_REPLICAS`` maps the aliases of read replicas to their weights (see
+``DB_REPLICAS`` in the settings). ``ReplicaRouter`` sends the reads of a
+request to one of them when:
+
+* the view handling it lets the handler read from a replica
+  (``ReplicaReadMixin.replica_actions``), and
+* nothing pins the request to the primary: neither an earlier write in the
+  same request, nor a write by the same client in the last
+  ``DATABASE_REPLICA_PIN_SECONDS`` (remembered in a cookie by
+  ``ReplicaPinMiddleware``), so clients read their own writes.
+
+Each request sticks to the replica picked for its first read, at random by
+weight or, with ``DATABASE_REPLICA_SELECTION = "round_robin"``, in turn.
+Everything else, including every read outside a request, goes to the primary.
+"""
+
+import itertools
+import random
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "db_pin"
+
+_routing = ContextVar("replica_routing", default=None)
+_schedule_lock = threading.Lock()
+_schedule = (None, None)
+
+
+class Routing:
+    """Routing state of one request, shared with its worker threads."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica_reads = False
+        self.replica = None
+
+
+def start_request(pinned=False):
+    """Start routing a request; return the token to pass to ``end_request``."""
+    return _routing.set(Routing(pinned))
+
+
+def end_request(token):
+    """Stop routing the request; return whether it wrote to the primary."""
+    routing = _routing.get()
+    _routing.reset(token)
+    return routing.wrote
+
+
+def allow_replica_reads(allowed):
+    """Let the reads of the current request go to a replica, or not."""
+    routing = _routing.get()
+    if routing is not None:
+        routing.replica_reads = allowed
+
+
+def pinned():
+    """Return whether the current request must read from the primary."""
+    routing = _routing.get()
+    return routing is not None and routing.pinned
+
+
+def weighted_schedule(weights):
+    """
+    Return one round of aliases, each ``weight`` times, spread out so that
+    heavier replicas are not picked several times in a row.
+    """
+    slots = [
+        ((turn + 0.5) / weight, alias)
+        for alias, weight in weights.items()
+        for turn in range(weight)
+    ]
+    return [alias for _, alias in sorted(slots)]
+
+
+def choose_replica():
+    """Pick the replica serving the reads of a request."""
+    global _schedule
+    replicas = settings.DATABASE_REPLICAS
+    if settings.DATABASE_REPLICA_SELECTION != "round_robin":
+        return random.choices(list(replicas), weights=list(replicas.values()))[0]
+    key = tuple(replicas.items())
+    with _schedule_lock:
+        if _schedule[0] != key:
+            _schedule = (key, itertools.cycle(weighted_schedule(replicas)))
+        return next(_schedule[1])
+
+
+class ReplicaRouter:
+    """Send the reads of read-only views to replicas and the rest to the primary."""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (
+            routing is None
+            or routing.pinned
+            or not routing.replica_reads
+            or not settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        if routing.replica is None:
+            routing.replica = choose_replica()
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Let the reads of ``replica_actions`` go to a replica. Handlers are named
+    by viewset action or, for plain API views, by lowercase HTTP method.
+    """
+
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        handler = getattr(self, "action", None) or request.method.lower()
+        allow_replica_reads(handler in self.replica_actions)
+        super().initial(request, *args, **kwargs)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+from copy import deepcopy
 from datetime import timedelta
 from pathlib import Path
 
@@ -51,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "base.middleware.TracingMiddleware",
+    "base.middleware.PerformanceMiddleware",
+    "base.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -60,6 +64,57 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Share of requests timed by base.middleware.PerformanceMiddleware (0 to 1);
+# results go to the Server-Timing header and /metrics
+PERF_SAMPLE_RATE = float(os.getenv("PERF_SAMPLE_RATE", 1))
+
+# Directory where each worker process writes its metrics for /metrics to sum
+# them (base.metrics); empty to only serve the metrics of the scraped worker
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+
+# OpenTelemetry tracing (base.tracing): "otlp", "console", "memory" or "none".
+# The SDK reads the standard OTEL_EXPORTER_OTLP_* and OTEL_TRACES_SAMPLER*
+# variables for the exporter endpoint and sampling.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "superheroes-api")
+
+# Query budgets (base.budgets): requests over their view's budget are logged
+# and counted, or raise with QUERY_BUDGET_ENFORCE, as the test runner sets it
+QUERY_BUDGET_ENFORCE = os.getenv("QUERY_BUDGET_ENFORCE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+TEST_RUNNER = "base.testing.QueryBudgetTestRunner"
+
+# JSON backend of the API: "json" (stdlib) or "orjson". Both stay negotiable
+# per request with ?format=json / ?format=orjson.
+JSON_BACKEND = os.getenv("JSON_BACKEND", "json")
+JSON_RENDERERS = {
+    "json": [
+        "rest_framework.renderers.JSONRenderer",
+        "superheroes.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "orjson": [
+        "superheroes.renderers.ORJSONRenderer",
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+JSON_PARSERS = {
+    "json": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "orjson": [
+        "superheroes.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
 REST_FRAMEWORK = {
     # Permission
     "DEFAULT_PERMISSION_CLASSES": [
@@ -68,6 +123,9 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    # Rendering and parsing; see JSON_BACKEND below
+    "DEFAULT_RENDERER_CLASSES": JSON_RENDERERS[JSON_BACKEND],
+    "DEFAULT_PARSER_CLASSES": JSON_PARSERS[JSON_BACKEND],
     # Pagination
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -152,12 +210,15 @@ if os.getenv("DB_TYPE") == "local":
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait for it instead of failing with "database is locked"
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
         }
     }
 else:
     DATABASES = {
         "default": {
-            "ENGINE": "django.db.backends.postgresql_psycopg2",
+            "ENGINE": "django.db.backends.postgresql",
             "NAME": os.getenv("DB_NAME", "test_db"),
             "USER": os.getenv("DB_USER"),
             "PASSWORD": os.getenv("DB_PASSWORD"),
@@ -181,6 +242,91 @@ if os.environ.get("GITHUB_WORKFLOW"):
         }
     }
 
+# Read replicas (base.replicas): DB_REPLICAS lists them comma-separated, as
+# HOST[:PORT] for PostgreSQL or file paths for SQLite, each with an optional
+# =WEIGHT (default 1). They become the replica1, replica2... aliases; reads of
+# read-only views are spread over them, at random by weight or with
+# DB_REPLICA_SELECTION=round_robin in turn. Clients read from the primary for
+# DB_REPLICA_PIN_SECONDS after a write, so they see their own writes.
+DATABASE_REPLICAS = {}
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    location, _, weight = replica.strip().partition("=")
+    alias = f"replica{number}"
+    DATABASES[alias] = deepcopy(DATABASES["default"])
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    if "sqlite" in DATABASES[alias]["ENGINE"]:
+        DATABASES[alias]["NAME"] = location
+    else:
+        host, _, port = location.partition(":")
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES[alias]["PORT"])
+    DATABASE_REPLICAS[alias] = int(weight or 1)
+DATABASE_REPLICA_SELECTION = os.getenv("DB_REPLICA_SELECTION", "weighted")
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", 5))
+DATABASE_ROUTERS = ["base.replicas.ReplicaRouter"]
+
+# Connection management. By default connections persist for DB_CONN_MAX_AGE
+# seconds and are health-checked before reuse. Under ASGI (SERVER_MODE=asgi,
+# as read by entrypoint.sh) the default is 0: sync ORM calls run in executor
+# threads, each holding its own persistent connection that the end of the
+# request never closes, so they would pile up. With DB_POOL=true PostgreSQL
+# connections come from psycopg 3's native pool instead (requires
+# psycopg[pool]); Django needs CONN_MAX_AGE = 0 then, as the pool does the
+# reuse. DB_STATEMENT_TIMEOUT (milliseconds, 0 = none) caps every query.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+DB_POOL = os.getenv("DB_POOL", "false").lower() in ("1", "true", "yes")
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 0 if SERVER_MODE == "asgi" else 60))
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 0))
+
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+    database["CONN_HEALTH_CHECKS"] = os.getenv(
+        "DB_CONN_HEALTH_CHECKS", "true"
+    ).lower() in ("1", "true", "yes")
+    if "postgresql" not in database["ENGINE"]:
+        continue
+    options = database.setdefault("OPTIONS", {})
+    if DB_STATEMENT_TIMEOUT:
+        options["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    if DB_POOL:
+        database["CONN_MAX_AGE"] = 0
+        options["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+
+# locmem caches are per process; entrypoint.sh defaults to a file cache shared
+# by its gunicorn workers, so a write in one worker invalidates them all
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[os.getenv("CACHE_BACKEND", "locmem")],
+        "LOCATION": os.getenv("CACHE_LOCATION", "superheroes"),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+    }
+}
+
+# Cached read endpoints (superheroes.cache); a timeout of 0 disables caching
+RESPONSE_CACHE_ALIAS = os.getenv("RESPONSE_CACHE_ALIAS", "default")
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60))
+
+# Readiness probes (health.probes): per-probe timeout and how long a result is
+# reused, in seconds
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 2))
+HEALTH_READY_CACHE_TTL = float(os.getenv("HEALTH_READY_CACHE_TTL", 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
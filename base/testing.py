@@ -0,0 +1,79 @@
+"""
+Test-suite support for query budgets (``base.budgets``).
+
+``QueryBudgetTestRunner`` is the project's ``TEST_RUNNER``: it turns on
+``QUERY_BUDGET_ENFORCE``, so any request over its view's budget fails the
+test that sent it. ``QueryBudgetTestMixin`` adds assertions to check budgets
+explicitly, listing the offending queries. Like the views, they leave
+transaction control statements out of the count.
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .budgets import is_transaction_control
+
+VIEWSET_ACTIONS = ["list", "create", "retrieve", "update", "partial_update", "destroy"]
+HANDLERS = ["get", "post", "put", "patch", "delete"]
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Run the tests with query budgets enforced."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.enforce_budgets = override_settings(QUERY_BUDGET_ENFORCE=True)
+        self.enforce_budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.enforce_budgets.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetTestMixin:
+    """Assertions on the query budgets of ``QueryBudgetMixin`` views."""
+
+    @contextmanager
+    def assertWithinQueryBudget(self, view_class, action, using=DEFAULT_DB_ALIAS):
+        """
+        Fail if the block runs more queries than ``view_class`` allows for
+        ``action``, or if the action has no budget.
+        """
+        budget = view_class.get_query_budget(action, connections[using].vendor)
+        self.assertIsNotNone(
+            budget, f"{view_class.__name__}.{action} has no query budget"
+        )
+        with CaptureQueriesContext(connections[using]) as context:
+            yield
+        queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if not is_transaction_control(query["sql"])
+        ]
+        listing = "\n".join(
+            f"{number}. {sql}" for number, sql in enumerate(queries, start=1)
+        )
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{view_class.__name__}.{action} ran {len(queries)} queries, over its "
+            f"budget of {budget}:\n{listing}",
+        )
+
+    def assertQueryBudgetsCovered(self, view_class, actions):
+        """
+        Fail unless every action (or HTTP method handler, for plain API views)
+        of ``view_class`` has a budget and is among the tested ``actions``.
+        """
+        if hasattr(view_class, "get_extra_actions"):
+            routed = {name for name in VIEWSET_ACTIONS if hasattr(view_class, name)}
+            routed.update(extra.__name__ for extra in view_class.get_extra_actions())
+        else:
+            routed = {name for name in HANDLERS if hasattr(view_class, name)}
+        self.assertEqual(set(view_class.query_budgets), routed, "budgeted actions")
+        for vendor, budgets in view_class.vendor_query_budgets.items():
+            self.assertLessEqual(set(budgets), routed, f"{vendor} budgeted actions")
+        self.assertEqual(set(actions), routed, "tested actions")
@@ -0,0 +1,599 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from superheroes.models import Superhero
+from superheroes.views import SuperheroStatsView, SuperheroViewSet
+
+from . import metrics, replicas, tracing
+from .budgets import QueryBudgetExceeded, QueryCounter, is_transaction_control
+from .middleware import view_name, wrap_queries
+
+
+class PerformanceMiddlewareTest(TestCase):
+    """Test cases for request instrumentation and the metrics endpoint."""
+
+    def setUp(self):
+        """Set up test client, data and an empty metrics registry."""
+        self.client = APIClient()
+        Superhero.objects.create(name="Superman", universe="DC")
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+
+    def parse_server_timing(self, response):
+        timings = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, duration, *rest = entry.split(";")
+            timings[name] = (float(duration.removeprefix("dur=")), rest)
+        return timings
+
+    def test_server_timing_header(self):
+        """Test responses report wall, database and render time."""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("superhero-list") + "?universe=DC")
+
+        timings = self.parse_server_timing(response)
+        self.assertEqual(set(timings), {"app", "db", "render"})
+        self.assertEqual(timings["db"][1], ['desc="3 queries"'])
+        self.assertGreaterEqual(timings["app"][0], timings["db"][0])
+        self.assertGreater(timings["render"][0], 0)
+
+    def test_metrics_are_recorded_per_view(self):
+        """Test histograms are labelled with the view class and action."""
+        self.client.get(reverse("superhero-list"))
+        self.client.get(reverse("superhero-stats"))
+        self.client.get(reverse("superhero-detail", args=[999999]))
+
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn(
+            'http_requests_total{view="SuperheroViewSet.list",status="200"} 1', body
+        )
+        self.assertIn(
+            'http_requests_total{view="SuperheroViewSet.retrieve",status="404"} 1',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="SuperheroStatsView.get"} 1', body
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{view="SuperheroViewSet.list",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn("# TYPE http_response_size_bytes histogram", body)
+
+    def test_metrics_content_type(self):
+        """Test metrics are served in the Prometheus text format."""
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    async def test_async_requests(self):
+        """Test requests served by the async handler are timed too."""
+        response = await self.async_client.get(reverse("superhero-async-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("render", self.parse_server_timing(response))
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_sampling_disabled(self):
+        """Test unsampled requests are passed through untouched."""
+        response = self.client.get(reverse("superhero-list"))
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("SuperheroViewSet", metrics.registry.render())
+
+    def test_view_names(self):
+        """Test views are named after their class and handler."""
+        self.assertEqual(
+            view_name(
+                self.client.get(reverse("superhero-list")).resolver_match.func, "GET"
+            ),
+            "SuperheroViewSet.list",
+        )
+        self.assertEqual(view_name(metrics.metrics_view, "GET"), "metrics_view")
+
+
+class HistogramTest(TestCase):
+    """Test cases for the Prometheus histogram."""
+
+    def test_buckets_are_cumulative(self):
+        """Test bucket counts include every smaller bucket."""
+        histogram = metrics.Histogram("latency", "Latency", ["view"], [0.1, 1])
+        for value in [0.05, 0.5, 0.7, 3]:
+            histogram.observe(value, "list")
+
+        samples = {
+            (name, dict(labels).get("le")): value
+            for name, labels, value in histogram.samples()
+        }
+        self.assertEqual(samples[("latency_bucket", 0.1)], 1)
+        self.assertEqual(samples[("latency_bucket", 1)], 3)
+        self.assertEqual(samples[("latency_bucket", "+Inf")], 4)
+        self.assertEqual(samples[("latency_count", None)], 4)
+        self.assertAlmostEqual(samples[("latency_sum", None)], 4.25)
+
+
+class MultiprocessMetricsTest(TestCase):
+    """Test cases for metrics shared by worker processes through METRICS_DIR."""
+
+    def setUp(self):
+        """Set up a metrics directory holding another worker's metrics."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(METRICS_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+
+        other = metrics.Registry()
+        requests_total = other.register(
+            metrics.Counter("http_requests_total", "Requests", ["view", "status"])
+        )
+        request_duration = other.register(
+            metrics.Histogram(
+                "http_request_duration_seconds",
+                "Wall time",
+                ["view"],
+                metrics.DURATION_BUCKETS,
+            )
+        )
+        requests_total.inc("SuperheroViewSet.list", 200, amount=4)
+        request_duration.observe(0.001, "SuperheroViewSet.list")
+        (Path(directory) / "1.json").write_text(
+            json.dumps({metric.name: metric.state() for metric in other.metrics})
+        )
+
+    def test_metrics_are_summed_over_workers(self):
+        """Test /metrics serves the sum of every worker's metrics."""
+        APIClient().get(reverse("superhero-list"))
+        body = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn(
+            'http_requests_total{view="SuperheroViewSet.list",status="200"} 5', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="SuperheroViewSet.list"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="SuperheroViewSet.list",'
+            'le="+Inf"} 2',
+            body,
+        )
+
+    def test_flushes_are_throttled(self):
+        """Test workers write their metrics at most every FLUSH_INTERVAL."""
+        with mock.patch.object(metrics.json, "dumps", wraps=json.dumps) as dumps:
+            metrics.registry.flush(force=True)
+            metrics.registry.flush()
+        self.assertEqual(dumps.call_count, 1)
+
+    def test_throttled_flushes_are_postponed(self):
+        """Test observations made inside the throttle window are still written."""
+        path = Path(settings.METRICS_DIR) / f"{os.getpid()}.json"
+        with mock.patch.object(metrics, "FLUSH_INTERVAL", 0.05):
+            metrics.registry.flush(force=True)
+            metrics.query_budget_exceeded.inc("SuperheroViewSet.list")
+            metrics.registry.flush()
+            written = json.loads(path.read_text())
+            self.assertEqual(written["http_query_budget_exceeded_total"], [])
+
+            deadline = time.monotonic() + 5
+            while written["http_query_budget_exceeded_total"] == []:
+                self.assertLess(time.monotonic(), deadline, "flush never happened")
+                time.sleep(0.01)
+                written = json.loads(path.read_text())
+        self.assertEqual(
+            written["http_query_budget_exceeded_total"],
+            [[["SuperheroViewSet.list"], 1]],
+        )
+
+
+class TracingTest(TestCase):
+    """Test cases for OpenTelemetry tracing with the in-memory exporter."""
+
+    def setUp(self):
+        """Set up test client, data and in-memory tracing."""
+        self.client = APIClient()
+        self.superhero = Superhero.objects.create(
+            name="Superman", universe="DC", power_level=9
+        )
+        self.exporter = tracing.configure("memory")
+        self.addCleanup(tracing.configure, "none")
+
+    def spans(self):
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    def test_request_span(self):
+        """Test requests get a server span named after their view."""
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            response = self.client.get(reverse("superhero-list") + "?universe=DC")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        request = self.spans()["GET SuperheroViewSet.list"]
+        self.assertIsNone(request.parent)
+        self.assertEqual(request.attributes["http.response.status_code"], 200)
+        self.assertEqual(request.attributes["http.route"], "api/superheroes/$")
+        self.assertEqual(request.attributes["superheroes.filters"], "universe")
+        self.assertEqual(request.attributes["superheroes.filter.universe"], "DC")
+
+    def test_nested_spans(self):
+        """Test queries, serialization and rendering nest in the request span."""
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            self.client.get(reverse("superhero-list") + "?universe=DC")
+
+        spans = self.exporter.get_finished_spans()
+        request = self.spans()["GET SuperheroViewSet.list"]
+        queries = [span for span in spans if span.name == "SELECT"]
+        self.assertEqual(len(queries), 3)
+        for span in queries:
+            self.assertEqual(span.parent.span_id, request.context.span_id)
+            self.assertEqual(span.attributes["db.system"], "sqlite")
+            self.assertIn("superheroes_superhero", span.attributes["db.query.text"])
+
+        serializer = self.spans()["FastSuperheroListSerializer.data"]
+        self.assertEqual(serializer.attributes["superheroes.rows"], 1)
+        render = self.spans()["render"]
+        self.assertEqual(render.parent.span_id, request.context.span_id)
+        self.assertGreater(render.attributes["http.response.body.size"], 0)
+
+    def test_serializer_class_dispatch(self):
+        """Test serializer selection and ``.data`` are traced per action."""
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            self.client.get(reverse("superhero-detail", args=[self.superhero.pk]))
+
+        spans = self.spans()
+        dispatch = spans["SuperheroViewSet.get_serializer_class"]
+        self.assertEqual(dispatch.attributes["superheroes.action"], "retrieve")
+        self.assertEqual(
+            dispatch.attributes["superheroes.serializer"], "SuperheroDetailSerializer"
+        )
+        self.assertEqual(
+            spans["SuperheroDetailSerializer.data"].attributes["superheroes.rows"], 1
+        )
+
+    def test_incoming_trace_is_continued(self):
+        """Test a ``traceparent`` header makes the request part of that trace."""
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        self.client.get(
+            reverse("superhero-stats"),
+            headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        )
+
+        request = self.spans()["GET SuperheroStatsView.get"]
+        self.assertEqual(format(request.context.trace_id, "032x"), trace_id)
+        self.assertEqual(format(request.parent.span_id, "016x"), "00f067aa0ba902b7")
+
+    async def test_async_view_queries(self):
+        """Test queries run in the worker threads of async views are traced."""
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            await self.async_client.get(
+                reverse("superhero-async-list") + "?is_villain=false"
+            )
+
+        spans = self.exporter.get_finished_spans()
+        request = self.spans()["GET AsyncSuperheroListView.get"]
+        self.assertEqual(request.attributes["superheroes.filters"], "is_villain")
+        queries = [span for span in spans if span.name == "SELECT"]
+        self.assertTrue(queries)
+        for span in queries:
+            self.assertEqual(span.context.trace_id, request.context.trace_id)
+
+    def test_queries_outside_requests_are_not_traced(self):
+        """Test ORM use without an active span creates no spans."""
+        list(Superhero.objects.all())
+
+        self.assertEqual(self.exporter.get_finished_spans(), ())
+
+    def test_disabled(self):
+        """Test nothing is traced while tracing is off."""
+        tracing.configure("none")
+
+        response = self.client.get(reverse("superhero-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.exporter.get_finished_spans(), ())
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class QueryBudgetTest(TestCase):
+    """Test cases for per-action query budgets."""
+
+    def setUp(self):
+        """Set up test client, data and an over-tight statistics budget."""
+        self.client = APIClient()
+        Superhero.objects.create(name="Superman", universe="DC")
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        patcher = mock.patch.dict(SuperheroStatsView.query_budgets, {"get": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enforced_in_tests(self):
+        """Test the test runner makes requests over budget raise."""
+        self.assertTrue(settings.QUERY_BUDGET_ENFORCE)
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded,
+            "SuperheroStatsView.get ran 1 queries for GET /api/superheroes/stats/, "
+            "over its budget of 0",
+        ):
+            self.client.get(reverse("superhero-stats"))
+
+    def test_enforced_before_the_write_commits(self):
+        """Test the query over budget is stopped and its write rolled back."""
+        with mock.patch.dict(SuperheroViewSet.query_budgets, {"create": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.post(
+                    reverse("superhero-list"),
+                    {"name": "Batman", "universe": "DC"},
+                    format="json",
+                )
+
+        self.assertFalse(Superhero.objects.filter(name="Batman").exists())
+
+    @override_settings(QUERY_BUDGET_ENFORCE=False)
+    def test_logged_and_counted_in_production(self):
+        """Test requests over budget are served, logged and counted."""
+        with self.assertLogs("base.budgets", "WARNING") as logs:
+            response = self.client.get(reverse("superhero-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("over its budget of 0", logs.output[0])
+        self.assertIn(
+            'http_query_budget_exceeded_total{view="SuperheroStatsView.get"} 1',
+            metrics.registry.render(),
+        )
+
+    def test_transaction_control_not_counted(self):
+        """Test budgets only count the statements reading and writing data."""
+        counter = QueryCounter()
+        with wrap_queries(counter), transaction.atomic():
+            Superhero.objects.count()
+
+        self.assertEqual(counter.count, 1)
+        for sql in ("BEGIN IMMEDIATE", 'SAVEPOINT "s1"', 'RELEASE SAVEPOINT "s1"'):
+            self.assertTrue(is_transaction_control(sql))
+        self.assertFalse(is_transaction_control("SELECT 1"))
+
+    def test_within_budget(self):
+        """Test requests within budget pass silently."""
+        with mock.patch.dict(SuperheroStatsView.query_budgets, {"get": 1}):
+            response = self.client.get(reverse("superhero-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(
+    DATABASE_REPLICAS={"replica1": 1},
+    DATABASE_REPLICA_SELECTION="weighted",
+    RESPONSE_CACHE_TIMEOUT=0,
+)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Test cases for read-replica routing, on two SQLite files."""
+
+    databases = {"default"}
+
+    @classmethod
+    def setUpClass(cls):
+        """Migrate a template database both test databases are copied from."""
+        super().setUpClass()
+        # The replica alias only exists while the tests run.
+        cls.databases = cls.databases | {"replica1"}
+        cls.directory = Path(tempfile.mkdtemp())
+        cls.addClassCleanup(shutil.rmtree, cls.directory)
+        cls.template = cls.directory / "template.sqlite3"
+        cls.use_database("default", cls.template)
+        call_command("migrate", database="default", verbosity=0)
+        connections["default"].close()
+        cls.restore_databases()
+
+    @classmethod
+    def use_database(cls, alias, path):
+        """Point ``alias`` at the SQLite file ``path``."""
+        if not hasattr(cls, "original_default"):
+            cls.original_default = (
+                connections.settings["default"],
+                connections["default"],
+            )
+        connections.settings[alias] = {
+            **cls.original_default[0],
+            "NAME": str(path),
+        }
+        connections[alias] = connections.create_connection(alias)
+
+    @classmethod
+    def restore_databases(cls):
+        for alias in ("default", "replica1"):
+            if alias in connections.settings:
+                connections[alias].close()
+        connections.settings.pop("replica1", None)
+        connections.settings["default"], connections["default"] = cls.original_default
+        del cls.original_default
+
+    def setUp(self):
+        """Set up a primary and a replica, each holding a different superhero."""
+        for alias in ("default", "replica1"):
+            path = self.directory / f"{alias}.sqlite3"
+            shutil.copy(self.template, path)
+            self.use_database(alias, path)
+        self.addCleanup(self.restore_databases)
+        Superhero.objects.using("default").create(name="Primary", universe="DC")
+        Superhero.objects.using("replica1").create(name="Replica", universe="DC")
+        self.client = APIClient()
+
+    def names(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [superhero["name"] for superhero in response.data["results"]]
+
+    def test_reads_from_replica(self):
+        """Test read-only actions read from the replica."""
+        self.assertEqual(
+            self.names(self.client.get(reverse("superhero-list"))), ["Replica"]
+        )
+        replica = Superhero.objects.using("replica1").get()
+        response = self.client.get(reverse("superhero-detail", args=[replica.pk]))
+        self.assertEqual(response.data["name"], "Replica")
+        response = self.client.get(reverse("superhero-by-universe"), {"universe": "DC"})
+        self.assertEqual(self.names(response), ["Replica"])
+        response = self.client.get(
+            reverse("superhero-export"), {"fields": "name", "format": "ndjson"}
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(), '{"name": "Replica"}\n'
+        )
+
+    def test_async_reads_from_replica(self):
+        """Test the async read endpoints read from the replica too."""
+        response = self.client.get(reverse("superhero-async-list"))
+
+        self.assertEqual(self.names(response), ["Replica"])
+
+    def test_other_actions_read_from_primary(self):
+        """Test actions not listed as read-only keep reading from the primary."""
+        response = self.client.get(reverse("superhero-autocomplete"), {"q": "Pri"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertIn("Primary", response.data[0]["display_name"])
+
+    def test_writes_go_to_primary_and_pin_the_client(self):
+        """Test writes go to the primary and the client then reads from it."""
+        response = self.client.post(
+            reverse("superhero-list"),
+            {"name": "Created", "universe": "Marvel"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Superhero.objects.using("default").filter(name="Created"))
+        self.assertFalse(Superhero.objects.using("replica1").filter(name="Created"))
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], settings.DATABASE_REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie["httponly"])
+        self.assertEqual(
+            self.names(self.client.get(reverse("superhero-list"))),
+            ["Created", "Primary"],
+        )
+
+        # Other clients still read from the replica.
+        response = APIClient().get(reverse("superhero-list"))
+        self.assertEqual(self.names(response), ["Replica"])
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+    def test_toggle_pins_the_client(self):
+        """Test toggles write to the primary and pin the client to it."""
+        primary = Superhero.objects.using("default").get()
+        url = reverse("superhero-toggle-villain", args=[primary.pk])
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertTrue(Superhero.objects.using("default").get().is_villain)
+        self.assertFalse(Superhero.objects.using("replica1").get().is_villain)
+
+    def test_bulk_writes_pin_the_client(self):
+        """Test the bulk endpoints write to the primary and pin the client."""
+        primary = Superhero.objects.using("default").get()
+        requests = [
+            ("post", "superhero-bulk-create", [{"name": "Bulk", "universe": "DC"}]),
+            ("patch", "superhero-bulk-update", [{"id": primary.pk, "age": 40}]),
+            ("post", "superhero-toggle-villain-batch", [primary.pk]),
+            ("post", "superhero-toggle-active-batch", [primary.pk]),
+            ("post", "superhero-bulk-delete", [primary.pk]),
+        ]
+        for method, name, payload in requests:
+            with self.subTest(name):
+                client = APIClient()
+                response = getattr(client, method)(
+                    reverse(name), payload, format="json"
+                )
+                self.assertIn(response.status_code, (200, 201))
+                self.assertIn(replicas.PIN_COOKIE, response.cookies)
+
+        self.assertEqual(
+            list(Superhero.objects.using("default").values_list("name", flat=True)),
+            ["Bulk"],
+        )
+        self.assertEqual(
+            list(Superhero.objects.using("replica1").values_list("name", flat=True)),
+            ["Replica"],
+        )
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_without_replicas(self):
+        """Test everything uses the primary when no replica is configured."""
+        self.assertEqual(
+            self.names(self.client.get(reverse("superhero-list"))), ["Primary"]
+        )
+        response = self.client.post(
+            reverse("superhero-list"),
+            {"name": "Created", "universe": "Marvel"},
+            format="json",
+        )
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test reads outside requests, e.g. in commands, use the primary."""
+        self.assertEqual(Superhero.objects.get().name, "Primary")
+
+
+class ReplicaSelectionTest(SimpleTestCase):
+    """Test cases for picking the replica serving a request."""
+
+    def test_weighted_schedule(self):
+        """Test rounds hold replicas by weight, spread out."""
+        self.assertEqual(
+            replicas.weighted_schedule({"replica1": 2, "replica2": 1}),
+            ["replica1", "replica2", "replica1"],
+        )
+
+    @override_settings(
+        DATABASE_REPLICAS={"replica1": 1, "replica2": 2},
+        DATABASE_REPLICA_SELECTION="round_robin",
+    )
+    def test_round_robin(self):
+        """Test round robin cycles through the weighted schedule."""
+        picks = [replicas.choose_replica() for _ in range(6)]
+
+        self.assertEqual(picks[:3], picks[3:])
+        self.assertEqual(sorted(picks[:3]), ["replica1", "replica2", "replica2"])
+
+    @override_settings(
+        DATABASE_REPLICAS={"replica1": 1, "replica2": 0},
+        DATABASE_REPLICA_SELECTION="weighted",
+    )
+    def test_weighted(self):
+        """Test random picks follow the weights."""
+        picks = {replicas.choose_replica() for _ in range(20)}
+
+        self.assertEqual(picks, {"replica1"})
+
+    @override_settings(DATABASE_REPLICAS={"replica1": 1, "replica2": 1})
+    def test_request_sticks_to_its_replica(self):
+        """Test every read of a request goes to the same replica."""
+        router = replicas.ReplicaRouter()
+        token = replicas.start_request()
+        try:
+            replicas.allow_replica_reads(True)
+            picks = {router.db_for_read(Superhero) for _ in range(20)}
+            router.db_for_write(Superhero)
+            self.assertEqual(router.db_for_read(Superhero), "default")
+        finally:
+            self.assertTrue(replicas.end_request(token))
+        self.assertEqual(len(picks), 1)
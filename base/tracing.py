@@ -0,0 +1,186 @@
+"""
+OpenTelemetry tracing of requests, ORM queries and serializers.
+
+``TRACING_EXPORTER`` selects where spans go: ``otlp`` (OTLP over HTTP, see the
+standard ``OTEL_EXPORTER_OTLP_*`` variables), ``console``, ``memory`` (kept in
+``exporter`` for tests) or ``none``, which leaves every hook a no-op. The
+OpenTelemetry packages are only needed when tracing is on.
+
+``TracingMiddleware`` opens one server span per request, with nested spans
+for:
+
+* every ORM query run while a span is active, on any connection, including
+  the worker threads of async views;
+* view internals such as ``SuperheroViewSet.get_serializer_class``;
+* ``serializer.data`` and response rendering.
+
+The active filter parameters are recorded on the request span, so slow
+``SuperheroFilter`` combinations can be searched for in the tracing backend.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+except ImportError:  # pragma: no cover
+    trace = None
+
+tracer = None
+exporter = None
+
+
+class _NoSpan:
+    """Stand-in yielded by ``span()`` while tracing is off."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+def make_exporter(name):
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "memory":
+        return InMemorySpanExporter()
+    raise ImproperlyConfigured(f"Unknown TRACING_EXPORTER {name!r}")
+
+
+def configure(name=None):
+    """
+    Send spans to the ``name``d exporter (``TRACING_EXPORTER`` by default);
+    return the exporter, or ``None`` when tracing is turned off.
+    """
+    global tracer, exporter
+    name = settings.TRACING_EXPORTER if name is None else name
+    if name == "none":
+        tracer = exporter = None
+        return None
+    if trace is None:
+        raise ImproperlyConfigured(
+            f"TRACING_EXPORTER={name!r} requires the opentelemetry-sdk package"
+        )
+    exporter = make_exporter(name)
+    # Tests read spans as soon as the request returns; others export in batches.
+    processor = SimpleSpanProcessor if name == "memory" else BatchSpanProcessor
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME})
+    )
+    provider.add_span_processor(processor(exporter))
+    tracer = provider.get_tracer(__name__)
+
+    connection_created.connect(install_query_tracing)
+    for connection in connections.all(initialized_only=True):
+        install_query_tracing(None, connection)
+    return exporter
+
+
+def install_query_tracing(sender, connection, **kwargs):
+    # Wrappers are kept across reconnections of the same connection handler.
+    # Insert this one first: wrappers installed for the duration of a request
+    # (e.g. PerformanceMiddleware's) are popped from the end.
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, trace_query)
+
+
+def trace_query(execute, sql, params, many, context):
+    """``execute_wrapper`` running each query in a client span."""
+    if tracer is None or not trace.get_current_span().is_recording():
+        return execute(sql, params, many, context)
+    connection = context["connection"]
+    operation = sql.split(None, 1)[0].upper() if sql else "QUERY"
+    with tracer.start_as_current_span(
+        operation,
+        kind=trace.SpanKind.CLIENT,
+        attributes={
+            "db.system": connection.vendor,
+            "db.namespace": connection.alias,
+            "db.operation.name": operation,
+            "db.query.text": sql,
+        },
+    ) as current:
+        result = execute(sql, params, many, context)
+        rowcount = getattr(context["cursor"], "rowcount", -1)
+        if rowcount >= 0:
+            current.set_attribute("db.response.rows", rowcount)
+        return result
+
+
+@contextmanager
+def span(name, attributes=None):
+    """Run the block in a span nested in the current one."""
+    if tracer is None:
+        yield NO_SPAN
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def annotate(attributes):
+    """Add ``attributes`` to the current span, e.g. the request span."""
+    if tracer is not None:
+        trace.get_current_span().set_attributes(attributes)
+
+
+def request_span(request):
+    """Start the server span of ``request``, continuing an incoming trace."""
+    return tracer.start_as_current_span(
+        request.method,
+        context=propagate.extract(request.headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={
+            "http.request.method": request.method,
+            "url.path": request.path,
+            "url.scheme": request.scheme,
+        },
+    )
+
+
+def finish_request_span(current, request, response, view):
+    """Name the request span after ``view`` and record the response."""
+    current.update_name(f"{request.method} {view}")
+    current.set_attribute("superheroes.view", view)
+    match = getattr(request, "resolver_match", None)
+    if match is not None and match.route:
+        current.set_attribute("http.route", match.route)
+    current.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 500:
+        current.set_status(trace.Status(trace.StatusCode.ERROR))
+
+
+def start_render_span(response):
+    """Start a span ended once ``response`` has been rendered."""
+    renderer = getattr(response, "accepted_renderer", None)
+    attributes = {"superheroes.renderer": type(renderer).__name__} if renderer else {}
+    render = tracer.start_span("render", attributes=attributes)
+
+    def rendered(response):
+        render.set_attribute("http.response.body.size", len(response.content))
+        render.end()
+
+    response.add_post_render_callback(rendered)
@@ -23,9 +23,12 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", include("health.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("superheroes.urls")),
     # API documentation
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
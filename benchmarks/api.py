@@ -0,0 +1,382 @@
+"""
+Measure the throughput and p50/p95/p99 latency of every API endpoint.
+
+By default requests go through Django's test client to a throwaway database
+holding ``--rows`` synthetic superheroes (see ``superheroes.generator``). With
+``--url`` they go to a running server instead, loaded beforehand with
+``python manage.py generate_superheroes``. Results are saved as JSON; ``--compare`` checks
+them against an earlier run and exits with status 1 when a scenario got
+slower by more than ``--threshold``::
+
+    python -m benchmarks.api --rows 10000 --output before.json
+    python -m benchmarks.api --rows 10000 --compare before.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile, setup_django, test_database
+
+LIST = "/api/superheroes/"
+DEEP_PAGE = 50
+
+# (name, path) of the read scenarios; ``{pk}`` cycles through existing ids and
+# ``{page}`` is page DEEP_PAGE of the list, or its last page if it has fewer.
+READS = [
+    ("list", LIST),
+    ("list_deep_page", f"{LIST}?page={{page}}"),
+    ("list_universe", f"{LIST}?universe=Marvel"),
+    ("list_active_heroes", f"{LIST}?is_active=true&is_villain=false"),
+    (
+        "list_power_range",
+        f"{LIST}?power_level_min=7&power_level_max=9&ordering=-power_level",
+    ),
+    ("list_universe_in_by_age", f"{LIST}?universe__in=DC,Custom&ordering=age"),
+    ("list_age_range", f"{LIST}?age_min=20&age_max=40&ordering=-created_at"),
+    ("list_cursor", f"{LIST}?paginate=cursor&is_villain=true"),
+    ("search", f"{LIST}?search=spider"),
+    ("search_filtered", f"{LIST}?search=strength&universe=DC"),
+    ("autocomplete", f"{LIST}autocomplete/?q=bat"),
+    ("detail", f"{LIST}{{pk}}/"),
+    ("by_universe", f"{LIST}by_universe/?universe=DC"),
+    ("top_superheroes", f"{LIST}top_superheroes/"),
+    ("villains", f"{LIST}villains/"),
+    ("stats", f"{LIST}stats/"),
+    ("stats_filtered", f"{LIST}stats/?universe=Marvel&is_villain=false"),
+    ("export_ndjson", f"{LIST}export/?power_level=10"),
+    ("export_csv", f"{LIST}export/?power_level=10&format=csv"),
+]
+WRITES = ["bulk_create", "bulk_update", "bulk_delete"]
+
+
+class ClientTarget:
+    """Send requests through Django's test client."""
+
+    name = "test-client"
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method, path, body=None):
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(body) if body is not None else "",
+            content_type="application/json",
+        )
+        if response.streaming:
+            content = b"".join(response.streaming_content)
+        else:
+            content = response.content
+        return response.status_code, content
+
+
+class HTTPTarget:
+    """Send requests to a running server."""
+
+    def __init__(self, url):
+        self.name = self.url = url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={"Content-Type": "application/json"},
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+
+def sample_ids(target, limit):
+    """Return up to ``limit`` ids of existing superheroes."""
+    status, content = target.request("GET", f"{LIST}export/?fields=id")
+    assert status == 200, f"export failed with status {status}"
+    lines = itertools.islice(content.splitlines(), limit)
+    return [json.loads(line)["id"] for line in lines]
+
+
+def deep_page(target):
+    """Return page ``DEEP_PAGE`` of the list, or its last page if it has fewer."""
+    status, content = target.request("GET", LIST)
+    assert status == 200, f"list failed with status {status}"
+    body = json.loads(content)
+    pages = math.ceil(body["count"] / max(len(body["results"]), 1))
+    return max(1, min(DEEP_PAGE, pages))
+
+
+def read_scenario(path, ids, page):
+    def build(index):
+        return "GET", path.format(pk=ids[index % len(ids)], page=page), None
+
+    return build, None
+
+
+def write_scenarios(bulk_size):
+    """
+    Return ``(build, collect)`` pairs for bulk create, update and delete.
+
+    Each create request adds a batch, which the update and delete requests of
+    the same index then work on, so the table ends up as it started.
+    """
+    run = f"{time.time():.0f}"
+    batches = {}
+
+    def build_create(index):
+        items = [
+            {"name": f"Benchmark {run}-{index}-{item}", "universe": "Custom"}
+            for item in range(bulk_size)
+        ]
+        return "POST", f"{LIST}bulk_create/", items
+
+    def collect_create(index, content):
+        results = json.loads(content)["results"]
+        batches[index] = [result["id"] for result in results if "id" in result]
+
+    def build_update(index):
+        items = [
+            {"id": pk, "power_level": index % 10 + 1, "is_active": bool(index % 2)}
+            for pk in batches[index]
+        ]
+        return "PATCH", f"{LIST}bulk_update/", items
+
+    def build_delete(index):
+        return "POST", f"{LIST}bulk_delete/", batches.pop(index)
+
+    return {
+        "bulk_create": (build_create, collect_create),
+        "bulk_update": (build_update, None),
+        "bulk_delete": (build_delete, None),
+    }
+
+
+def run_scenario(target, build, collect, requests, warmup, concurrency):
+    """Send ``warmup`` then ``requests`` requests; return the measurements."""
+
+    def timed(index):
+        method, path, body = build(index)
+        started = time.perf_counter()
+        status, content = target.request(method, path, body)
+        elapsed = time.perf_counter() - started
+        if collect is not None and status < 400:
+            collect(index, content)
+        return status, elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        send = executor.map if concurrency > 1 else map
+        list(send(timed, range(warmup)))
+        started = time.perf_counter()
+        results = list(send(timed, range(warmup, warmup + requests)))
+        wall = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for _, seconds in results]
+    return {
+        "requests": requests,
+        "errors": sum(status >= 400 for status, _ in results),
+        "throughput": round(requests / wall, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+def run(target, scenarios, args):
+    """Run the selected scenarios in order; return their measurements."""
+    ids = sample_ids(target, 1000)
+    assert ids, "the database holds no superheroes"
+    page = deep_page(target)
+    builders = {name: read_scenario(path, ids, page) for name, path in READS}
+    builders.update(write_scenarios(args.bulk_size))
+
+    results = {}
+    for name in scenarios:
+        build, collect = builders[name]
+        results[name] = run_scenario(
+            target, build, collect, args.requests, args.warmup, args.concurrency
+        )
+        print(format_result(name, results[name]))
+    return results
+
+
+def format_result(name, result):
+    line = (
+        f"{name:<24} {result['throughput']:8.1f} req/s"
+        f"  p50 {result['p50_ms']:8.2f} ms"
+        f"  p95 {result['p95_ms']:8.2f} ms"
+        f"  p99 {result['p99_ms']:8.2f} ms"
+    )
+    if result["errors"]:
+        line += f"  {result['errors']} errors"
+    return line
+
+
+def compare(baseline, results, threshold):
+    """
+    Return a description of each scenario whose p95 latency rose, or whose
+    throughput fell, by more than ``threshold`` (a fraction) since ``baseline``,
+    or which failed more often.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if result["errors"] > before["errors"]:
+            regressions.append(
+                f"{name}: errors {before['errors']} -> {result['errors']}"
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms"
+            )
+        if result["throughput"] < before["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {before['throughput']:.1f} -> "
+                f"{result['throughput']:.1f} req/s"
+            )
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--url", help="Benchmark the server at this URL instead of the test client"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=10000, help="Superheroes generated for the client"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Data generator seed")
+    parser.add_argument("--requests", type=int, default=200, help="Per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Requests in flight at once (only with --url)",
+    )
+    parser.add_argument(
+        "--bulk-size", type=int, default=100, help="Items per bulk request"
+    )
+    parser.add_argument(
+        "--scenarios",
+        help="Comma-separated scenarios to run (default: all)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the response cache on (test client only)",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Slowdown flagged as a regression by --compare (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    available = [name for name, _ in READS] + WRITES
+    args.scenarios = args.scenarios.split(",") if args.scenarios else available
+    unknown = set(args.scenarios).difference(available)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.concurrency > 1 and not args.url:
+        # The test client shares one connection, which is not thread safe.
+        parser.error("--concurrency needs --url")
+    return args
+
+
+def main():
+    args = parse_args()
+    setup_django()
+    import django
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    meta = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "bulk_size": args.bulk_size,
+    }
+    if args.url:
+        target = HTTPTarget(args.url)
+        meta.update(target=target.name)
+        print(f"{target.name}: {args.requests} requests per scenario")
+        results = run(target, args.scenarios, args)
+    else:
+        from django.core.management import call_command
+
+        cache = (
+            nullcontext() if args.cache else override_settings(RESPONSE_CACHE_TIMEOUT=0)
+        )
+        with test_database(), cache:
+            call_command("generate_superheroes", count=args.rows, seed=args.seed)
+            target = ClientTarget()
+            meta.update(
+                target=target.name,
+                database=connection.vendor,
+                rows=args.rows,
+                seed=args.seed,
+                cache=args.cache,
+            )
+            print(
+                f"{target.name} on {connection.vendor}, {args.rows} superheroes: "
+                f"{args.requests} requests per scenario"
+            )
+            results = run(target, args.scenarios, args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"meta": meta, "results": results}, output, indent=2)
+            output.write("\n")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\nRegressions since {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions since {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Load-test the sync and async read endpoints under simulated database latency.
+
+Every query is delayed by ``--latency`` milliseconds, as a remote PostgreSQL
+would delay it, and the same mix of list, detail, by_universe and stats
+requests is sent to:
+
+* the DRF endpoints through WSGI, ``--workers`` requests at a time, like
+  gunicorn's default sync workers;
+* the DRF endpoints through ASGI, ``--concurrency`` requests at a time;
+* the async endpoints (``/api/async/...``) through ASGI, likewise.
+
+Requests go straight to Django's WSGI/ASGI handlers, so no server is needed::
+
+    python -m benchmarks.async_views --requests 200 --latency 20
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentile, setup_django, test_database
+
+PATHS = [
+    "/api/superheroes/?page=2",
+    "/api/superheroes/{pk}/",
+    "/api/superheroes/by_universe/?universe=marvel",
+    "/api/superheroes/stats/?is_villain=false",
+]
+
+
+def wsgi_get(application, url):
+    """Send a GET through a WSGI application; return the status code."""
+    path, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    statuses = []
+    body = application(environ, lambda status, headers: statuses.append(status))
+    b"".join(body)
+    body.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_get(application, url):
+    """Send a GET through an ASGI application; return the status code."""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    received = False
+    messages = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; wait until Django stops listening.
+        await asyncio.Future()
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]["status"]
+
+
+def run_wsgi(application, urls, workers):
+    def timed(url):
+        started = time.perf_counter()
+        status = wsgi_get(application, url)
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(timed, urls))
+    return results, time.perf_counter() - started
+
+
+def run_asgi(application, urls, concurrency):
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(url):
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_get(application, url)
+                return status, time.perf_counter() - started
+
+        return await asyncio.gather(*(timed(url) for url in urls))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    return results, time.perf_counter() - started
+
+
+def report(label, results, elapsed, baseline=None):
+    statuses = {status for status, _ in results}
+    assert statuses == {200}, f"{label}: unexpected statuses {statuses}"
+    latencies = [seconds * 1000 for _, seconds in results]
+    line = (
+        f"{label:<30} {len(results) / elapsed:8.1f} req/s"
+        f"  p50 {percentile(latencies, 50):7.1f} ms"
+        f"  p95 {percentile(latencies, 95):7.1f} ms"
+        f"  p99 {percentile(latencies, 99):7.1f} ms"
+    )
+    if baseline is not None:
+        line += f" {baseline / elapsed:7.1f}x"
+    print(line)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000, help="Superheroes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per run")
+    parser.add_argument(
+        "--latency", type=float, default=20, help="Added latency per query (ms)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=3, help="Concurrent requests under WSGI"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=50, help="Concurrent requests under ASGI"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.asgi import get_asgi_application
+    from django.core.wsgi import get_wsgi_application
+    from django.db.backends.signals import connection_created
+    from django.test.utils import override_settings
+
+    from superheroes import stats
+    from superheroes.models import Superhero
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(args.latency / 1000)
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        # Insert below any wrapper installed for the current request (e.g. by
+        # PerformanceMiddleware), which is popped when the request ends.
+        connection.execute_wrappers.insert(0, delay)
+
+    with test_database(), override_settings(RESPONSE_CACHE_TIMEOUT=0):
+        Superhero.objects.bulk_create(
+            Superhero(
+                name=f"Hero {pk}",
+                universe="Marvel" if pk % 3 else "DC",
+                power_level=pk % 10 + 1,
+                is_villain=pk % 7 == 0,
+            )
+            for pk in range(1, args.rows + 1)
+        )
+        stats.rebuild()
+        pks = list(Superhero.objects.values_list("pk", flat=True)[:50])
+        urls = [
+            PATHS[i % len(PATHS)].format(pk=pks[i % len(pks)])
+            for i in range(args.requests)
+        ]
+        async_urls = [url.replace("/api/", "/api/async/", 1) for url in urls]
+
+        # Worker threads open their own connections; delay only those.
+        connection_created.connect(add_delay)
+        print(
+            f"{args.requests} requests, {args.latency:g} ms per query, "
+            f"{args.workers} WSGI workers, {args.concurrency} concurrent ASGI requests"
+        )
+        baseline = report(
+            "DRF views, WSGI",
+            *run_wsgi(get_wsgi_application(), urls, args.workers),
+        )
+        asgi = get_asgi_application()
+        report(
+            "DRF views, ASGI",
+            *run_asgi(asgi, urls, args.concurrency),
+            baseline,
+        )
+        report(
+            "async views, ASGI",
+            *run_asgi(asgi, async_urls, args.concurrency),
+            baseline,
+        )
+        connection_created.disconnect(add_delay)
+
+
+if __name__ == "__main__":
+    main()
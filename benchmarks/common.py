@@ -0,0 +1,55 @@
+"""Shared helpers for the benchmark scripts in this package."""
+
+import math
+import os
+import timeit
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Configure Django with the project settings, defaulting to SQLite."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DB_TYPE", "local")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run the body against a throwaway test database."""
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(func, number=10, repeat=5):
+    """Return the best time, in seconds, of one call to ``func``."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(label, seconds, items, baseline=None):
+    """Print one result line: time per call, throughput and speedup."""
+    line = f"{label:<36} {seconds * 1000:9.3f} ms {items / seconds:14,.0f} items/s"
+    if baseline is not None:
+        line += f" {baseline / seconds:7.1f}x"
+    print(line)
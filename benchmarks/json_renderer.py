@@ -0,0 +1,91 @@
+"""
+Compare DRF's ``JSONRenderer`` with ``ORJSONRenderer``.
+
+Renders a list page and a statistics payload built by the API's own
+serializers from in-memory data, so no database is needed::
+
+    python -m benchmarks.json_renderer --rows 1000
+"""
+
+import argparse
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per list page")
+    parser.add_argument("--number", type=int, default=10, help="Calls per timing")
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from superheroes import stats
+    from superheroes.models import Superhero
+    from superheroes.renderers import ORJSONRenderer
+    from superheroes.serializers import (
+        FastSuperheroListSerializer,
+        SuperheroDetailSerializer,
+        SuperheroStatsSerializer,
+    )
+
+    created_at = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    rows = [
+        {
+            "id": pk,
+            "name": f"Hero {pk}",
+            "alias": f"Alias {pk}" if pk % 2 else None,
+            "universe": ["Marvel", "DC", "Custom", "Other"][pk % 4],
+            "power_level": pk % 10 + 1,
+            "is_active": pk % 5 != 0,
+            "is_villain": pk % 7 == 0,
+            "created_at": created_at,
+        }
+        for pk in range(1, args.rows + 1)
+    ]
+    detail_page = SuperheroDetailSerializer(
+        [
+            Superhero(
+                **row,
+                height=Decimal("180.25"),
+                weight=Decimal("80.50"),
+                powers="Flight, strength",
+                updated_at=created_at,
+            )
+            for row in rows
+        ],
+        many=True,
+    ).data
+    payloads = {
+        "list page": {
+            "count": args.rows,
+            "next": None,
+            "previous": None,
+            "results": FastSuperheroListSerializer(rows).data,
+        },
+        "detail page": detail_page,
+        "stats": SuperheroStatsSerializer(
+            stats.build_stats(
+                (universe, level, 100, 80, 10)
+                for universe in ("Marvel", "DC", "Custom", "Other")
+                for level in range(1, 11)
+            )
+        ).data,
+    }
+
+    json_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+    for label, payload in payloads.items():
+        assert json_renderer.render(payload) == orjson_renderer.render(payload)
+        items = len(payload["results"]) if "results" in payload else len(payload)
+        print(f"Rendering {label} ({items} items)")
+        baseline = measure(lambda: json_renderer.render(payload), args.number)
+        report("  JSONRenderer", baseline, items)
+        fast = measure(lambda: orjson_renderer.render(payload), args.number)
+        report("  ORJSONRenderer", fast, items, baseline)
+
+
+if __name__ == "__main__":
+    main()
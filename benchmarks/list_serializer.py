@@ -0,0 +1,60 @@
+"""
+Compare ``SuperheroListSerializer`` with ``FastSuperheroListSerializer``.
+
+Both serialize the same in-memory page, so no database is needed::
+
+    python -m benchmarks.list_serializer --rows 1000
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--number", type=int, default=10, help="Calls per timing")
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from superheroes.models import Superhero
+    from superheroes.serializers import (
+        FastSuperheroListSerializer,
+        SuperheroListSerializer,
+    )
+
+    created_at = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+    rows = [
+        {
+            "id": pk,
+            "name": f"Hero {pk}",
+            "alias": f"Alias {pk}" if pk % 2 else None,
+            "universe": "Marvel" if pk % 3 else "DC",
+            "power_level": pk % 10 + 1,
+            "is_active": pk % 5 != 0,
+            "is_villain": pk % 7 == 0,
+            "created_at": created_at,
+        }
+        for pk in range(1, args.rows + 1)
+    ]
+    instances = [Superhero(**row) for row in rows]
+    renderer = JSONRenderer()
+    assert renderer.render(
+        SuperheroListSerializer(instances, many=True).data
+    ) == renderer.render(FastSuperheroListSerializer(rows).data)
+
+    print(f"Serializing {args.rows} superheroes")
+    baseline = measure(
+        lambda: SuperheroListSerializer(instances, many=True).data, args.number
+    )
+    report("SuperheroListSerializer", baseline, args.rows)
+    fast = measure(lambda: FastSuperheroListSerializer(rows).data, args.number)
+    report("FastSuperheroListSerializer", fast, args.rows, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,24 @@ python manage.py makemigrations
 
 python manage.py migrate
 
-gunicorn base.wsgi:application --workers 3 --bind [::]:8000 
+# Gunicorn runs several worker processes, and a locmem cache lives in one of
+# them: a write in one worker would not invalidate the responses the others
+# cached. Share the response cache between workers unless one is configured.
+export CACHE_BACKEND="${CACHE_BACKEND:-file}"
+export CACHE_LOCATION="${CACHE_LOCATION:-/tmp/superheroes-cache}"
+
+# A scrape of /metrics reaches one worker; workers write their metrics to
+# METRICS_DIR so it can serve the sum. Start from an empty directory.
+export METRICS_DIR="${METRICS_DIR:-/tmp/superheroes-metrics}"
+mkdir -p "$METRICS_DIR"
+rm -f "$METRICS_DIR"/*.json "$METRICS_DIR"/*.tmp
+
+# SERVER_MODE=asgi serves base.asgi through uvicorn workers, so the async
+# endpoints under /api/async/ wait on the database without blocking a worker.
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    exec gunicorn base.asgi:application --workers "${WEB_CONCURRENCY:-3}" \
+        --worker-class uvicorn_worker.UvicornWorker --bind [::]:8000
+fi
+
+exec gunicorn base.wsgi:application --workers "${WEB_CONCURRENCY:-3}" --bind [::]:8000
 
@@ -0,0 +1,50 @@
+"""
+Database connection metrics for the health endpoints.
+
+With ``DB_POOL`` enabled, PostgreSQL connections come from psycopg's pool and
+its counters (connections in use, idle, waiting requests and time spent
+waiting) are reported. Otherwise Django's persistent connection settings are
+reported, together with whether this worker currently holds a connection.
+"""
+
+from django.db import connections
+
+
+def pool_stats(connection):
+    """Return the connection metrics of one database connection handler."""
+    stats = {
+        "vendor": connection.vendor,
+        "pooled": False,
+        "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+        "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+        "connected": connection.connection is not None,
+    }
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return stats
+
+    counters = pool.get_stats()
+    size = counters.get("pool_size", 0)
+    idle = counters.get("pool_available", 0)
+    queued = counters.get("requests_queued", 0)
+    wait_ms = counters.get("requests_wait_ms", 0)
+    stats.update(
+        pooled=True,
+        min_size=counters.get("pool_min", pool.min_size),
+        max_size=counters.get("pool_max", pool.max_size),
+        size=size,
+        in_use=size - idle,
+        idle=idle,
+        waiting=counters.get("requests_waiting", 0),
+        requests=counters.get("requests_num", 0),
+        queued_requests=queued,
+        wait_ms_total=wait_ms,
+        wait_ms_avg=round(wait_ms / queued, 2) if queued else 0,
+        errors=counters.get("requests_errors", 0),
+    )
+    return stats
+
+
+def database_pool_stats():
+    """Return ``pool_stats`` for every configured database alias."""
+    return {alias: pool_stats(connections[alias]) for alias in connections}
@@ -0,0 +1,129 @@
+"""
+Dependency probes behind the readiness endpoint.
+
+Every probe runs in its own thread with its own timeout, so one slow
+dependency neither delays the others nor hangs the endpoint. Results are
+cached in-process for ``HEALTH_READY_CACHE_TTL`` seconds and concurrent
+requests share one probe run, so frequent load-balancer checks cost at most
+one database round-trip per worker per TTL.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+PROBE_CACHE_KEY = "health:probe"
+
+_lock = threading.Lock()
+_cached = None  # (expires at, result)
+
+
+def check_database(alias):
+    """Time a ``SELECT 1`` round-trip."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return {}
+
+
+def check_cache(alias):
+    """Write and read back a unique value."""
+    cache = caches[alias]
+    token = uuid.uuid4().hex
+    cache.set(PROBE_CACHE_KEY, token, timeout=30)
+    if cache.get(PROBE_CACHE_KEY) != token:
+        raise RuntimeError("cache did not return the value written")
+    return {}
+
+
+def check_migrations(alias):
+    """Fail while migrations are unapplied, e.g. mid-deploy."""
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f"{len(plan)} unapplied migration(s)")
+    return {}
+
+
+def get_probes():
+    """Return ``{name: (check, argument)}`` for every dependency to probe."""
+    probes = {
+        f"database:{alias}": (check_database, alias) for alias in settings.DATABASES
+    }
+    probes[f"cache:{settings.RESPONSE_CACHE_ALIAS}"] = (
+        check_cache,
+        settings.RESPONSE_CACHE_ALIAS,
+    )
+    probes["migrations"] = (check_migrations, "default")
+    return probes
+
+
+def run_probe(check, argument):
+    """Run one probe; return its status, latency and any error."""
+    started = time.perf_counter()
+    try:
+        result = {"status": "ok", **check(argument)}
+    except Exception as exc:
+        result = {"status": "error", "error": str(exc) or exc.__class__.__name__}
+    finally:
+        # Probe threads are discarded, so hand their connections back now.
+        connections.close_all()
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def run_probes(probes, timeout):
+    """Run ``probes`` concurrently, giving each at most ``timeout`` seconds."""
+    executor = ThreadPoolExecutor(
+        max_workers=len(probes), thread_name_prefix="health-probe"
+    )
+    started = time.monotonic()
+    futures = {
+        name: executor.submit(run_probe, check, argument)
+        for name, (check, argument) in probes.items()
+    }
+    checks = {}
+    for name, future in futures.items():
+        remaining = max(0, started + timeout - time.monotonic())
+        try:
+            checks[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            checks[name] = {
+                "status": "timeout",
+                "error": f"no answer within {timeout:g}s",
+                "latency_ms": round(timeout * 1000, 2),
+            }
+    # Don't wait for probes that timed out; their threads finish on their own.
+    executor.shutdown(wait=False)
+    return checks
+
+
+def readiness():
+    """
+    Return ``(ready, checks, cached)``, probing the dependencies at most once
+    per ``HEALTH_READY_CACHE_TTL`` seconds.
+    """
+    global _cached
+    with _lock:
+        now = time.monotonic()
+        if _cached is not None and _cached[0] > now:
+            ready, checks = _cached[1]
+            return ready, checks, True
+        checks = run_probes(get_probes(), settings.HEALTH_PROBE_TIMEOUT)
+        ready = all(check["status"] == "ok" for check in checks.values())
+        _cached = (time.monotonic() + settings.HEALTH_READY_CACHE_TTL, (ready, checks))
+    return ready, checks, False
+
+
+def clear_cache():
+    """Forget the cached readiness result."""
+    global _cached
+    with _lock:
+        _cached = None
@@ -8,3 +8,85 @@ class HealthCheckResponseSerializer(serializers.Serializer):
     code = serializers.IntegerField(help_text="HTTP status code")
     message = serializers.CharField(help_text="Health check message")
     version = serializers.CharField(help_text="API version")
+
+
+class DatabasePoolSerializer(serializers.Serializer):
+    """Serializer for the connection metrics of one database."""
+
+    vendor = serializers.CharField(help_text="Database vendor")
+    pooled = serializers.BooleanField(help_text="Whether connections are pooled")
+    conn_max_age = serializers.IntegerField(
+        allow_null=True, help_text="Lifetime of persistent connections in seconds"
+    )
+    health_checks = serializers.BooleanField(
+        help_text="Whether persistent connections are checked before reuse"
+    )
+    connected = serializers.BooleanField(
+        help_text="Whether this worker holds an open connection"
+    )
+    min_size = serializers.IntegerField(required=False, help_text="Pool minimum size")
+    max_size = serializers.IntegerField(required=False, help_text="Pool maximum size")
+    size = serializers.IntegerField(required=False, help_text="Open connections")
+    in_use = serializers.IntegerField(
+        required=False, help_text="Connections handed out to requests"
+    )
+    idle = serializers.IntegerField(
+        required=False, help_text="Connections ready in the pool"
+    )
+    waiting = serializers.IntegerField(
+        required=False, help_text="Requests currently waiting for a connection"
+    )
+    requests = serializers.IntegerField(
+        required=False, help_text="Connections requested from the pool"
+    )
+    queued_requests = serializers.IntegerField(
+        required=False, help_text="Requests that had to wait for a connection"
+    )
+    wait_ms_total = serializers.IntegerField(
+        required=False, help_text="Total time spent waiting for connections (ms)"
+    )
+    wait_ms_avg = serializers.FloatField(
+        required=False, help_text="Average wait of the requests that waited (ms)"
+    )
+    errors = serializers.IntegerField(
+        required=False, help_text="Connection requests that failed or timed out"
+    )
+
+
+class PoolHealthResponseSerializer(serializers.Serializer):
+    """Serializer for the connection pool health response."""
+
+    status = serializers.CharField(help_text="Status of the health check")
+    databases = serializers.DictField(
+        child=DatabasePoolSerializer(), help_text="Metrics by database alias"
+    )
+
+
+class ProbeResultSerializer(serializers.Serializer):
+    """Serializer for the result of one dependency probe."""
+
+    status = serializers.ChoiceField(
+        choices=["ok", "error", "timeout"], help_text="Outcome of the probe"
+    )
+    latency_ms = serializers.FloatField(help_text="Time the probe took (ms)")
+    error = serializers.CharField(required=False, help_text="Why the probe failed")
+
+
+class ReadinessResponseSerializer(serializers.Serializer):
+    """Serializer for the readiness response."""
+
+    status = serializers.ChoiceField(
+        choices=["ready", "unavailable"], help_text="Whether to route traffic here"
+    )
+    cached = serializers.BooleanField(
+        help_text="Whether the probe results were reused from a recent run"
+    )
+    checks = serializers.DictField(
+        child=ProbeResultSerializer(), help_text="Probe results by dependency"
+    )
+
+
+class LivenessResponseSerializer(serializers.Serializer):
+    """Serializer for the liveness response."""
+
+    status = serializers.CharField(help_text="Always alive while the worker serves")
@@ -1,8 +1,17 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
+from . import probes
+from .pool import pool_stats
+
 
 class HealthCheckTest(APITestCase):
     """Test cases for health check endpoint."""
@@ -104,3 +113,136 @@ class HealthCheckIntegrationTest(TestCase):
             response.status_code,
             [status.HTTP_200_OK, status.HTTP_301_MOVED_PERMANENTLY],
         )
+
+
+class PoolHealthCheckTest(APITestCase):
+    """Test cases for the connection pool health endpoint."""
+
+    def setUp(self):
+        """Set up test client."""
+        self.client = APIClient()
+        self.pool_url = reverse("health_pool")
+
+    def test_pool_health_reports_every_database(self):
+        """Test the endpoint reports connection settings per database alias."""
+        response = self.client.get(self.pool_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "success")
+        default = response.data["databases"]["default"]
+        self.assertEqual(default["vendor"], connection.vendor)
+        self.assertFalse(default["pooled"])
+        self.assertEqual(
+            default["conn_max_age"], connection.settings_dict["CONN_MAX_AGE"]
+        )
+        self.assertIn("connected", default)
+
+    def test_pool_stats_from_pool_counters(self):
+        """Test psycopg pool counters are mapped to in use, idle and wait time."""
+        pool = mock.Mock(min_size=2, max_size=10)
+        pool.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 5,
+            "pool_available": 2,
+            "requests_waiting": 1,
+            "requests_num": 40,
+            "requests_queued": 4,
+            "requests_wait_ms": 50,
+        }
+        fake_connection = mock.Mock(
+            vendor="postgresql",
+            settings_dict={"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True},
+            connection=None,
+            pool=pool,
+        )
+
+        stats = pool_stats(fake_connection)
+
+        self.assertTrue(stats["pooled"])
+        self.assertEqual(stats["in_use"], 3)
+        self.assertEqual(stats["idle"], 2)
+        self.assertEqual(stats["waiting"], 1)
+        self.assertEqual(stats["wait_ms_total"], 50)
+        self.assertEqual(stats["wait_ms_avg"], 12.5)
+        self.assertEqual(stats["errors"], 0)
+
+
+class ReadinessCheckTest(APITestCase):
+    """Test cases for the readiness and liveness endpoints."""
+
+    def setUp(self):
+        """Set up test client and forget earlier probe results."""
+        self.client = APIClient()
+        self.ready_url = reverse("health_ready")
+        probes.clear_cache()
+        self.addCleanup(probes.clear_cache)
+
+    def test_liveness(self):
+        """Test liveness answers without touching the database."""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("health_live"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"status": "alive"})
+
+    def test_ready(self):
+        """Test every dependency is probed and timed."""
+        response = self.client.get(self.ready_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "ready")
+        self.assertFalse(response.data["cached"])
+        checks = response.data["checks"]
+        self.assertEqual(
+            set(checks),
+            {
+                "database:default",
+                f"cache:{settings.RESPONSE_CACHE_ALIAS}",
+                "migrations",
+            },
+        )
+        for check in checks.values():
+            self.assertEqual(check["status"], "ok")
+            self.assertGreaterEqual(check["latency_ms"], 0)
+
+    def test_results_are_cached(self):
+        """Test probes run once per TTL however often readiness is polled."""
+        with mock.patch.object(
+            probes, "check_database", wraps=probes.check_database
+        ) as check_database:
+            self.client.get(self.ready_url)
+            response = self.client.get(self.ready_url)
+
+        self.assertTrue(response.data["cached"])
+        check_database.assert_called_once()
+
+    @override_settings(HEALTH_READY_CACHE_TTL=0)
+    def test_failing_probe(self):
+        """Test a failing dependency makes the instance unavailable."""
+        with mock.patch.object(
+            probes, "check_cache", side_effect=ConnectionError("refused")
+        ):
+            response = self.client.get(self.ready_url)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["status"], "unavailable")
+        cache_check = response.data["checks"][f"cache:{settings.RESPONSE_CACHE_ALIAS}"]
+        self.assertEqual(cache_check["status"], "error")
+        self.assertEqual(cache_check["error"], "refused")
+        self.assertEqual(response.data["checks"]["database:default"]["status"], "ok")
+
+    @override_settings(HEALTH_PROBE_TIMEOUT=0.05, HEALTH_READY_CACHE_TTL=0)
+    def test_slow_probe_times_out(self):
+        """Test a hanging probe is reported without holding up the response."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with mock.patch.object(
+            probes, "check_migrations", side_effect=lambda alias: release.wait(5)
+        ):
+            started = time.monotonic()
+            response = self.client.get(self.ready_url)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["checks"]["migrations"]["status"], "timeout")
+        self.assertLess(elapsed, 2)
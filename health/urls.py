@@ -1,5 +1,10 @@
 from django.urls import path
 
-from .views import HealthCheck
+from .views import HealthCheck, LivenessCheck, PoolHealthCheck, ReadinessCheck
 
-urlpatterns = [path("", HealthCheck.as_view(), name="health_check")]
+urlpatterns = [
+    path("", HealthCheck.as_view(), name="health_check"),
+    path("pool/", PoolHealthCheck.as_view(), name="health_pool"),
+    path("ready/", ReadinessCheck.as_view(), name="health_ready"),
+    path("live/", LivenessCheck.as_view(), name="health_live"),
+]
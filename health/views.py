@@ -3,7 +3,14 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .serializers import HealthCheckResponseSerializer
+from .pool import database_pool_stats
+from .probes import readiness
+from .serializers import (
+    HealthCheckResponseSerializer,
+    LivenessResponseSerializer,
+    PoolHealthResponseSerializer,
+    ReadinessResponseSerializer,
+)
 
 
 class HealthCheck(APIView):
@@ -35,3 +42,66 @@ class HealthCheck(APIView):
             "version": "0.1.0",
         }
         return Response(response, status.HTTP_200_OK)
+
+
+class PoolHealthCheck(APIView):
+    """Database connection and pool metrics of the serving worker."""
+
+    @extend_schema(
+        operation_id="health_pool",
+        summary="Connection Pool Health",
+        description=(
+            "Report database connection settings and, when pooling is enabled, "
+            "connections in use, idle connections and time spent waiting for one"
+        ),
+        responses={200: PoolHealthResponseSerializer},
+        tags=["Health"],
+    )
+    def get(self, request, *args, **kwargs):
+        """Get connection metrics for every database."""
+        return Response(
+            {"status": "success", "databases": database_pool_stats()},
+            status.HTTP_200_OK,
+        )
+
+
+class ReadinessCheck(APIView):
+    """Readiness probe: can this instance serve traffic right now?"""
+
+    @extend_schema(
+        operation_id="health_ready",
+        summary="Readiness Check",
+        description=(
+            "Probe the databases, the response cache and the migration state "
+            "concurrently. Answers 503 when any probe fails or times out. "
+            "Results are reused for a few seconds."
+        ),
+        responses={200: ReadinessResponseSerializer, 503: ReadinessResponseSerializer},
+        tags=["Health"],
+    )
+    def get(self, request, *args, **kwargs):
+        """Get the readiness of the API and its dependencies."""
+        ready, checks, cached = readiness()
+        return Response(
+            {
+                "status": "ready" if ready else "unavailable",
+                "cached": cached,
+                "checks": checks,
+            },
+            status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class LivenessCheck(APIView):
+    """Liveness probe: is the worker process serving requests?"""
+
+    @extend_schema(
+        operation_id="health_live",
+        summary="Liveness Check",
+        description="Answer without touching any dependency",
+        responses={200: LivenessResponseSerializer},
+        tags=["Health"],
+    )
+    def get(self, request, *args, **kwargs):
+        """Get the liveness of the API process."""
+        return Response({"status": "alive"}, status.HTTP_200_OK)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
+from . import stats
 from .models import Superhero
+from .signals import superheroes_changed
 
 
 @admin.register(Superhero)
@@ -69,30 +71,39 @@ class SuperheroAdmin(admin.ModelAdmin):
 
     actions = ["make_active", "make_inactive", "make_superhero", "make_villain"]
 
+    def delete_queryset(self, request, queryset):
+        """Delete selected superheroes, updating statistics once per bucket."""
+        with stats.deferred():
+            super().delete_queryset(request, queryset)
+
     def make_active(self, request, queryset):
         """Mark selected superheroes as active."""
-        updated = queryset.update(is_active=True)
+        updated = stats.track_update(queryset, is_active=True)
+        superheroes_changed.send(sender=Superhero)
         self.message_user(request, f"{updated} superheroes marked as active.")
 
     make_active.short_description = "Mark selected superheroes as active"
 
     def make_inactive(self, request, queryset):
         """Mark selected superheroes as inactive."""
-        updated = queryset.update(is_active=False)
+        updated = stats.track_update(queryset, is_active=False)
+        superheroes_changed.send(sender=Superhero)
         self.message_user(request, f"{updated} superheroes marked as inactive.")
 
     make_inactive.short_description = "Mark selected superheroes as inactive"
 
     def make_superhero(self, request, queryset):
         """Mark selected characters as superheroes."""
-        updated = queryset.update(is_villain=False)
+        updated = stats.track_update(queryset, is_villain=False)
+        superheroes_changed.send(sender=Superhero)
         self.message_user(request, f"{updated} characters marked as superheroes.")
 
     make_superhero.short_description = "Mark selected characters as superheroes"
 
     def make_villain(self, request, queryset):
         """Mark selected characters as villains."""
-        updated = queryset.update(is_villain=True)
+        updated = stats.track_update(queryset, is_villain=True)
+        superheroes_changed.send(sender=Superhero)
         self.message_user(request, f"{updated} characters marked as villains.")
 
     make_villain.short_description = "Mark selected characters as villains"
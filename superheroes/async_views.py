@@ -0,0 +1,179 @@
+"""
+Async (ASGI-native) versions of the superhero read endpoints.
+
+DRF views are synchronous, so under ASGI every request to them is handed to a
+worker thread for its whole duration. These views run on the event loop and
+only leave it for the queries themselves, through Django's async ORM, so a
+slow query no longer ties up a worker while it waits on the database.
+
+Filtering, ordering, sparse fieldsets, pagination and serialization are
+delegated to the matching ``SuperheroViewSet`` / ``SuperheroStatsView``
+configuration, so responses are the same as those of the synchronous
+endpoints. The response cache and conditional request handling stay with the
+synchronous endpoints.
+"""
+
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable, NotFound
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from base import replicas
+
+from . import stats
+from .filters import SuperheroFilter
+from .models import Superhero
+from .pagination import AsyncPageNumberPagination, KeysetPagination
+from .serializers import FastSuperheroListSerializer, SuperheroStatsSerializer
+from .views import SuperheroStatsView, SuperheroViewSet, universe_lookup
+
+
+class AsyncSuperheroView(View):
+    """
+    Base class of the async read views.
+
+    ``drf_view`` is an instance of ``drf_view_class`` set up for the request as
+    ``action``; handlers use it for everything but fetching rows.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    drf_view_class = SuperheroViewSet
+    action = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = Request(request)
+        self.drf_view = self.drf_view_class(
+            request=self.request,
+            action=self.action,
+            args=args,
+            kwargs=kwargs,
+            format_kwarg=None,
+            pagination_class=AsyncPageNumberPagination,
+        )
+        replicas.allow_replica_reads(
+            (self.action or "get") in self.drf_view_class.replica_actions
+        )
+        handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+        try:
+            response = await handler(self.request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(response)
+
+    def handle_exception(self, exc):
+        """Turn API exceptions into error responses like DRF views do."""
+        handler = api_settings.EXCEPTION_HANDLER
+        response = handler(exc, {"view": self.drf_view, "request": self.request})
+        if response is None:
+            raise exc
+        return response
+
+    def finalize_response(self, response):
+        """Pick a renderer for a DRF ``Response`` by content negotiation."""
+        if not isinstance(response, Response):
+            return response
+        renderers = [
+            renderer()
+            for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+            if not issubclass(renderer, BrowsableAPIRenderer)
+        ]
+        negotiation = DefaultContentNegotiation()
+        try:
+            renderer, media_type = negotiation.select_renderer(self.request, renderers)
+        except NotAcceptable:
+            renderer, media_type = renderers[0], renderers[0].media_type
+        response.accepted_renderer = renderer
+        response.accepted_media_type = media_type
+        response.renderer_context = {
+            "view": self.drf_view,
+            "request": self.request,
+            "response": response,
+        }
+        return response
+
+    async def filter_queryset(self, queryset):
+        # Filter backends may look up database features synchronously (e.g.
+        # whether the full-text search tables exist), so run them in a thread.
+        return await sync_to_async(self.drf_view.filter_queryset)(queryset)
+
+    async def list_response(self, queryset):
+        """Async counterpart of ``SuperheroViewSet.list_response``."""
+        view = self.drf_view
+        fields = view.get_selected_fields(FastSuperheroListSerializer.fields)
+        paginator = view.paginator
+        keyset = isinstance(paginator, KeysetPagination)
+        rows = FastSuperheroListSerializer.values(
+            queryset,
+            fields,
+            extra_columns=paginator.cursor_columns(queryset, view) if keyset else (),
+        )
+        page = await paginator.apaginate_queryset(rows, self.request, view=view)
+        if page is None:
+            page = [row async for row in rows]
+            return Response(FastSuperheroListSerializer(page, fields).data)
+        return paginator.get_paginated_response(
+            FastSuperheroListSerializer(page, fields).data
+        )
+
+
+class AsyncSuperheroListView(AsyncSuperheroView):
+    """Async ``GET /api/async/superheroes/``."""
+
+    action = "list"
+
+    async def get(self, request):
+        view = self.drf_view
+        queryset = await self.filter_queryset(view.get_queryset())
+        return await self.list_response(queryset)
+
+
+class AsyncSuperheroDetailView(AsyncSuperheroView):
+    """Async ``GET /api/async/superheroes/<pk>/``."""
+
+    action = "retrieve"
+
+    async def get(self, request, pk):
+        view = self.drf_view
+        try:
+            superhero = await view.get_queryset().aget(pk=pk)
+        except Superhero.DoesNotExist:
+            raise NotFound("No Superhero matches the given query.")
+        except (TypeError, ValueError):
+            raise NotFound()
+        return Response(view.get_serializer(superhero).data)
+
+
+class AsyncSuperheroByUniverseView(AsyncSuperheroView):
+    """Async ``GET /api/async/superheroes/by_universe/``."""
+
+    action = "by_universe"
+
+    async def get(self, request):
+        universe = request.query_params.get("universe")
+        if not universe:
+            return Response(
+                {"error": "Universe parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.drf_view.queryset.filter(universe_lookup(universe))
+        return await self.list_response(queryset)
+
+
+class AsyncSuperheroStatsView(AsyncSuperheroView):
+    """Async ``GET /api/async/superheroes/stats/``."""
+
+    drf_view_class = SuperheroStatsView
+
+    async def get(self, request):
+        view = self.drf_view
+        if any(name in request.query_params for name in SuperheroFilter.base_filters):
+            queryset = await self.filter_queryset(view.get_queryset())
+            stats_data = await stats.aaggregate_stats(queryset)
+        else:
+            stats_data = await stats.asnapshot_stats()
+        return Response(SuperheroStatsSerializer(stats_data).data)
@@ -0,0 +1,150 @@
+"""
+Typeahead lookups over superhero names, aliases and real names.
+
+On PostgreSQL lookups use the ``pg_trgm`` GIN indexes of migration 0005 and
+are ranked by word similarity. Other databases (SQLite in development) use an
+in-process prefix trie built from the superhero table. Each trie is tagged with
+the response cache generation (see ``superheroes.cache``) and rebuilt once the
+generation moves on, so writes served by any worker invalidate the tries of
+all workers sharing the cache.
+"""
+
+import threading
+from collections import deque
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from . import cache
+from .models import Superhero, format_display_name
+
+AUTOCOMPLETE_FIELDS = ["name", "alias", "real_name"]
+
+
+class TrigramAutocomplete:
+    """``pg_trgm`` backed lookups for PostgreSQL."""
+
+    vendor = "postgresql"
+
+    def lookup(self, query, limit, using):
+        table = connections[using].ops.quote_name(Superhero._meta.db_table)
+        columns = [f"{table}.{field}" for field in AUTOCOMPLETE_FIELDS]
+        # "<%" is pg_trgm's word similarity operator; it can use the GIN indexes.
+        matches = " OR ".join(f"%s <%% {column}" for column in columns)
+        score = ", ".join(
+            f"word_similarity(%s, coalesce({column}, ''))" for column in columns
+        )
+        rows = (
+            Superhero.objects.using(using)
+            .filter(
+                RawSQL(
+                    f"({matches})", [query] * len(columns), output_field=BooleanField()
+                )
+            )
+            .alias(
+                similarity=RawSQL(
+                    f"GREATEST({score})",
+                    [query] * len(columns),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-similarity", "name")
+            .values_list("id", "name", "alias")[:limit]
+        )
+        return [
+            {"id": pk, "display_name": format_display_name(name, alias)}
+            for pk, name, alias in rows
+        ]
+
+
+class PrefixTrie:
+    """
+    Prefix trie mapping every word-start suffix of a superhero's name, alias and
+    real name to the superhero's id.
+    """
+
+    def __init__(self, rows=()):
+        self.root = {}
+        self.display_names = {}
+        for pk, name, alias, real_name in rows:
+            self.display_names[pk] = format_display_name(name, alias)
+            for value in (name, alias, real_name):
+                if value:
+                    for key in self.keys_for(value):
+                        self.insert(key, pk)
+
+    @staticmethod
+    def keys_for(value):
+        value = value.lower()
+        yield value
+        for start, char in enumerate(value[1:], start=1):
+            if char.isalnum() and not value[start - 1].isalnum():
+                yield value[start:]
+
+    def insert(self, key, pk):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(None, set()).add(pk)
+
+    def lookup(self, query, limit):
+        """
+        Return up to ``limit`` superheroes with a key starting with ``query``.
+
+        Keys are visited breadth-first, so shorter (more similar) completions
+        rank first.
+        """
+        node = self.root
+        for char in query.lower():
+            node = node.get(char)
+            if node is None:
+                return []
+
+        found = {}
+        queue = deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            for pk in sorted(node.get(None, ()), key=lambda pk: self.display_names[pk]):
+                found.setdefault(pk, self.display_names[pk])
+            queue.extend(
+                node[char] for char in sorted(key for key in node if key is not None)
+            )
+        return [
+            {"id": pk, "display_name": name} for pk, name in list(found.items())[:limit]
+        ]
+
+
+class TrieAutocomplete:
+    """In-process prefix trie used where trigram indexes are unavailable."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tries = {}
+
+    def lookup(self, query, limit, using):
+        generation = cache.get_generation()
+        built = self._tries.get(using)
+        if built is None or built[0] != generation:
+            with self._lock:
+                built = self._tries.get(using)
+                if built is None or built[0] != generation:
+                    rows = Superhero.objects.using(using).values_list(
+                        "id", *AUTOCOMPLETE_FIELDS
+                    )
+                    built = self._tries[using] = (
+                        generation,
+                        PrefixTrie(rows.iterator()),
+                    )
+        return built[1].lookup(query, limit)
+
+
+trigram_autocomplete = TrigramAutocomplete()
+trie_autocomplete = TrieAutocomplete()
+
+
+def autocomplete(query, limit, using="default"):
+    """Return ``[{"id", "display_name"}]`` suggestions for ``query``."""
+    if connections[using].vendor == trigram_autocomplete.vendor:
+        return trigram_autocomplete.lookup(query, limit, using)
+    return trie_autocomplete.lookup(query, limit, using)
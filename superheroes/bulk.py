@@ -0,0 +1,388 @@
+"""
+Batched writes behind the bulk endpoints of ``SuperheroViewSet``.
+
+A batch is validated with one case-insensitive name lookup per chunk instead of
+one ``exists()`` query per item, and written with ``bulk_create`` /
+``bulk_update`` in one transaction per chunk. Every item gets its own result,
+so a bad item never rejects the rest of the batch. Toggles flip a flag with a
+single ``UPDATE ... RETURNING`` per chunk, without reading the rows first.
+
+Bulk writes bypass model signals, so the statistics counters and
+``superheroes_changed`` are maintained here; each chunk's counter changes are
+written in the chunk's transaction.
+"""
+
+from itertools import islice
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import stats
+from .models import STATS_BUCKET_FIELDS, Superhero
+from .serializers import (
+    DUPLICATE_NAME,
+    SuperheroBulkCreateSerializer,
+    SuperheroBulkUpdateSerializer,
+    is_duplicate_name,
+)
+from .signals import send_changed
+
+BATCH_SIZE = 1000
+MAX_ITEMS = 10000
+
+DUPLICATE_ID = "This superhero appears more than once in the batch."
+NOT_FOUND = "Superhero not found."
+INVALID_ID = "A valid integer id is required."
+
+
+def chunked(items, size=BATCH_SIZE):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_create(items, using="default"):
+    """Create superheroes from a list of payloads; return per-item results."""
+    results = [None] * len(items)
+    valid = []
+    serializer = SuperheroBulkCreateSerializer()
+    for index, item in enumerate(items):
+        data, errors = _validate(serializer, item)
+        if errors:
+            results[index] = _error(index, errors)
+        else:
+            valid.append((index, data))
+
+    created = []
+    for chunk in chunked(valid):
+        with transaction.atomic(using=using), stats.deferred():
+            chunk = _reject_taken_names(chunk, results, using)
+            for index, instance in _insert(chunk, results, using):
+                results[index] = {
+                    "index": index,
+                    "status": "created",
+                    "id": instance.pk,
+                }
+                stats.record(None, stats.bucket_of(instance), using)
+                created.append(instance)
+    if created:
+        send_changed(Superhero, using)
+    return results
+
+
+def bulk_update(items, using="default"):
+    """
+    Partially update superheroes from payloads carrying their ``id``; return
+    per-item results.
+    """
+    results = [None] * len(items)
+    targets = []
+    seen = set()
+    for index, item in enumerate(items):
+        pk = item.get("id") if isinstance(item, dict) else None
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            results[index] = _error(index, {"id": [INVALID_ID]})
+        elif pk in seen:
+            results[index] = _error(index, {"id": [DUPLICATE_ID]})
+        else:
+            seen.add(pk)
+            targets.append((index, pk, item))
+
+    updated = []
+    serializer = SuperheroBulkUpdateSerializer(partial=True)
+    for chunk in chunked(targets):
+        # bulk_update() writes the union of the fields changed in the chunk, so
+        # lock the rows until it is done: no concurrent write to a field an item
+        # left alone can be overwritten with the value read here.
+        with transaction.atomic(using=using), stats.deferred():
+            instances = (
+                Superhero.objects.using(using)
+                .select_for_update()
+                .in_bulk([pk for _, pk, _ in chunk])
+            )
+            valid = _validate_updates(serializer, chunk, instances, results)
+            valid = _reject_taken_names(valid, results, using)
+            for index, instance in _update(valid, results, using):
+                results[index] = {
+                    "index": index,
+                    "status": "updated",
+                    "id": instance.pk,
+                }
+                new_bucket = stats.bucket_of(instance)
+                stats.record(instance._stats_bucket, new_bucket, using)
+                instance._stats_bucket = new_bucket
+                updated.append(instance)
+    if updated:
+        send_changed(Superhero, using)
+    return results
+
+
+def bulk_delete(ids, using="default"):
+    """Delete superheroes by id; return per-item results."""
+    results = [None] * len(ids)
+    targets = _collect_ids(ids, results)
+
+    deleted = 0
+    for chunk in chunked(list(targets)):
+        with transaction.atomic(using=using), stats.deferred():
+            queryset = Superhero.objects.using(using).filter(pk__in=chunk)
+            buckets = {
+                pk: tuple(bucket)
+                for pk, *bucket in queryset.values_list("pk", *STATS_BUCKET_FIELDS)
+            }
+            # QuerySet.delete() would load every row, send pre_delete and
+            # post_delete for each, and delete them 100 at a time. Skipping it
+            # with the private _raw_delete() (one DELETE, no signals) is safe
+            # because:
+            # - nothing references superheroes, so the collector has nothing to
+            #   cascade; SuperheroBulkTest.test_nothing_references_superheroes
+            #   fails as soon as a relation appears;
+            # - the only delete signal receivers are ours, and the work they do
+            #   (counters, superheroes_changed) is done here instead.
+            queryset._raw_delete(using)
+            for pk in chunk:
+                index = targets[pk]
+                if pk in buckets:
+                    results[index] = {"index": index, "status": "deleted", "id": pk}
+                    stats.record(buckets[pk], None, using)
+                    deleted += 1
+                else:
+                    results[index] = _error(index, {"id": [NOT_FOUND]}, pk)
+    if deleted:
+        send_changed(Superhero, using)
+    return results
+
+
+def bulk_toggle(ids, field, using="default"):
+    """Flip the boolean ``field`` of superheroes by id; return per-item results."""
+    results = [None] * len(ids)
+    targets = _collect_ids(ids, results)
+
+    toggled = []
+    for chunk in chunked(list(targets)):
+        queryset = Superhero.objects.using(using).filter(pk__in=chunk)
+        toggled.extend(_toggle(queryset, field))
+    found = {superhero.pk for superhero in toggled}
+    for pk, index in targets.items():
+        if pk in found:
+            results[index] = {"index": index, "status": "updated", "id": pk}
+        else:
+            results[index] = _error(index, {"id": [NOT_FOUND]}, pk)
+    if toggled:
+        send_changed(Superhero, using)
+    return results
+
+
+def toggle(queryset, field):
+    """
+    Flip the boolean ``field`` of the superheroes in ``queryset`` with one
+    ``UPDATE ... SET field = NOT field``; return the updated superheroes.
+
+    Nothing is read first, so concurrent toggles never overwrite each other and
+    row locks are held for a single statement.
+    """
+    superheroes = _toggle(queryset, field)
+    if superheroes:
+        send_changed(Superhero, queryset.db)
+    return superheroes
+
+
+def _toggle(queryset, field):
+    with transaction.atomic(using=queryset.db), stats.deferred():
+        superheroes = update_returning(
+            queryset, {field: ~F(field), "updated_at": timezone.now()}
+        )
+        position = STATS_BUCKET_FIELDS.index(field)
+        for superhero in superheroes:
+            new_bucket = superhero._stats_bucket
+            old_bucket = list(new_bucket)
+            old_bucket[position] = not old_bucket[position]
+            stats.record(tuple(old_bucket), new_bucket, queryset.db)
+    return superheroes
+
+
+def update_returning(queryset, values):
+    """
+    Run ``queryset.update(**values)`` and return the updated rows as model
+    instances, read by the ``UPDATE`` itself through ``RETURNING`` where the
+    database supports it.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    # PostgreSQL and SQLite 3.35+; MySQL and MariaDB lack UPDATE ... RETURNING.
+    if not (
+        connection.vendor in ("postgresql", "sqlite")
+        and connection.features.can_return_columns_from_insert
+    ):
+        with transaction.atomic(using=queryset.db):
+            pks = list(queryset.select_for_update().values_list("pk", flat=True))
+            model._base_manager.using(queryset.db).filter(pk__in=pks).update(**values)
+            return list(model._base_manager.using(queryset.db).filter(pk__in=pks))
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    update_sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = ", ".join(
+        connection.ops.quote_name(field.column) for field in model._meta.concrete_fields
+    )
+    # raw() maps the returned columns onto instances through from_db(), with
+    # the backend's value converters applied.
+    return list(
+        model._base_manager.raw(
+            f"{update_sql} RETURNING {columns}", params, using=queryset.db
+        )
+    )
+
+
+def _collect_ids(ids, results):
+    """
+    Return ``{id: index}`` for the valid, distinct ``ids``, recording an error
+    in ``results`` for the others.
+    """
+    targets = {}
+    for index, pk in enumerate(ids):
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            results[index] = _error(index, {"id": [INVALID_ID]})
+        elif pk in targets:
+            results[index] = _error(index, {"id": [DUPLICATE_ID]}, pk)
+        else:
+            targets[pk] = index
+    return targets
+
+
+def _validate(serializer, item):
+    """
+    Validate one item with a shared serializer; return ``(data, errors)``.
+
+    Reusing the serializer, as ``ListSerializer`` does, builds its fields once
+    per batch rather than once per item.
+    """
+    try:
+        return serializer.run_validation(item), None
+    except ValidationError as exc:
+        return None, as_serializer_error(exc)
+
+
+def _validate_updates(serializer, chunk, instances, results):
+    """
+    Return ``(index, validated_data, instance)`` for the ``(index, pk, item)``
+    entries of ``chunk`` found in ``instances`` and valid, recording an error
+    in ``results`` for the others.
+    """
+    valid = []
+    for index, pk, item in chunk:
+        instance = instances.get(pk)
+        if instance is None:
+            results[index] = _error(index, {"id": [NOT_FOUND]}, pk)
+            continue
+        data, errors = _validate(serializer, item)
+        if errors:
+            results[index] = _error(index, errors, pk)
+        else:
+            valid.append((index, data, instance))
+    return valid
+
+
+def _error(index, errors, pk=None):
+    result = {"index": index, "status": "error", "errors": errors}
+    if pk is not None:
+        result["id"] = pk
+    return result
+
+
+def _reject_taken_names(entries, results, using):
+    """
+    Drop entries whose new name is used by another superhero, in the database
+    or earlier in the batch, recording an error for each.
+
+    ``entries`` are ``(index, validated_data)`` or ``(index, validated_data,
+    instance)`` tuples; renaming a superhero to a new spelling of its own name
+    is allowed.
+    """
+    names = {entry[1]["name"].lower() for entry in entries if "name" in entry[1]}
+    taken = dict(
+        Superhero.objects.using(using)
+        .annotate(lower_name=Lower("name"))
+        .filter(lower_name__in=names)
+        .values_list("lower_name", "pk")
+    )
+
+    accepted = []
+    for entry in entries:
+        index, data = entry[:2]
+        pk = entry[2].pk if len(entry) > 2 else None
+        name = data.get("name", "").lower()
+        if name and taken.get(name, pk) != pk:
+            results[index] = _error(index, {"name": [DUPLICATE_NAME]}, pk)
+            continue
+        if name:
+            taken[name] = pk if pk is not None else object()
+        accepted.append(entry)
+    return accepted
+
+
+def _insert(entries, results, using):
+    """Insert ``(index, validated_data)`` entries; yield ``(index, instance)``."""
+    instances = [Superhero(**data) for _, data in entries]
+    try:
+        with transaction.atomic(using=using):
+            Superhero.objects.using(using).bulk_create(instances)
+    except IntegrityError as error:
+        if not is_duplicate_name(error):
+            raise
+        # A concurrent writer took one of the names; retry row by row so only
+        # the conflicting items fail.
+        for index, data in entries:
+            instance = Superhero(**data)
+            try:
+                with transaction.atomic(using=using):
+                    Superhero.objects.using(using).bulk_create([instance])
+            except IntegrityError as error:
+                if not is_duplicate_name(error):
+                    raise
+                results[index] = _error(index, {"name": [DUPLICATE_NAME]})
+            else:
+                yield index, instance
+        return
+    yield from zip((index for index, _ in entries), instances)
+
+
+def _update(entries, results, using):
+    """
+    Apply ``(index, validated_data, instance)`` entries; yield ``(index,
+    instance)`` for the rows written.
+    """
+    now = timezone.now()
+    fields = {"updated_at"}
+    for _, data, instance in entries:
+        for field, value in data.items():
+            setattr(instance, field, value)
+        instance.updated_at = now
+        fields.update(data)
+
+    instances = [instance for _, _, instance in entries]
+    try:
+        with transaction.atomic(using=using):
+            Superhero.objects.using(using).bulk_update(instances, sorted(fields))
+    except IntegrityError as error:
+        if not is_duplicate_name(error):
+            raise
+        for index, data, instance in entries:
+            try:
+                with transaction.atomic(using=using):
+                    Superhero.objects.using(using).bulk_update(
+                        [instance], ["updated_at", *data]
+                    )
+            except IntegrityError as error:
+                if not is_duplicate_name(error):
+                    raise
+                results[index] = _error(index, {"name": [DUPLICATE_NAME]}, instance.pk)
+            else:
+                yield index, instance
+        return
+    yield from ((index, instance) for index, _, instance in entries)
@@ -0,0 +1,109 @@
+"""
+Response cache for the superhero read endpoints.
+
+Cached entries are keyed on a generation number that is bumped whenever
+superheroes change, once the change commits (see
+``superheroes.signals.superheroes_changed``), so a
+single cache operation invalidates every cached response at once; stale
+entries simply age out of the cache. Clients pinned to the primary after a
+write (see ``base.replicas``) bypass the cache, which replicas lagging behind
+may have filled with older data.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from base import replicas
+
+from .conditional import revalidate
+
+GENERATION_KEY = "superheroes:generation"
+KEY_PREFIX = "superheroes:response"
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_generation():
+    """Return the current cache generation, initialising it if needed."""
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Seed from the clock so a generation evicted from the cache can never
+        # be reissued and resurrect old entries.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation(**kwargs):
+    """Invalidate every cached response."""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def response_cache_key(view, request, kwargs):
+    """
+    Build the cache key of a request.
+
+    Query parameters are normalised so that parameter order does not matter.
+    """
+    query = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists()
+    )
+    parts = [
+        view.__class__.__name__,
+        getattr(view, "action", None) or request.method,
+        request.build_absolute_uri(request.path),
+        repr(sorted(kwargs.items())),
+        repr(query),
+    ]
+    digest = hashlib.md5("|".join(parts).encode("utf-8"), usedforsecurity=False)
+    return f"{KEY_PREFIX}:{get_generation()}:{digest.hexdigest()}"
+
+
+def cache_response(method):
+    """
+    Cache the ``data`` of successful responses of a view method.
+
+    Validator headers (``ETag``, ``Last-Modified``) are cached with the data so
+    conditional requests can be answered from the cache too. Responses carry an
+    ``X-Cache`` header telling whether they were served from the cache.
+    """
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or replicas.pinned():
+            return method(view, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(view, request, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            response = Response(data, headers={**headers, "X-Cache": "HIT"})
+            return revalidate(request, response)
+
+        response = method(view, request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS
+                if header in response
+            }
+            cache.set(key, (response.data, headers), timeout)
+            response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
@@ -0,0 +1,180 @@
+"""
+Conditional request support driven by ``Superhero.updated_at``.
+
+Detail responses carry a weak ETag derived from ``(id, updated_at)``; list
+responses carry one derived from ``Max(updated_at)``, the row count and the
+query parameters, computed in a single aggregate query. Matching
+``If-None-Match`` / ``If-Modified-Since`` requests are answered with
+``304 Not Modified`` before anything is serialized, and ``If-Match`` guards
+writes against lost updates: ``conditional_write`` locks the row, compares its
+ETag and runs the write in one transaction.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Return a weak ETag for the given representation inputs."""
+    digest = hashlib.md5(
+        "|".join(str(part) for part in parts).encode("utf-8"), usedforsecurity=False
+    )
+    return f'W/"{digest.hexdigest()}"'
+
+
+def detail_validators(view, request, kwargs, lock=False):
+    """
+    Return ``(etag, last_modified)`` of the requested superhero, if it exists.
+
+    With ``lock``, the row is read with ``SELECT ... FOR UPDATE``.
+    """
+    lookup = {view.lookup_field: kwargs[view.lookup_url_kwarg or view.lookup_field]}
+    try:
+        queryset = view.get_queryset().filter(**lookup)
+        if lock:
+            queryset = queryset.select_for_update()
+        updated_at = queryset.values_list("pk", "updated_at").first()
+    except (TypeError, ValueError, ValidationError):
+        return None
+    if updated_at is None:
+        return None
+    pk, updated_at = updated_at
+    return make_etag(pk, updated_at.isoformat()), updated_at.timestamp()
+
+
+def list_validators(view, request, kwargs):
+    """Return ``(etag, last_modified)`` of the filtered list."""
+    aggregate = (
+        view.filter_queryset(view.get_queryset())
+        .order_by()
+        .aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+    )
+    last_modified = aggregate["last_modified"]
+    query = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists()
+    )
+    etag = make_etag(
+        last_modified.isoformat() if last_modified else "", aggregate["count"], query
+    )
+    return etag, last_modified.timestamp() if last_modified else None
+
+
+def validator_headers(etag, last_modified):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional_response(get_validators):
+    """
+    Answer conditional GETs of a view method from cheap validators.
+
+    ``get_validators(view, request, kwargs)`` returns ``(etag, last_modified)``
+    or ``None``. Successful responses get ``ETag`` and ``Last-Modified``
+    headers.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            validators = get_validators(view, request, kwargs)
+            if validators is None:
+                return method(view, request, *args, **kwargs)
+
+            headers = validator_headers(*validators)
+            etag, last_modified = validators
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=last_modified and int(last_modified),
+                response=HttpResponse(headers=headers),
+            )
+            if not_modified.status_code != status.HTTP_200_OK:
+                return not_modified
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def revalidate(request, response):
+    """Evaluate conditional request headers against a prepared response."""
+    etag = response.get("ETag")
+    if etag is None:
+        return response
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=parse_http_date_safe(response.get("Last-Modified", "")),
+        response=response,
+    )
+
+
+def conditional_write(method):
+    """
+    Guard a detail write method with ``check_if_match``.
+
+    The check locks the row and the write runs in the same transaction, so two
+    clients holding the same ETag cannot both pass it.
+    """
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        if not request.headers.get("If-Match"):
+            return method(view, request, *args, **kwargs)
+        using = router.db_for_write(view.get_queryset().model)
+        with transaction.atomic(using=using):
+            precondition_failed = check_if_match(view, request, kwargs, lock=True)
+            if precondition_failed:
+                return precondition_failed
+            return method(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def check_if_match(view, request, kwargs, lock=False):
+    """
+    Return a ``412 Precondition Failed`` response when the request's
+    ``If-Match`` header does not match the superhero's current ETag.
+
+    ETags are compared weakly: they identify ``(id, updated_at)``, which is
+    exactly the state a client must have seen to update safely. ``lock`` keeps
+    the row locked until the end of the transaction. Requests for a superhero
+    that does not exist, or an invalid id, pass through to the view's 404.
+    """
+    header = request.headers.get("If-Match")
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if etags == ["*"]:
+        return None
+    validators = detail_validators(view, request, kwargs, lock=lock)
+    # A missing superhero is left to the view, which answers 404.
+    if validators is None or _strip_weak(validators[0]) in {
+        _strip_weak(etag) for etag in etags
+    }:
+        return None
+    return Response(
+        {"error": "Superhero has been modified since it was fetched."},
+        status=status.HTTP_412_PRECONDITION_FAILED,
+    )
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
@@ -0,0 +1,215 @@
+"""
+Synthetic superhero catalogues for reproducing production-scale query plans.
+
+Row ``n`` of a catalogue is named from ``n`` and the seed alone: an affine
+permutation of ``ADJECTIVES x NOUNS`` picks a base name and every further lap
+through the combinations adds a number, so names are unique for a seed however
+the rows are split between workers. Other fields are drawn from distributions
+shaped like a real catalogue (mostly Marvel and DC, mid-range power levels,
+human ages with a long tail of immortals, texts of varying length) by one
+random generator per chunk, seeded from the seed and the chunk's first row, so
+the same seed and chunks always produce the same rows.
+
+Chunks are written with ``bulk_create`` by ``insert``, in worker processes
+set up by ``init_worker``. ``bulk_create`` bypasses model signals; callers
+rebuild the statistics snapshot and send ``superheroes_changed`` when done.
+"""
+
+import random
+from contextlib import nullcontext
+from decimal import Decimal
+
+from django.db import connections, transaction
+
+from .models import Superhero
+
+BATCH_SIZE = 5000
+_write_lock = nullcontext()
+
+ADJECTIVES = """
+Amber Arctic Ashen Atomic Blazing Bronze Cobalt Cosmic Crimson Crystal Dark
+Dread Ebony Electric Emerald Eternal Feral Fierce Frozen Galactic Ghostly
+Gilded Golden Grim Hidden Hollow Howling Infinite Iron Ivory Jade Lunar
+Mighty Molten Mystic Neon Night Obsidian Onyx Phantom Primal Quantum Radiant
+Rogue Ruby Sapphire Savage Scarlet Shadow Silent Silver Solar Sonic Steel
+Storm Swift Thunder Titan Twilight Venom Violet Wild
+""".split()
+NOUNS = """
+Arrow Avenger Banshee Blade Bolt Cobra Comet Condor Coyote Crusader Cyclone
+Dragon Eagle Echo Falcon Flame Fox Ghost Gladiator Griffin Harbinger Hawk
+Hornet Hunter Hydra Jackal Knight Lancer Lion Lynx Mantis Marauder Meteor
+Monarch Nomad Oracle Paladin Pilgrim Prophet Raven Reaper Rider Sentinel
+Serpent Shark Specter Sphinx Spirit Stalker Striker Tempest Tiger Tornado
+Valkyrie Vanguard Viper Vortex Warden Wasp Wizard Wolf Wraith
+""".split()
+COMBINATIONS = len(ADJECTIVES) * len(NOUNS)
+# Coprime with COMBINATIONS, so ``r * STRIDE + offset`` permutes the remainders.
+STRIDE = 2477
+
+FIRST_NAMES = """
+Alex Amara Ben Carla Chen Dana Diego Elena Felix Grace Hana Ivan Jamal Jade
+Kai Lena Luis Maya Nadia Omar Priya Quinn Rosa Sam Tariq Uma Victor Wren
+Yuki Zoe
+""".split()
+LAST_NAMES = """
+Adams Baker Castillo Dubois Evans Fischer Garcia Hughes Ito Jensen Kowalski
+Larsen Morales Nakamura Okafor Patel Quinn Rossi Schmidt Tanaka Ueda Vargas
+Walsh Xu Yilmaz Zhang
+""".split()
+POWERS = [
+    "super strength",
+    "flight",
+    "invulnerability",
+    "telepathy",
+    "telekinesis",
+    "super speed",
+    "healing factor",
+    "shape-shifting",
+    "invisibility",
+    "energy projection",
+    "weather control",
+    "time manipulation",
+    "teleportation",
+    "pyrokinesis",
+    "cryokinesis",
+    "electrokinesis",
+    "sonic scream",
+    "precognition",
+    "force fields",
+    "wall-crawling",
+    "enhanced senses",
+    "genius-level intellect",
+    "martial arts mastery",
+    "master marksmanship",
+    "advanced technology",
+    "magic",
+    "size alteration",
+    "density control",
+    "animal communication",
+    "plant manipulation",
+    "mind control",
+    "illusions",
+    "regeneration",
+    "matter absorption",
+    "gravity manipulation",
+    "x-ray vision",
+]
+ORIGIN_OPENINGS = [
+    "Born on a dying world, {name} was sent away as a child.",
+    "A lab accident exposed {name} to an experimental serum.",
+    "{name} was bitten by a creature from another dimension.",
+    "After surviving a meteor strike, {name} woke up changed.",
+    "{name} inherited an ancient artifact from a distant relative.",
+    "Raised by a secret order, {name} trained from early childhood.",
+    "A failed military program left {name} with abilities nobody understood.",
+    "{name} made a bargain with a cosmic entity to save a loved one.",
+]
+ORIGIN_SENTENCES = [
+    "The transformation took months to master.",
+    "Early attempts to use these powers ended in disaster.",
+    "A mentor appeared just when everything seemed lost.",
+    "The city soon learned to recognise the new silhouette on its rooftops.",
+    "Old enemies resurfaced, drawn by rumours of the change.",
+    "Keeping a civilian identity became harder with every year.",
+    "A team of fellow outcasts offered a place to belong.",
+    "The powers came at a price that still has to be paid.",
+    "A rival with the same origin chose the opposite path.",
+    "Government agencies have tried to recruit or contain them ever since.",
+]
+
+UNIVERSES = ["Marvel", "DC", "Custom", "Other"]
+UNIVERSE_WEIGHTS = [48, 38, 9, 5]
+
+
+def superhero_name(number, seed):
+    """Return the name of row ``number`` of the catalogue for ``seed``."""
+    lap, remainder = divmod(number, COMBINATIONS)
+    combination = (remainder * STRIDE + seed) % COMBINATIONS
+    adjective, noun = divmod(combination, len(NOUNS))
+    name = f"{ADJECTIVES[adjective]} {NOUNS[noun]}"
+    return f"{name} {lap + 1}" if lap else name
+
+
+def _age(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return None
+    if roll < 0.85:
+        return min(90, max(16, round(rng.gauss(34, 10))))
+    if roll < 0.97:
+        return rng.randint(100, 1000)
+    return rng.randint(1001, 10000)
+
+
+def _build(number, seed, rng):
+    name = superhero_name(number, seed)
+    is_giant = rng.random() < 0.03
+    height = rng.uniform(220, 400) if is_giant else rng.gauss(178, 12)
+    # Weight follows height through a body mass index around 25.
+    weight = rng.gauss(25, 3) * (height / 100) ** 2
+    has_body = rng.random() < 0.9
+    origin_length = rng.choices(range(5), [15, 30, 30, 15, 10])[0]
+    return Superhero(
+        name=name,
+        real_name=(
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.8
+            else None
+        ),
+        alias=f"The {name}" if rng.random() < 0.6 else None,
+        age=_age(rng),
+        height=Decimal(f"{height:.2f}") if has_body else None,
+        weight=Decimal(f"{min(max(weight, 30), 9999):.2f}") if has_body else None,
+        powers=", ".join(
+            rng.sample(POWERS, rng.choices(range(1, 7), [20, 30, 25, 12, 8, 5])[0])
+        ),
+        power_level=min(10, max(1, round(rng.gauss(5, 2)))),
+        origin_story=(
+            " ".join(
+                [rng.choice(ORIGIN_OPENINGS).format(name=name)]
+                + rng.sample(ORIGIN_SENTENCES, origin_length - 1)
+            )
+            if origin_length
+            else None
+        ),
+        universe=rng.choices(UNIVERSES, UNIVERSE_WEIGHTS)[0],
+        is_active=rng.random() < 0.85,
+        is_villain=rng.random() < 0.22,
+    )
+
+
+def generate(start, stop, seed):
+    """Return unsaved superheroes for rows ``start`` to ``stop`` (excluded)."""
+    rng = random.Random(f"{seed}:{start}")
+    return [_build(number, seed, rng) for number in range(start, stop)]
+
+
+def chunks(start, count, batch_size=BATCH_SIZE):
+    """Split ``count`` rows from ``start`` into ``(start, stop)`` chunks."""
+    stop = start + count
+    for chunk_start in range(start, stop, batch_size):
+        yield chunk_start, min(chunk_start + batch_size, stop)
+
+
+def insert(start, stop, seed, using):
+    """Insert rows ``start`` to ``stop`` in one transaction; return the count."""
+    superheroes = generate(start, stop, seed)
+    with _write_lock, transaction.atomic(using=using):
+        Superhero.objects.using(using).bulk_create(superheroes)
+    return len(superheroes)
+
+
+def init_worker(write_lock=None):
+    """
+    Set Django up in a worker process, with its own connections.
+
+    Workers holding ``write_lock`` generate rows in parallel but take turns
+    writing them, for databases that only accept one writer at a time.
+    """
+    global _write_lock
+    import django
+
+    django.setup()
+    connections.close_all()
+    if write_lock is not None:
+        _write_lock = write_lock
@@ -0,0 +1,229 @@
+"""
+Streaming superhero catalogue import.
+
+Rows are read from CSV or NDJSON one at a time, validated against the
+``Superhero`` field constraints and upserted by name in batches, so memory use
+depends on the batch size rather than on the size of the catalogue.
+
+The writer is picked from the vendor of the target database:
+
+* PostgreSQL: each batch is ``COPY``'d into a temporary staging table and
+  merged with ``INSERT ... SELECT ... ON CONFLICT (name) DO UPDATE``.
+* Others: ``bulk_create(update_conflicts=True, unique_fields=["name"])``.
+
+Upserts bypass model signals; callers rebuild the statistics snapshot and send
+``superheroes_changed`` once the import is done.
+"""
+
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import Superhero
+
+IMPORT_FIELDS = [
+    field.name
+    for field in Superhero._meta.concrete_fields
+    if field.editable and not field.primary_key
+]
+UPDATE_FIELDS = [name for name in IMPORT_FIELDS if name != "name"] + ["updated_at"]
+STAGING_TABLE = "superhero_import_staging"
+
+BOOLEAN_VALUES = {
+    "true": True,
+    "t": True,
+    "yes": True,
+    "1": True,
+    "false": False,
+    "f": False,
+    "no": False,
+    "0": False,
+}
+DUPLICATE_NAME = "A superhero with this name already exists."
+
+
+def read_csv(stream):
+    """Yield ``(line number, row)`` pairs from a CSV stream with a header."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    """
+    Yield ``(line number, row)`` pairs from an NDJSON stream.
+
+    Lines that are not JSON objects are yielded as ``ValidationError``s.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = ValidationError(f"Invalid JSON: {exc}")
+        else:
+            if not isinstance(row, dict):
+                row = ValidationError("Expected a JSON object.")
+        yield line_number, row
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def build_superhero(row):
+    """
+    Return a validated, unsaved ``Superhero`` built from an input row.
+
+    Unknown columns are ignored and missing ones take the model defaults. Empty
+    strings are read as nulls for nullable fields, and booleans accept the usual
+    spellings. Raises ``ValidationError`` when a field constraint is violated.
+    """
+    values = {}
+    for name in IMPORT_FIELDS:
+        if name not in row:
+            continue
+        field = Superhero._meta.get_field(name)
+        value = row[name]
+        if isinstance(value, str):
+            value = value.strip()
+            if not value and field.null:
+                value = None
+            elif isinstance(field, models.BooleanField):
+                value = BOOLEAN_VALUES.get(value.lower(), value)
+        values[name] = value
+    superhero = Superhero(**values)
+    superhero.clean_fields()
+    return superhero
+
+
+class CopyUpsert:
+    """``COPY`` into a staging table, then merge; PostgreSQL only."""
+
+    vendor = "postgresql"
+
+    def write(self, superheroes, using):
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        table = quote(Superhero._meta.db_table)
+        columns = ", ".join(quote(name) for name in IMPORT_FIELDS)
+        now = timezone.now()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for superhero in superheroes:
+            writer.writerow(
+                _copy_value(getattr(superhero, name)) for name in IMPORT_FIELDS
+            )
+        buffer.seek(0)
+
+        updates = ", ".join(
+            f"{quote(name)} = EXCLUDED.{quote(name)}" for name in UPDATE_FIELDS
+        )
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} "
+                f"ON COMMIT DELETE ROWS AS SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            copy_sql = f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)"
+            if hasattr(cursor.cursor, "copy_expert"):
+                cursor.cursor.copy_expert(copy_sql, buffer)
+            else:
+                with cursor.cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}, created_at, updated_at) "
+                f"SELECT {columns}, %s, %s FROM {STAGING_TABLE} "
+                f"ON CONFLICT (name) DO UPDATE SET {updates}",
+                [now, now],
+            )
+
+
+class BulkCreateUpsert:
+    """``bulk_create`` with ``update_conflicts``, for every other backend."""
+
+    def write(self, superheroes, using):
+        with transaction.atomic(using=using):
+            Superhero.objects.using(using).bulk_create(
+                superheroes,
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=UPDATE_FIELDS,
+            )
+
+
+copy_upsert = CopyUpsert()
+bulk_create_upsert = BulkCreateUpsert()
+
+
+def get_writer(using, copy=True):
+    """Return the fastest writer available for a database alias."""
+    if copy and connections[using].vendor == copy_upsert.vendor:
+        return copy_upsert
+    return bulk_create_upsert
+
+
+def import_rows(rows, batch_size, using="default", copy=True):
+    """
+    Validate and upsert ``(line number, row)`` pairs in batches.
+
+    Yields ``(imported, rejects)`` after every batch, where ``rejects`` lists
+    ``(line number, row, errors)`` for the rows of the batch that were not
+    imported. Within a batch the last row for a name wins.
+    """
+    writer = get_writer(using, copy)
+    batch = {}
+    rejects = []
+    for line_number, row in rows:
+        try:
+            if isinstance(row, ValidationError):
+                raise row
+            superhero = build_superhero(row)
+        except ValidationError as exc:
+            rejects.append((line_number, row, _error_dict(exc)))
+            continue
+        batch[superhero.name] = (line_number, row, superhero)
+        if len(batch) >= batch_size:
+            yield _write_batch(writer, batch, rejects, using)
+            batch, rejects = {}, []
+    if batch or rejects:
+        yield _write_batch(writer, batch, rejects, using)
+
+
+def _write_batch(writer, batch, rejects, using):
+    # Names are unique regardless of case; reject rows that would add a new
+    # spelling of an existing name instead of updating it.
+    existing = dict(
+        Superhero.objects.using(using)
+        .annotate(lower_name=Lower("name"))
+        .filter(lower_name__in={name.lower() for name in batch})
+        .values_list("lower_name", "name")
+    )
+    seen = {}
+    superheroes = []
+    for name, (line_number, row, superhero) in batch.items():
+        canonical = existing.get(name.lower(), seen.get(name.lower(), name))
+        if canonical != name:
+            rejects.append((line_number, row, {"name": [DUPLICATE_NAME]}))
+            continue
+        seen[name.lower()] = name
+        superheroes.append(superhero)
+    if superheroes:
+        writer.write(superheroes, using)
+    return len(superheroes), rejects
+
+
+def _copy_value(value):
+    # Unquoted empty fields are NULL in COPY's CSV format.
+    return "" if value is None else value
+
+
+def _error_dict(exc):
+    if hasattr(exc, "error_dict"):
+        return exc.message_dict
+    return {"non_field_errors": exc.messages}
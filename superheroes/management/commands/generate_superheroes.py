@@ -0,0 +1,129 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+
+from superheroes import generator, stats
+from superheroes.models import Superhero
+from superheroes.serializers import is_duplicate_name
+from superheroes.signals import superheroes_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic superheroes with realistic distributions, written "
+        "with chunked bulk_create in parallel worker processes. The same --seed "
+        "always yields the same unique names."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=10000,
+            help="Number of superheroes to generate",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes writing chunks in parallel",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help=(
+                "Number of the first row; pass the rows generated earlier with "
+                "the same --seed to add more"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=generator.BATCH_SIZE,
+            help="Number of rows written per transaction",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to write the superheroes to",
+        )
+
+    def handle(self, *args, **options):
+        for option in ("count", "workers", "batch_size"):
+            if options[option] < 1:
+                name = option.replace("_", "-")
+                raise CommandError(f"--{name} must be a positive integer.")
+        if options["start"] < 0:
+            raise CommandError("--start must not be negative.")
+
+        using = options["database"]
+        tasks = [
+            (start, stop, options["seed"], using)
+            for start, stop in generator.chunks(
+                options["start"], options["count"], options["batch_size"]
+            )
+        ]
+        inserted = 0
+        started = time.monotonic()
+        try:
+            for rows in self.run(tasks, options["workers"], using):
+                inserted += rows
+                if options["verbosity"] >= 2:
+                    self.stdout.write(
+                        f"{inserted}/{options['count']} superheroes written "
+                        f"({self.rate(inserted, started):.0f} rows/s)"
+                    )
+        except IntegrityError as error:
+            if not is_duplicate_name(error):
+                raise
+            raise CommandError(
+                "Some generated names are already taken. Pass --start past the "
+                "rows generated earlier with this --seed, or another --seed."
+            )
+        finally:
+            # Other workers may have written chunks before one of them failed.
+            stats.rebuild(using=using)
+            superheroes_changed.send(sender=Superhero)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {inserted} superheroes in "
+                f"{time.monotonic() - started:.2f}s "
+                f"({self.rate(inserted, started):.0f} rows/s)."
+            )
+        )
+
+    def run(self, tasks, workers, using):
+        """Insert the chunks, yielding the rows written by each."""
+        if workers == 1:
+            for task in tasks:
+                yield generator.insert(*task)
+            return
+        context = multiprocessing.get_context()
+        # SQLite allows one writer at a time: only generate rows in parallel.
+        write_lock = context.Lock() if connections[using].vendor == "sqlite" else None
+        # Workers must not share the parent's database connections.
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=generator.init_worker,
+            initargs=(write_lock,),
+        )
+        try:
+            yield from pool.map(generator.insert, *zip(*tasks))
+        finally:
+            # Stop handing out chunks once one of them failed.
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def rate(rows, started):
+        elapsed = time.monotonic() - started
+        return rows / elapsed if elapsed else 0
@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from superheroes import importer, stats
+from superheroes.models import Superhero
+from superheroes.signals import superheroes_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Import superheroes from a CSV or NDJSON file (or stdin), upserting them "
+        "by name. Every importable field of an existing superhero is replaced; "
+        "columns missing from a row take the model defaults."
+    )
+    stealth_options = ("stdin",)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default="-",
+            help="File to import, or - to read from stdin (the default)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(importer.READERS),
+            help="Input format; guessed from the file extension when omitted",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows validated and written per transaction",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Write rejected rows and their errors to this NDJSON file",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_false",
+            dest="copy",
+            help="Use bulk_create upserts even on PostgreSQL",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to import the superheroes into",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"]
+        if input_format is None:
+            extension = os.path.splitext(path)[1].lstrip(".").lower()
+            if extension not in importer.READERS:
+                raise CommandError(
+                    "Cannot guess the input format; pass --format csv or ndjson."
+                )
+            input_format = extension
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        if path == "-":
+            stream = options.get("stdin", sys.stdin)
+            self.run(stream, input_format, options)
+        else:
+            try:
+                stream = open(path, newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+            with stream:
+                self.run(stream, input_format, options)
+
+    def run(self, stream, input_format, options):
+        using = options["database"]
+        rejects_file = (
+            open(options["rejects"], "w", encoding="utf-8")
+            if options["rejects"]
+            else None
+        )
+        imported = rejected = 0
+        started = time.monotonic()
+        try:
+            batches = importer.import_rows(
+                importer.READERS[input_format](stream),
+                options["batch_size"],
+                using=using,
+                copy=options["copy"],
+            )
+            for batch_imported, batch_rejects in batches:
+                imported += batch_imported
+                rejected += len(batch_rejects)
+                for line_number, row, errors in batch_rejects:
+                    self.report_reject(rejects_file, line_number, row, errors)
+                if options["verbosity"] >= 2:
+                    self.stdout.write(
+                        f"{imported} rows imported, {rejected} rejected "
+                        f"({self.rate(imported, started):.0f} rows/s)"
+                    )
+        finally:
+            if rejects_file is not None:
+                rejects_file.close()
+            if imported:
+                stats.rebuild(using=using)
+                superheroes_changed.send(sender=Superhero)
+
+        style = self.style.WARNING if rejected else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"Imported {imported} superheroes in "
+                f"{time.monotonic() - started:.2f}s "
+                f"({self.rate(imported, started):.0f} rows/s); "
+                f"{rejected} rows rejected."
+            )
+        )
+
+    def report_reject(self, rejects_file, line_number, row, errors):
+        if rejects_file is not None:
+            record = {"line": line_number, "errors": errors}
+            if isinstance(row, dict):
+                record["row"] = row
+            rejects_file.write(json.dumps(record, default=str) + "\n")
+        else:
+            self.stderr.write(f"Line {line_number}: {json.dumps(errors)}")
+
+    @staticmethod
+    def rate(rows, started):
+        elapsed = time.monotonic() - started
+        return rows / elapsed if elapsed else 0
@@ -1,7 +1,9 @@
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from superheroes import stats
 from superheroes.models import Superhero
 
 
@@ -16,8 +18,15 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        # Keep the statistics counters, written by model signals, in step with
+        # the rows.
+        with transaction.atomic():
+            self.populate(options)
+
+    def populate(self, options):
         if options["clear"]:
-            Superhero.objects.all().delete()
+            with stats.deferred():
+                Superhero.objects.all().delete()
             self.stdout.write(self.style.WARNING("Cleared all existing superheroes."))
 
         sample_superheroes = [
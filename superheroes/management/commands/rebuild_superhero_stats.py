@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from superheroes import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the superhero statistics snapshot from the superheroes table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild the statistics snapshot in",
+        )
+
+    def handle(self, *args, **options):
+        buckets = stats.rebuild(using=options["database"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt superhero statistics snapshot ({buckets} buckets)."
+            )
+        )
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("superheroes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(
+                condition=models.Q(("is_villain", False)),
+                fields=["-power_level", "name"],
+                name="superhero_top_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(
+                condition=models.Q(("is_villain", True)),
+                fields=["name"],
+                name="superhero_villain_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["name"],
+                name="superhero_active_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(
+                fields=["universe", "name"], name="superhero_universe_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(
+                fields=["power_level", "name"], name="superhero_power_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(fields=["age"], name="superhero_age_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(fields=["created_at"], name="superhero_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="superhero",
+            index=models.Index(fields=["updated_at"], name="superhero_updated_idx"),
+        ),
+    ]
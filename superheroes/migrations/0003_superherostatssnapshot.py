@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+BUCKET_FIELDS = ("universe", "power_level", "is_active", "is_villain")
+
+
+def populate_snapshot(apps, schema_editor):
+    Superhero = apps.get_model("superheroes", "Superhero")
+    SuperheroStatsSnapshot = apps.get_model("superheroes", "SuperheroStatsSnapshot")
+    using = schema_editor.connection.alias
+    groups = (
+        Superhero.objects.using(using)
+        .values_list(*BUCKET_FIELDS)
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+    SuperheroStatsSnapshot.objects.using(using).bulk_create(
+        SuperheroStatsSnapshot(**dict(zip(BUCKET_FIELDS, bucket)), count=total)
+        for *bucket, total in groups
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("superheroes", "0002_superhero_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SuperheroStatsSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("universe", models.CharField(max_length=50)),
+                ("power_level", models.IntegerField()),
+                ("is_active", models.BooleanField()),
+                ("is_villain", models.BooleanField()),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Superhero statistics snapshot",
+                "verbose_name_plural": "Superhero statistics snapshots",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("universe", "power_level", "is_active", "is_villain"),
+                        name="superhero_stats_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+from django.db import OperationalError, migrations
+
+# The statements are spelled out rather than imported from superheroes.search so
+# this migration keeps creating the same structures as that module changes.
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE "superheroes_superhero" ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(alias, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(real_name, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(powers, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX superhero_search_vector_idx ON "superheroes_superhero"
+    USING GIN (search_vector)
+    """,
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS superhero_search_vector_idx",
+    'ALTER TABLE "superheroes_superhero" DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE superheroes_superhero_fts
+    USING fts5(name, alias, real_name, powers,
+        content='superheroes_superhero', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')
+"""
+SQLITE_INSTALL = [
+    """
+    CREATE TRIGGER superheroes_superhero_fts_ai AFTER INSERT ON superheroes_superhero
+    BEGIN
+        INSERT INTO superheroes_superhero_fts(rowid, name, alias, real_name, powers)
+        VALUES (new.id, new.name, new.alias, new.real_name, new.powers);
+    END
+    """,
+    """
+    CREATE TRIGGER superheroes_superhero_fts_ad AFTER DELETE ON superheroes_superhero
+    BEGIN
+        INSERT INTO superheroes_superhero_fts(
+            superheroes_superhero_fts, rowid, name, alias, real_name, powers
+        )
+        VALUES ('delete', old.id, old.name, old.alias, old.real_name, old.powers);
+    END
+    """,
+    """
+    CREATE TRIGGER superheroes_superhero_fts_au AFTER UPDATE ON superheroes_superhero
+    BEGIN
+        INSERT INTO superheroes_superhero_fts(
+            superheroes_superhero_fts, rowid, name, alias, real_name, powers
+        )
+        VALUES ('delete', old.id, old.name, old.alias, old.real_name, old.powers);
+        INSERT INTO superheroes_superhero_fts(rowid, name, alias, real_name, powers)
+        VALUES (new.id, new.name, new.alias, new.real_name, new.powers);
+    END
+    """,
+    "INSERT INTO superheroes_superhero_fts(superheroes_superhero_fts) "
+    "VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS superheroes_superhero_fts_ai",
+    "DROP TRIGGER IF EXISTS superheroes_superhero_fts_ad",
+    "DROP TRIGGER IF EXISTS superheroes_superhero_fts_au",
+    "DROP TABLE IF EXISTS superheroes_superhero_fts",
+]
+
+
+def install_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = POSTGRES_INSTALL
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(SQLITE_FTS_TABLE)
+        except OperationalError:
+            # SQLite compiled without FTS5; searches fall back to icontains.
+            return
+        statements = SQLITE_INSTALL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall_search(apps, schema_editor):
+    statements = {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("superheroes", "0003_superherostatssnapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# The statements are spelled out rather than imported from superheroes.autocomplete
+# so this migration keeps creating the same indexes as that module changes.
+FIELDS = ["name", "alias", "real_name"]
+
+
+def install_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX superhero_{field}_trgm_idx ON "superheroes_superhero" '
+            f"USING GIN ({field} gin_trgm_ops)"
+        )
+
+
+def uninstall_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS superhero_{field}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("superheroes", "0004_superhero_full_text_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_trigram_indexes, uninstall_trigram_indexes),
+    ]
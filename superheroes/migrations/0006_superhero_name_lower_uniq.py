@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:50
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("superheroes", "0005_superhero_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="superhero",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("name"),
+                name="superhero_name_lower_uniq",
+            ),
+        ),
+    ]
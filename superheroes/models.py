@@ -1,5 +1,30 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+POWER_DESCRIPTIONS = {
+    1: "Beginner",
+    2: "Novice",
+    3: "Competent",
+    4: "Skilled",
+    5: "Expert",
+    6: "Advanced",
+    7: "Elite",
+    8: "Master",
+    9: "Legendary",
+    10: "Godlike",
+}
+
+# Unique index on Lower("name"); see Superhero.Meta.constraints.
+NAME_CONSTRAINT = "superhero_name_lower_uniq"
+
+
+def format_display_name(name, alias):
+    """Return the best display name for a superhero's name and alias."""
+    if alias:
+        return f"{name} ({alias})"
+    return name
 
 
 class Superhero(models.Model):
@@ -83,6 +108,42 @@ class Superhero(models.Model):
         ordering = ["name"]
         verbose_name = "Superhero"
         verbose_name_plural = "Superheroes"
+        indexes = [
+            # top_superheroes: is_villain=False ORDER BY -power_level, name.
+            # Boolean filters render as ``NOT "is_villain"``, so a partial index
+            # keyed on the ordering is usable on both PostgreSQL and SQLite.
+            models.Index(
+                fields=["-power_level", "name"],
+                condition=Q(is_villain=False),
+                name="superhero_top_idx",
+            ),
+            # villains: is_villain=True ORDER BY name
+            models.Index(
+                fields=["name"],
+                condition=Q(is_villain=True),
+                name="superhero_villain_name_idx",
+            ),
+            # ?is_active=true, ordered by name
+            models.Index(
+                fields=["name"],
+                condition=Q(is_active=True),
+                name="superhero_active_name_idx",
+            ),
+            # by_universe and ?universe= filtering, ordered by name
+            models.Index(fields=["universe", "name"], name="superhero_universe_idx"),
+            # ?power_level= filtering and ?ordering=power_level
+            models.Index(fields=["power_level", "name"], name="superhero_power_idx"),
+            # Remaining ?ordering= fields and date range filters
+            models.Index(fields=["age"], name="superhero_age_idx"),
+            models.Index(fields=["created_at"], name="superhero_created_idx"),
+            models.Index(fields=["updated_at"], name="superhero_updated_idx"),
+        ]
+        constraints = [
+            # Names are unique in any letter case. Writes rely on this index
+            # instead of looking the name up first; case-insensitive name
+            # lookups by ``Lower("name")`` use it too.
+            models.UniqueConstraint(Lower("name"), name=NAME_CONSTRAINT),
+        ]
 
     def __str__(self):
         return self.name
@@ -90,23 +151,54 @@ class Superhero(models.Model):
     @property
     def display_name(self):
         """Return the best display name for the superhero."""
-        if self.alias:
-            return f"{self.name} ({self.alias})"
-        return self.name
+        return format_display_name(self.name, self.alias)
 
     @property
     def power_description(self):
         """Return a description of the superhero's power level."""
-        power_descriptions = {
-            1: "Beginner",
-            2: "Novice",
-            3: "Competent",
-            4: "Skilled",
-            5: "Expert",
-            6: "Advanced",
-            7: "Elite",
-            8: "Master",
-            9: "Legendary",
-            10: "Godlike",
-        }
-        return power_descriptions.get(self.power_level, "Unknown")
+        return POWER_DESCRIPTIONS.get(self.power_level, "Unknown")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the statistics bucket the row was loaded with."""
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        if all(field in loaded for field in STATS_BUCKET_FIELDS):
+            instance._stats_bucket = tuple(
+                loaded[field] for field in STATS_BUCKET_FIELDS
+            )
+        return instance
+
+
+STATS_BUCKET_FIELDS = ("universe", "power_level", "is_active", "is_villain")
+
+
+class SuperheroStatsSnapshot(models.Model):
+    """
+    Pre-aggregated superhero counters backing the statistics endpoint.
+
+    Each row counts the superheroes sharing one combination of the fields in
+    ``STATS_BUCKET_FIELDS``, so every statistic can be derived from a handful of
+    rows instead of scanning the superhero table.
+    """
+
+    universe = models.CharField(max_length=50)
+    power_level = models.IntegerField()
+    is_active = models.BooleanField()
+    is_villain = models.BooleanField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Superhero statistics snapshot"
+        verbose_name_plural = "Superhero statistics snapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=list(STATS_BUCKET_FIELDS), name="superhero_stats_bucket"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.universe}/{self.power_level}/"
+            f"active={self.is_active}/villain={self.is_villain}: {self.count}"
+        )
@@ -0,0 +1,293 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination keyed on the active ordering fields.
+
+    Unlike ``PageNumberPagination`` this never issues a ``COUNT(*)`` or an
+    ``OFFSET``: each page is fetched with a ``WHERE`` clause that continues
+    after the last row of the previous page, using the primary key as a
+    tie-breaker. Page fetches therefore cost the same at any depth and stay
+    stable when rows are inserted concurrently.
+
+    A queryset ordered by an annotation first, such as the relevance rank of a
+    full-text search, is paged by that annotation before the ordering fields.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` fetching the page with the async ORM."""
+        page = self.page_queryset(queryset, request, view)
+        return self.finish_page([item async for item in page])
+
+    def page_queryset(self, queryset, request, view=None):
+        """Return the unevaluated queryset of the requested page, plus one row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.output_fields = {}
+        self.fields = self.get_ordering_fields(request, queryset, view)
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+        queryset = queryset.order_by(
+            *(
+                f"-{name}" if descending != reverse else name
+                for name, descending, _ in self.fields
+            )
+        )
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor["position"], reverse))
+        self.cursor = cursor
+        return queryset[: self.page_size + 1]
+
+    def finish_page(self, results):
+        """Trim the fetched rows to the page and record the page's cursors."""
+        cursor = self.cursor
+        reverse = cursor is not None and cursor["reverse"]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        if results:
+            self.next_position = self.position_of(results[-1])
+            self.previous_position = self.position_of(results[0])
+        elif cursor is not None:
+            self.next_position = self.previous_position = cursor["position"]
+        else:
+            self.next_position = self.previous_position = None
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = has_more if reverse else cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def cursor_columns(self, queryset, view):
+        """
+        Return the columns rows must carry for their cursors to be built: the
+        view's ordering fields and a leading annotation the queryset is
+        ordered by.
+        """
+        columns = list(getattr(view, "ordering_fields", None) or ())
+        leading = self.leading_annotation(queryset)
+        if leading is not None:
+            columns.append(leading[0])
+        return columns
+
+    def leading_annotation(self, queryset):
+        """Return ``(name, descending)`` of an annotation ordering ``queryset``."""
+        order_by = queryset.query.order_by
+        if order_by and isinstance(order_by[0], str):
+            name = order_by[0].lstrip("-")
+            if name in queryset.query.annotations:
+                return name, order_by[0].startswith("-")
+        return None
+
+    def leading_fields(self, queryset):
+        """Return the ordering fields of a leading annotation, if any."""
+        leading = self.leading_annotation(queryset)
+        if leading is None:
+            return []
+        name, descending = leading
+        self.output_fields[name] = queryset.query.annotations[name].output_field
+        return [(name, descending, False)]
+
+    def get_ordering_fields(self, request, queryset, view):
+        """
+        Return ``(field name, descending, nullable)`` for the active ordering,
+        preceded by a leading annotation the queryset is ordered by and
+        followed by the primary key as a tie-breaker.
+        """
+        fields = self.leading_fields(queryset)
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, "ordering", None) or queryset.query.order_by
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        opts = queryset.model._meta
+        for term in ordering:
+            descending = term.startswith("-")
+            name = term.lstrip("-")
+            if name == "pk":
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            fields.append((name, descending, field.null))
+            if field.primary_key:
+                return fields
+        fields.append((opts.pk.name, False, False))
+        return fields
+
+    def after(self, position, reverse):
+        """Build the ``WHERE`` clause selecting rows after ``position``."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.fields, position):
+            descending = descending != reverse
+            beyond = self.beyond(name, descending, nullable, value)
+            if beyond is not None:
+                condition |= equal & beyond
+            equal &= (
+                Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+            )
+
+        # Bound the leading column explicitly so its index can drive the scan.
+        name, descending, nullable = self.fields[0]
+        if not nullable and position[0] is not None:
+            lookup = "lte" if descending != reverse else "gte"
+            condition &= Q(**{f"{name}__{lookup}": position[0]})
+        return condition
+
+    def beyond(self, name, descending, nullable, value):
+        """Rows strictly after ``value`` in the ordering of a single field."""
+        nulls_last = self.nulls_largest != descending
+        if value is None:
+            return None if nulls_last else Q(**{f"{name}__isnull": False})
+        condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        if nullable and nulls_last:
+            condition |= Q(**{f"{name}__isnull": True})
+        return condition
+
+    def position_of(self, item):
+        if isinstance(item, dict):
+            return [item[name] for name, _, _ in self.fields]
+        return [getattr(item, name) for name, _, _ in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            "o": [f"-{name}" if desc else name for name, desc, _ in self.fields],
+            "p": [_encode_value(value) for value in position],
+            "r": int(reverse),
+        }
+        encoded = b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8"), altchars=b"-_"
+        ).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = json.loads(b64decode(encoded.encode("ascii"), altchars=b"-_"))
+            ordering = [f"-{name}" if desc else name for name, desc, _ in self.fields]
+            if payload["o"] != ordering or len(payload["p"]) != len(self.fields):
+                raise ValueError("Cursor does not match the requested ordering")
+            opts = self.model._meta
+            position = [
+                (
+                    None
+                    if value is None
+                    else (
+                        self.output_fields.get(name) or opts.get_field(name)
+                    ).to_python(value)
+                )
+                for (name, _, _), value in zip(self.fields, payload["p"])
+            ]
+            return {"position": position, "reverse": bool(payload["r"])}
+        except (TypeError, KeyError, ValueError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """``PageNumberPagination`` that can count and fetch with the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Prime the cached count so that validating the page number does not
+        # run a synchronous COUNT(*).
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(page_number=page_number, message=exc)
+            )
+        self.page.object_list = [item async for item in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
@@ -0,0 +1,36 @@
+"""
+Parsers for the superhero API.
+
+``ORJSONParser`` is a drop-in replacement for DRF's ``JSONParser`` backed by
+the optional ``orjson`` package.
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """
+    ``JSONParser`` decoding UTF-8 bodies with ``orjson``.
+
+    Like the strict stdlib parser it rejects ``NaN`` and ``Infinity``. Other
+    encodings, and installs without ``orjson``, fall back to the stdlib parser.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("_", "-") not in (
+            "utf-8",
+            "utf8",
+        ):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
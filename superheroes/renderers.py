@@ -0,0 +1,128 @@
+"""
+Renderers for the superhero API.
+
+``ORJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer`` backed by
+the optional ``orjson`` package.
+
+The export renderers can also ``stream`` rows of values as encoded chunks for a
+``StreamingHttpResponse``, so exports never hold more than one chunk of rows in
+memory; their ``render`` is used for error responses.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+STREAM_CHUNK_ROWS = 1000
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` producing the same bytes with ``orjson``.
+
+    Datetimes, ``ReturnList``/``ReturnDict`` and other builtin subclasses are
+    encoded natively; anything else (``Decimal``, lazy strings, querysets, ...)
+    goes through DRF's ``JSONEncoder.default`` exactly as before. Indented or
+    non-compact output, and installs without ``orjson``, fall back to the stdlib
+    renderer.
+
+    Select it per request with ``?format=orjson``, or make it the default with
+    ``JSON_BACKEND=orjson``.
+    """
+
+    format = "orjson"
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which only the stdlib handles.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Match JSONRenderer, which escapes these to keep output a JavaScript subset.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class _Echo:
+    """File-like object handing back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(self.encode(item) for item in items).encode(self.charset)
+
+    def stream(self, fields, rows):
+        lines = []
+        for row in rows:
+            lines.append(self.encode(dict(zip(fields, row))))
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                yield "".join(lines).encode(self.charset)
+                lines = []
+        if lines:
+            yield "".join(lines).encode(self.charset)
+
+    def encode(self, item):
+        return json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma-separated values with a header row."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        fields = list(items[0]) if items else []
+        rows = ([item.get(field) for field in fields] for item in items)
+        return b"".join(self.stream(fields, rows))
+
+    def stream(self, fields, rows):
+        writer = csv.writer(_Echo())
+        chunk = [writer.writerow(fields)]
+        for row in rows:
+            chunk.append(writer.writerow(row))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield "".join(chunk).encode(self.charset)
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode(self.charset)
@@ -0,0 +1,143 @@
+"""
+Full-text search over superhero names, aliases, real names and powers.
+
+The engine is picked from the vendor of the database the queryset runs on:
+
+* PostgreSQL: a generated ``search_vector`` tsvector column with a GIN index,
+  matched with ``@@`` and ranked with ``ts_rank``.
+* SQLite: an external-content FTS5 table kept in sync by triggers, matched with
+  ``MATCH`` and ranked with ``bm25``.
+
+The structures are created by migration 0004. Other backends, or databases
+where the search structures are missing, fall back to DRF's ``icontains``
+search.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Superhero
+
+SEARCH_FIELDS = ["name", "alias", "real_name", "powers"]
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR_COLUMN = "search_vector"
+FTS_TABLE = "superheroes_superhero_fts"
+
+# Relative bm25 weights of SEARCH_FIELDS: names and aliases outrank powers.
+SQLITE_WEIGHTS = {"name": 10.0, "alias": 10.0, "real_name": 5.0, "powers": 1.0}
+
+_available = set()
+
+
+def tokenize(terms):
+    """Split search terms into word tokens safe to embed in engine queries."""
+    return [token for term in terms for token in re.findall(r"\w+", term)]
+
+
+class PostgresSearchEngine:
+    """tsvector/GIN based search for PostgreSQL."""
+
+    vendor = "postgresql"
+
+    def is_installed(self, connection):
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(
+                cursor, Superhero._meta.db_table
+            )
+        return any(column.name == SEARCH_VECTOR_COLUMN for column in columns)
+
+    def search(self, queryset, tokens):
+        connection = connections[queryset.db]
+        column = (
+            f"{connection.ops.quote_name(Superhero._meta.db_table)}."
+            f"{SEARCH_VECTOR_COLUMN}"
+        )
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        return queryset.filter(
+            RawSQL(
+                f"{column} @@ to_tsquery(%s::regconfig, %s)",
+                [SEARCH_CONFIG, tsquery],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({column}, to_tsquery(%s::regconfig, %s))",
+                [SEARCH_CONFIG, tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+
+class SqliteSearchEngine:
+    """FTS5 based search for SQLite."""
+
+    vendor = "sqlite"
+
+    def is_installed(self, connection):
+        return FTS_TABLE in connection.introspection.table_names()
+
+    def search(self, queryset, tokens):
+        connection = connections[queryset.db]
+        table = connection.ops.quote_name(Superhero._meta.db_table)
+        match = " ".join(f'"{token}"*' for token in tokens)
+        weights = ", ".join(str(SQLITE_WEIGHTS[field]) for field in SEARCH_FIELDS)
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+
+ENGINES = {
+    engine.vendor: engine for engine in (PostgresSearchEngine(), SqliteSearchEngine())
+}
+
+
+def get_search_engine(using):
+    """
+    Return the full-text engine for a database alias, or ``None`` when its
+    backend has no engine or the search structures have not been migrated.
+    """
+    connection = connections[using]
+    engine = ENGINES.get(connection.vendor)
+    if engine is None:
+        return None
+    key = (using, connection.settings_dict["NAME"])
+    if key not in _available:
+        if not engine.is_installed(connection):
+            return None
+        _available.add(key)
+    return engine
+
+
+class SuperheroSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` backed by the database's full-text engine.
+
+    Results are ranked by relevance unless the request asks for an explicit
+    ``ordering``; keyset pagination then pages through them by rank too. It
+    must run after ``OrderingFilter`` in ``filter_backends``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        tokens = tokenize(search_terms)
+        engine = get_search_engine(queryset.db) if tokens else None
+        if engine is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = engine.search(queryset, tokens)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by("-search_rank", *queryset.query.order_by)
@@ -1,9 +1,117 @@
-from rest_framework import serializers
+import re
+from contextlib import contextmanager
+from operator import itemgetter
 
-from .models import Superhero
+from django.db import IntegrityError, router, transaction
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
+from base import tracing
 
-class SuperheroListSerializer(serializers.ModelSerializer):
+from .models import NAME_CONSTRAINT, POWER_DESCRIPTIONS, Superhero, format_display_name
+
+DUPLICATE_NAME = "A superhero with this name already exists."
+
+# Model columns computed fields are derived from; other fields map to themselves.
+FIELD_SOURCES = {
+    "display_name": ["name", "alias"],
+    "power_description": ["power_level"],
+}
+
+
+def is_duplicate_name(error):
+    """
+    Return whether the ``IntegrityError`` ``error`` was raised by one of the
+    unique indexes on ``Superhero.name``, rather than another constraint.
+    """
+    table = Superhero._meta.db_table
+    column = Superhero._meta.get_field("name").column
+    message = str(error)
+    # SQLite: "UNIQUE constraint failed: <index or table.column>".
+    prefix, _, target = message.partition(": ")
+    if prefix == "UNIQUE constraint failed":
+        return target in (f"index '{NAME_CONSTRAINT}'", f"{table}.{column}")
+    # PostgreSQL names the violated constraint in the error's diagnostics, or
+    # in its message once the error crossed a process boundary without them.
+    diag = getattr(error.__cause__, "diag", None)
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint is None:
+        match = re.match(
+            r'duplicate key value violates unique constraint "(.+?)"', message
+        )
+        constraint = match and match[1]
+    # Ours, or the one of unique=True: <table>_<column>_key, or _<hash>_uniq.
+    return bool(constraint) and (
+        constraint == NAME_CONSTRAINT or constraint.startswith(f"{table}_{column}_")
+    )
+
+
+def select_fields(available, fields=None, exclude=None):
+    """
+    Return the names of ``available`` kept by comma-separated ``fields`` and
+    ``exclude`` selections, in their original order.
+
+    Raises ``ValidationError`` for names that are not available.
+    """
+    selected = list(available)
+    for param, value in (("fields", fields), ("exclude", exclude)):
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = names.difference(available)
+        if unknown:
+            raise serializers.ValidationError(
+                {
+                    param: [
+                        f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                        f"Available fields: {', '.join(available)}."
+                    ]
+                }
+            )
+        if param == "fields":
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    return selected
+
+
+def source_columns(fields):
+    """Return the model columns needed to represent ``fields``."""
+    columns = ["id"]
+    for name in fields:
+        columns.extend(FIELD_SOURCES.get(name, [name]))
+    return list(dict.fromkeys(columns))
+
+
+class TracedDataMixin:
+    """Trace building ``.data`` as a span carrying the number of rows."""
+
+    @property
+    def data(self):
+        with tracing.span(f"{type(self).__name__}.data") as span:
+            data = super().data
+            rows = len(data) if isinstance(data, list) else 1
+            span.set_attribute("superheroes.rows", rows)
+        return data
+
+
+class SparseFieldsMixin:
+    """
+    Represent only the fields selected with ``?fields=`` / ``?exclude=``, passed
+    by the view as the ``fields`` context; the others are never evaluated.
+    """
+
+    @property
+    def _readable_fields(self):
+        selected = self.context.get("fields")
+        for field in super()._readable_fields:
+            if selected is None or field.field_name in selected:
+                yield field
+
+
+class SuperheroListSerializer(
+    TracedDataMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for superhero list view with essential fields."""
 
     display_name = serializers.ReadOnlyField()
@@ -25,7 +133,82 @@ class SuperheroListSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class SuperheroDetailSerializer(serializers.ModelSerializer):
+class FastSuperheroListSerializer:
+    """
+    Fast path producing ``SuperheroListSerializer`` output from ``values()`` rows.
+
+    Each payload is built directly from the fetched columns, with
+    ``display_name`` and ``power_description`` derived from the same helpers as
+    the model properties, instead of going through DRF's per-field machinery.
+    The rendered output is identical to ``SuperheroListSerializer``'s.
+    """
+
+    fields = SuperheroListSerializer.Meta.fields
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.selected = self.fields if fields is None else fields
+
+    @classmethod
+    def values(cls, queryset, fields=None, extra_columns=()):
+        """
+        Return ``queryset`` as ``values()`` rows carrying the columns needed for
+        ``fields`` (all list fields by default) and ``extra_columns`` (e.g. the
+        fields keyset cursors are built from).
+        """
+        columns = source_columns(cls.fields if fields is None else fields)
+        return queryset.values(*dict.fromkeys([*columns, *extra_columns]))
+
+    @staticmethod
+    def datetime_formatter():
+        """
+        Return a function formatting datetimes like DRF's ``DateTimeField``,
+        resolving the format and time zone once instead of once per value.
+        """
+        field = serializers.DateTimeField()
+        output_format = api_settings.DATETIME_FORMAT
+        field_timezone = field.default_timezone()
+        if (
+            output_format is None
+            or output_format.lower() != ISO_8601
+            or field_timezone is None
+        ):
+            return field.to_representation
+
+        def to_representation(value):
+            if not value:
+                return None
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return to_representation
+
+    def getters(self):
+        """Return ``(field, function of a row)`` pairs for the selected fields."""
+        created_at = self.datetime_formatter()
+        computed = {
+            "display_name": lambda row: format_display_name(row["name"], row["alias"]),
+            "power_description": lambda row: POWER_DESCRIPTIONS.get(
+                row["power_level"], "Unknown"
+            ),
+            "created_at": lambda row: created_at(row["created_at"]),
+        }
+        return [(name, computed.get(name, itemgetter(name))) for name in self.selected]
+
+    @property
+    def data(self):
+        with tracing.span("FastSuperheroListSerializer.data") as span:
+            getters = self.getters()
+            data = [{name: get(row) for name, get in getters} for row in self.rows]
+            span.set_attribute("superheroes.rows", len(data))
+        return data
+
+
+class SuperheroDetailSerializer(
+    TracedDataMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for superhero detail view with all fields."""
 
     display_name = serializers.ReadOnlyField()
@@ -72,7 +255,41 @@ class SuperheroDetailSerializer(serializers.ModelSerializer):
         return value
 
 
-class SuperheroCreateSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """
+    Report names taken in any letter case as a validation error on ``name``.
+
+    Uniqueness is enforced by the unique index on ``Lower("name")`` rather than
+    checked with a query beforehand, so writes skip a round-trip and two
+    concurrent requests cannot both pass the check.
+    """
+
+    def create(self, validated_data):
+        with self._unique_name(validated_data):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self._unique_name(validated_data):
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def _unique_name(self, validated_data):
+        if "name" not in validated_data:
+            yield
+            return
+        try:
+            # A savepoint keeps an enclosing transaction usable on conflict.
+            with transaction.atomic(using=router.db_for_write(self.Meta.model)):
+                yield
+        except IntegrityError as error:
+            if not is_duplicate_name(error):
+                raise
+            raise serializers.ValidationError({"name": [DUPLICATE_NAME]})
+
+
+class SuperheroCreateSerializer(
+    UniqueNameMixin, TracedDataMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for creating new superheroes."""
 
     class Meta:
@@ -91,17 +308,12 @@ class SuperheroCreateSerializer(serializers.ModelSerializer):
             "is_active",
             "is_villain",
         ]
-
-    def validate_name(self, value):
-        """Validate superhero name is unique."""
-        if Superhero.objects.filter(name__iexact=value).exists():
-            raise serializers.ValidationError(
-                "A superhero with this name already exists."
-            )
-        return value
+        extra_kwargs = {"name": {"validators": []}}
 
 
-class SuperheroUpdateSerializer(serializers.ModelSerializer):
+class SuperheroUpdateSerializer(
+    UniqueNameMixin, TracedDataMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for updating existing superheroes."""
 
     class Meta:
@@ -120,27 +332,50 @@ class SuperheroUpdateSerializer(serializers.ModelSerializer):
             "is_active",
             "is_villain",
         ]
+        extra_kwargs = {"name": {"validators": []}}
 
-    def validate_name(self, value):
-        """Validate superhero name is unique (excluding current instance)."""
-        instance = getattr(self, "instance", None)
-        if (
-            instance
-            and Superhero.objects.filter(name__iexact=value)
-            .exclude(pk=instance.pk)
-            .exists()
-        ):
-            raise serializers.ValidationError(
-                "A superhero with this name already exists."
-            )
-        elif not instance and Superhero.objects.filter(name__iexact=value).exists():
-            raise serializers.ValidationError(
-                "A superhero with this name already exists."
-            )
-        return value
+
+class SuperheroBulkCreateSerializer(SuperheroCreateSerializer):
+    """
+    Serializer for one item of a bulk create.
+
+    Name uniqueness is checked for the whole batch at once by ``superheroes.bulk``.
+    """
+
+
+class SuperheroBulkUpdateSerializer(SuperheroUpdateSerializer):
+    """
+    Serializer for one item of a bulk update.
+
+    Name uniqueness is checked for the whole batch at once by ``superheroes.bulk``.
+    """
+
+
+class SuperheroBulkResultSerializer(serializers.Serializer):
+    """Serializer for the outcome of one item of a bulk request."""
+
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(["created", "updated", "deleted", "error"])
+    id = serializers.IntegerField(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class SuperheroBulkResponseSerializer(TracedDataMixin, serializers.Serializer):
+    """Serializer for bulk request responses."""
+
+    succeeded = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = SuperheroBulkResultSerializer(many=True)
+
+
+class SuperheroAutocompleteSerializer(serializers.Serializer):
+    """Serializer for autocomplete suggestions."""
+
+    id = serializers.IntegerField()
+    display_name = serializers.CharField()
 
 
-class SuperheroStatsSerializer(serializers.Serializer):
+class SuperheroStatsSerializer(TracedDataMixin, serializers.Serializer):
     """Serializer for superhero statistics."""
 
     total_superheroes = serializers.IntegerField()
@@ -0,0 +1,56 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import cache, stats
+from .models import STATS_BUCKET_FIELDS, Superhero
+
+# Sent whenever superheroes are created, changed or deleted, including writes
+# that bypass model signals (QuerySet.update, bulk_create, ...). Senders of such
+# writes must send it themselves, through send_changed() where the write may
+# still be in a transaction.
+superheroes_changed = Signal()
+
+superheroes_changed.connect(cache.bump_generation)
+
+
+def send_changed(sender, using=DEFAULT_DB_ALIAS):
+    """
+    Send ``superheroes_changed`` once the current transaction on ``using``
+    commits, or right away outside one.
+
+    Invalidating earlier would let a concurrent read cache the rows from before
+    the commit under the new cache generation.
+    """
+    transaction.on_commit(lambda: superheroes_changed.send(sender=sender), using=using)
+
+
+@receiver(pre_save, sender=Superhero)
+def remember_stats_bucket(sender, instance, **kwargs):
+    """Look up the stored bucket of rows saved without one loaded."""
+    if instance.pk is not None and getattr(instance, "_stats_bucket", None) is None:
+        instance._stats_bucket = stats.load_bucket(instance.pk, kwargs["using"])
+
+
+@receiver(post_save, sender=Superhero)
+def update_stats_on_save(sender, instance, created, update_fields, **kwargs):
+    """Move the saved superhero into its new statistics bucket."""
+    old_bucket = None if created else getattr(instance, "_stats_bucket", None)
+    new_bucket = stats.bucket_of(instance)
+    if old_bucket is not None and update_fields is not None:
+        # Fields left out of update_fields were not written to the database.
+        new_bucket = tuple(
+            new if field in update_fields else old
+            for field, old, new in zip(STATS_BUCKET_FIELDS, old_bucket, new_bucket)
+        )
+    stats.record(old_bucket, new_bucket, kwargs["using"])
+    instance._stats_bucket = new_bucket
+    send_changed(sender, kwargs["using"])
+
+
+@receiver(post_delete, sender=Superhero)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """Remove the deleted superhero from its statistics bucket."""
+    bucket = getattr(instance, "_stats_bucket", None) or stats.bucket_of(instance)
+    stats.record(bucket, None, kwargs["using"])
+    send_changed(sender, kwargs["using"])
@@ -0,0 +1,282 @@
+"""
+Incrementally maintained superhero statistics.
+
+``SuperheroStatsSnapshot`` keeps one counter per statistics bucket. The counters
+are adjusted by the model signals in ``superheroes.signals`` and by the helpers
+below for writes that bypass signals (``QuerySet.update`` in admin actions), so
+the statistics endpoint never has to scan the superhero table.
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from .models import STATS_BUCKET_FIELDS, Superhero, SuperheroStatsSnapshot
+
+_pending_deltas = ContextVar("superhero_stats_pending_deltas", default=None)
+
+
+def bucket_of(instance):
+    """Return the statistics bucket of a superhero instance."""
+    return tuple(getattr(instance, field) for field in STATS_BUCKET_FIELDS)
+
+
+def load_bucket(pk, using=None):
+    """Return the statistics bucket currently stored for ``pk``, if any."""
+    return (
+        Superhero.objects.using(using)
+        .filter(pk=pk)
+        .values_list(*STATS_BUCKET_FIELDS)
+        .first()
+    )
+
+
+def record(old_bucket, new_bucket, using="default"):
+    """Move one superhero from ``old_bucket`` to ``new_bucket``."""
+    if old_bucket == new_bucket:
+        return
+    deltas = Counter()
+    if old_bucket is not None:
+        deltas[(using, old_bucket)] -= 1
+    if new_bucket is not None:
+        deltas[(using, new_bucket)] += 1
+    _apply_or_defer(deltas)
+
+
+@contextmanager
+def deferred():
+    """
+    Collect counter changes and write them once when the block exits.
+
+    Useful around operations that save or delete many superheroes one at a time
+    (e.g. ``QuerySet.delete()``), turning one counter update per row into one
+    per touched bucket.
+    """
+    if _pending_deltas.get() is not None:
+        yield
+        return
+
+    token = _pending_deltas.set(Counter())
+    try:
+        yield
+        deltas = _pending_deltas.get()
+    finally:
+        _pending_deltas.reset(token)
+    apply_deltas(deltas)
+
+
+def track_update(queryset, **changes):
+    """
+    Run ``queryset.update(**changes)`` and adjust the counters accordingly.
+
+    ``changes`` must map fields to plain values; the buckets of the affected rows
+    are read in the same transaction as the update. ``update()`` skips
+    ``auto_now``, so ``updated_at`` is set here to keep ETags changing.
+    """
+    using = queryset.db
+    changes.setdefault("updated_at", timezone.now())
+    with transaction.atomic(using=using):
+        bucket_changes = {
+            field: value
+            for field, value in changes.items()
+            if field in STATS_BUCKET_FIELDS
+        }
+        deltas = Counter()
+        if bucket_changes:
+            groups = (
+                queryset.values_list(*STATS_BUCKET_FIELDS)
+                .annotate(total=Count("pk"))
+                .order_by()
+            )
+            for *bucket, total in groups:
+                old_bucket = tuple(bucket)
+                new_bucket = tuple(
+                    bucket_changes.get(field, value)
+                    for field, value in zip(STATS_BUCKET_FIELDS, old_bucket)
+                )
+                if old_bucket != new_bucket:
+                    deltas[(using, old_bucket)] -= total
+                    deltas[(using, new_bucket)] += total
+        updated = queryset.update(**changes)
+        _apply_or_defer(deltas)
+    return updated
+
+
+def apply_deltas(deltas):
+    """
+    Write ``{(using, bucket): delta}`` changes to the snapshot table, in at
+    most two queries per database however many buckets changed.
+    """
+    changes = defaultdict(dict)
+    for (using, bucket), delta in deltas.items():
+        if delta:
+            changes[using][bucket] = delta
+    for using, bucket_deltas in changes.items():
+        if len(bucket_deltas) == 1:
+            _increment(using, *bucket_deltas.popitem())
+        else:
+            _increment_many(using, bucket_deltas)
+
+
+def rebuild(using="default"):
+    """Recompute every counter from the superhero table."""
+    groups = (
+        Superhero.objects.using(using)
+        .values_list(*STATS_BUCKET_FIELDS)
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+    snapshots = [
+        SuperheroStatsSnapshot(**dict(zip(STATS_BUCKET_FIELDS, bucket)), count=total)
+        for *bucket, total in groups
+    ]
+    with transaction.atomic(using=using):
+        SuperheroStatsSnapshot.objects.using(using).all().delete()
+        SuperheroStatsSnapshot.objects.using(using).bulk_create(snapshots)
+    return len(snapshots)
+
+
+def snapshot_stats(using=None):
+    """Return the statistics payload computed from the snapshot table."""
+    return build_stats(_snapshot_totals(_snapshot_rows(using)))
+
+
+async def asnapshot_stats(using=None):
+    """``snapshot_stats`` reading the snapshot table with the async ORM."""
+    rows = [row async for row in _snapshot_rows(using)]
+    return build_stats(_snapshot_totals(rows))
+
+
+def aggregate_stats(queryset):
+    """
+    Return the statistics payload for an arbitrary superhero queryset.
+
+    Every total, the average and both distributions come from one grouped
+    query using conditional aggregation.
+    """
+    return build_stats(_aggregate_rows(queryset))
+
+
+async def aaggregate_stats(queryset):
+    """``aggregate_stats`` running its grouped query with the async ORM."""
+    return build_stats([row async for row in _aggregate_rows(queryset)])
+
+
+def build_stats(rows):
+    """
+    Fold ``(universe, power_level, total, active, villains)`` rows into the
+    statistics payload served by ``SuperheroStatsView``.
+    """
+    total = active = villains = power_sum = 0
+    universes = Counter()
+    power_levels = Counter()
+    for universe, power_level, count, active_count, villain_count in rows:
+        total += count
+        active += active_count
+        villains += villain_count
+        power_sum += power_level * count
+        universes[universe] += count
+        power_levels[power_level] += count
+
+    return {
+        "total_superheroes": total,
+        "active_superheroes": active,
+        "inactive_superheroes": total - active,
+        "villains": villains,
+        "superheroes": total - villains,
+        "average_power_level": round(power_sum / total, 2) if total else 0,
+        "universe_distribution": {
+            universe: count
+            for universe, count in sorted(
+                universes.items(), key=lambda item: (-item[1], item[0])
+            )
+        },
+        "power_level_distribution": {
+            str(power_level): count
+            for power_level, count in sorted(power_levels.items())
+        },
+    }
+
+
+def _snapshot_rows(using):
+    return (
+        SuperheroStatsSnapshot.objects.using(using)
+        .filter(count__gt=0)
+        .values_list(*STATS_BUCKET_FIELDS, "count")
+    )
+
+
+def _snapshot_totals(rows):
+    for universe, power_level, is_active, is_villain, count in rows:
+        yield (
+            universe,
+            power_level,
+            count,
+            count if is_active else 0,
+            count if is_villain else 0,
+        )
+
+
+def _aggregate_rows(queryset):
+    return (
+        queryset.values_list("universe", "power_level")
+        .annotate(
+            total=Count("pk"),
+            active=Count("pk", filter=Q(is_active=True)),
+            villains=Count("pk", filter=Q(is_villain=True)),
+        )
+        .order_by()
+    )
+
+
+def _apply_or_defer(deltas):
+    pending = _pending_deltas.get()
+    if pending is not None:
+        pending.update(deltas)
+    else:
+        apply_deltas(deltas)
+
+
+def _increment_many(using, bucket_deltas):
+    snapshots = SuperheroStatsSnapshot.objects.using(using)
+    lookups = {
+        bucket: Q(**dict(zip(STATS_BUCKET_FIELDS, bucket))) for bucket in bucket_deltas
+    }
+    # Create the missing buckets empty, then adjust every bucket in one UPDATE.
+    snapshots.bulk_create(
+        [
+            SuperheroStatsSnapshot(**dict(zip(STATS_BUCKET_FIELDS, bucket)), count=0)
+            for bucket in bucket_deltas
+        ],
+        ignore_conflicts=True,
+    )
+    snapshots.filter(reduce(or_, lookups.values())).update(
+        count=F("count")
+        + Case(
+            *(
+                When(lookups[bucket], then=Value(delta))
+                for bucket, delta in bucket_deltas.items()
+            ),
+            default=Value(0),
+            output_field=BigIntegerField(),
+        )
+    )
+
+
+def _increment(using, bucket, delta):
+    snapshots = SuperheroStatsSnapshot.objects.using(using)
+    lookup = dict(zip(STATS_BUCKET_FIELDS, bucket))
+    if snapshots.filter(**lookup).update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic(using=using):
+            snapshots.create(**lookup, count=delta)
+    except IntegrityError:
+        # Another writer created the bucket first.
+        snapshots.filter(**lookup).update(count=F("count") + delta)
@@ -1,12 +1,58 @@
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
 from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-from django.test import TestCase
-from django.urls import reverse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.sites import AdminSite
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.utils import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils.translation import gettext_lazy
 from rest_framework import status
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import perform_import
 from rest_framework.test import APIClient, APITestCase
 
-from .models import Superhero
-from .serializers import SuperheroDetailSerializer
+from base.testing import QueryBudgetTestMixin
+
+from . import bulk, cache, generator, stats
+from .admin import SuperheroAdmin
+from .autocomplete import PrefixTrie
+from .models import Superhero, SuperheroStatsSnapshot
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .serializers import (
+    DUPLICATE_NAME,
+    FastSuperheroListSerializer,
+    SuperheroCreateSerializer,
+    SuperheroDetailSerializer,
+    SuperheroListSerializer,
+    is_duplicate_name,
+)
+from .views import SuperheroStatsView, SuperheroViewSet, universe_lookup
+
+
+class StatsConsistencyTestMixin:
+    """Assertions on the statistics counters maintained by ``stats``."""
+
+    def assertStatsConsistent(self):
+        """Assert the snapshot counters match a scan of the superhero table."""
+        self.assertEqual(
+            stats.snapshot_stats(), stats.aggregate_stats(Superhero.objects.all())
+        )
 
 
 class SuperheroModelTest(TestCase):
@@ -38,6 +84,12 @@ class SuperheroModelTest(TestCase):
         self.assertTrue(superhero.is_active)
         self.assertFalse(superhero.is_villain)
 
+    def test_name_unique_in_any_case(self):
+        """Test the database rejects names differing only in letter case."""
+        Superhero.objects.create(**self.superhero_data)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Superhero.objects.create(name="SPIDER-MAN")
+
     def test_superhero_str_method(self):
         """Test superhero string representation."""
         superhero = Superhero.objects.create(**self.superhero_data)
@@ -77,6 +129,56 @@ class SuperheroModelTest(TestCase):
         self.assertEqual(superheroes[2].name, "Wolverine")
 
 
+class SuperheroIndexUsageTest(TestCase):
+    """Ensure the query planner picks the indexes added for the hot query paths."""
+
+    def setUp(self):
+        """Set up test data."""
+        Superhero.objects.create(name="Batman", universe="DC", power_level=6)
+        Superhero.objects.create(name="Spider-Man", universe="Marvel", power_level=7)
+        Superhero.objects.create(
+            name="Joker", universe="DC", power_level=5, is_villain=True
+        )
+        if connection.vendor == "postgresql":
+            # Tiny tables are cheaper to scan; force the planner to show its
+            # index choices the way it would on a large table.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_query_shapes_use_indexes(self):
+        """Test each filter/ordering shape used by the API hits its index."""
+        queryset = Superhero.objects.all()
+        shapes = {
+            "superhero_top_idx": queryset.filter(is_villain=False).order_by(
+                "-power_level", "name"
+            )[:10],
+            "superhero_villain_name_idx": queryset.filter(is_villain=True),
+            "superhero_active_name_idx": queryset.filter(is_active=True),
+            "superhero_universe_idx": queryset.filter(universe_lookup("dc")),
+            "superhero_age_idx": queryset.order_by("age"),
+            "superhero_created_idx": queryset.order_by("-created_at"),
+            "superhero_updated_idx": queryset.order_by("updated_at"),
+        }
+        if connection.vendor not in ("postgresql", "sqlite"):
+            self.skipTest("EXPLAIN output is only checked on PostgreSQL and SQLite")
+        for index_name, shape in shapes.items():
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(shape, index_name)
+
+    def test_universe_lookup_is_case_insensitive(self):
+        """Test known universes match exactly and unknown ones fall back."""
+        self.assertEqual(Superhero.objects.filter(universe_lookup("dc")).count(), 2)
+        self.assertEqual(Superhero.objects.filter(universe_lookup("DC")).count(), 2)
+        self.assertEqual(
+            Superhero.objects.filter(universe_lookup("unknown")).count(), 0
+        )
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
 class SuperheroAPITest(APITestCase):
     """Test cases for Superhero API endpoints."""
 
@@ -218,7 +320,7 @@ class SuperheroAPITest(APITestCase):
         response = self.client.get(url, {"universe": "DC"})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # Batman and Joker
+        self.assertEqual(len(response.data["results"]), 2)  # Batman and Joker
 
     def test_get_top_superheroes_action(self):
         """Test custom action to get top superheroes."""
@@ -239,8 +341,8 @@ class SuperheroAPITest(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Joker")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Joker")
 
     def test_toggle_villain_action(self):
         """Test toggling villain status."""
@@ -293,6 +395,1554 @@ class SuperheroAPITest(APITestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_duplicate_name_in_other_case(self):
+        """Test names are unique in any letter case, without a lookup query."""
+        url = reverse("superhero-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {"name": "BATMAN"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"name": ["A superhero with this name already exists."]}
+        )
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("SELECT")]
+        )
+        self.assertEqual(Superhero.objects.count(), 3)
+
+    def test_update_to_taken_name(self):
+        """Test renaming onto another superhero's name is rejected."""
+        url = reverse("superhero-detail", kwargs={"pk": self.superhero1.pk})
+
+        response = self.client.patch(url, {"name": "joker"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"name": ["A superhero with this name already exists."]}
+        )
+        self.superhero1.refresh_from_db()
+        self.assertEqual(self.superhero1.name, "Spider-Man")
+
+    def test_update_name_case(self):
+        """Test a superhero can be renamed to a new spelling of its own name."""
+        url = reverse("superhero-detail", kwargs={"pk": self.superhero1.pk})
+
+        response = self.client.patch(url, {"name": "SPIDER-MAN"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.superhero1.refresh_from_db()
+        self.assertEqual(self.superhero1.name, "SPIDER-MAN")
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SuperheroCursorPaginationTest(APITestCase):
+    """Test cases for keyset pagination on the superhero list endpoints."""
+
+    def setUp(self):
+        """Set up test data with duplicate power levels and missing ages."""
+        self.client = APIClient()
+        for index in range(12):
+            Superhero.objects.create(
+                name=f"Hero {index:02d}",
+                power_level=index % 4 + 1,
+                age=None if index % 3 == 0 else 20 + index % 5,
+                is_villain=index % 2 == 0,
+            )
+        self.url = reverse("superhero-list")
+
+    def walk(self, params, url=None):
+        """Follow next links from the first page and return all names."""
+        names, response = [], self.client.get(url or self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            names.extend(item["name"] for item in response.data["results"])
+            if not response.data["next"]:
+                return names, response
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_pages_follow_ordering(self):
+        """Test every ordering visits all rows once, in the expected order."""
+        for ordering in ["name", "-power_level", "age", "-age", "-created_at"]:
+            with self.subTest(ordering=ordering):
+                names, _ = self.walk(
+                    {"paginate": "cursor", "ordering": ordering, "page_size": 5}
+                )
+                expected = list(
+                    Superhero.objects.order_by(ordering, "id").values_list(
+                        "name", flat=True
+                    )
+                )
+                self.assertEqual(names, expected)
+
+    def test_previous_links_walk_back(self):
+        """Test previous links return the preceding page."""
+        params = {"paginate": "cursor", "ordering": "-power_level", "page_size": 5}
+        first = self.client.get(self.url, params)
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_page_is_stable_under_inserts(self):
+        """Test rows inserted before the cursor do not shift the next page."""
+        params = {"paginate": "cursor", "page_size": 4}
+        first = self.client.get(self.url, params)
+        expected = self.client.get(first.data["next"]).data["results"]
+        Superhero.objects.create(name="Hero 00a", power_level=3)
+        self.assertEqual(self.client.get(first.data["next"]).data["results"], expected)
+
+    def test_cursor_page_fetch_is_single_query(self):
+        """Test cursor pages are fetched with a single query, without an offset."""
+        first = self.client.get(self.url, {"paginate": "cursor"})
+        # The other query is the aggregate computing the list's ETag.
+        with self.assertNumQueries(2) as context:
+            self.client.get(first.data["next"])
+        self.assertNotIn("OFFSET", context.captured_queries[1]["sql"])
+
+    def test_invalid_cursor(self):
+        """Test malformed or mismatched cursors are rejected."""
+        response = self.client.get(self.url, {"paginate": "cursor", "cursor": "zz"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        first = self.client.get(self.url, {"paginate": "cursor"})
+        response = self.client.get(first.data["next"] + "&ordering=-age")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_villains_and_by_universe_are_paginated(self):
+        """Test the villains and by_universe actions return bounded pages."""
+        names, response = self.walk({}, url=reverse("superhero-villains"))
+        self.assertEqual(len(names), 6)
+        self.assertLessEqual(len(response.data["results"]), 10)
+
+        names, _ = self.walk(
+            {"universe": "marvel", "page_size": 5}, url=reverse("superhero-by-universe")
+        )
+        self.assertEqual(len(names), 12)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SuperheroFullTextSearchTest(APITestCase):
+    """Test cases for the full-text search backend."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.url = reverse("superhero-list")
+        Superhero.objects.create(
+            name="Storm", real_name="Ororo Munroe", powers="Weather control, flight"
+        )
+        Superhero.objects.create(
+            name="Thor", alias="God of Thunder", powers="Storm summoning, flight"
+        )
+        Superhero.objects.create(
+            name="Flash", real_name="Barry Allen", powers="Super speed"
+        )
+
+    def search(self, term, **params):
+        response = self.client.get(self.url, {"search": term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.data["results"]]
+
+    def test_engine_selected_from_database(self):
+        """Test the engine matching the configured database is used."""
+        from .search import get_search_engine
+
+        engine = get_search_engine("default")
+        if connection.vendor in ("postgresql", "sqlite"):
+            self.assertEqual(engine.vendor, connection.vendor)
+
+    def test_results_ranked_by_relevance(self):
+        """Test name matches outrank matches in powers."""
+        self.assertEqual(self.search("storm"), ["Storm", "Thor"])
+
+    def test_explicit_ordering_overrides_rank(self):
+        """Test an ordering parameter takes precedence over relevance."""
+        self.assertEqual(self.search("storm", ordering="-name"), ["Thor", "Storm"])
+
+    def test_cursor_pages_keep_rank(self):
+        """Test keyset pagination pages through search results by relevance."""
+        Superhero.objects.create(name="Storm Shadow", powers="Ninjutsu")
+        expected = self.search("storm")
+        self.assertEqual(len(expected), 3)
+        params = {"paginate": "cursor", "page_size": 1}
+        first = self.client.get(self.url, {"search": "storm", **params})
+        pages = [first]
+        while pages[-1].data["next"]:
+            pages.append(self.client.get(pages[-1].data["next"]))
+        names = [item["name"] for page in pages for item in page.data["results"]]
+        self.assertEqual(names, expected)
+        back = self.client.get(pages[1].data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_prefix_and_multiple_terms(self):
+        """Test terms match word prefixes and must all match."""
+        self.assertEqual(self.search("thund"), ["Thor"])
+        self.assertEqual(self.search("flight weather"), ["Storm"])
+        self.assertEqual(self.search("barry"), ["Flash"])
+
+    def test_index_follows_writes(self):
+        """Test updates, queryset updates and deletes are reflected in search."""
+        flash = Superhero.objects.get(name="Flash")
+        flash.powers = "Speed force, time travel"
+        flash.save()
+        self.assertEqual(self.search("time travel"), ["Flash"])
+
+        Superhero.objects.filter(name="Flash").update(alias="Scarlet Speedster")
+        self.assertEqual(self.search("scarlet"), ["Flash"])
+
+        flash.delete()
+        self.assertEqual(self.search("speed"), [])
+
+
+class SuperheroAutocompleteTest(APITestCase):
+    """Test cases for the autocomplete endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        # Writes only invalidate suggestions once they commit, which the test
+        # case's writes never do: start from a fresh generation instead.
+        cache.bump_generation()
+        self.client = APIClient()
+        self.url = reverse("superhero-autocomplete")
+        self.spider_man = Superhero.objects.create(
+            name="Spider-Man", alias="Spidey", real_name="Peter Parker"
+        )
+        self.spider_woman = Superhero.objects.create(
+            name="Spider-Woman", real_name="Jessica Drew"
+        )
+        self.superman = Superhero.objects.create(name="Superman", alias="Man of Steel")
+
+    def suggest(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_suggestions_only_include_id_and_display_name(self):
+        """Test suggestions are compact and ranked by similarity."""
+        suggestions = self.suggest("spider")
+        self.assertEqual(
+            suggestions[0],
+            {"id": self.spider_man.pk, "display_name": "Spider-Man (Spidey)"},
+        )
+        self.assertEqual(suggestions[1]["id"], self.spider_woman.pk)
+        self.assertEqual(len(suggestions), 2)
+
+    def test_matches_alias_and_real_name(self):
+        """Test aliases and real names are searchable."""
+        self.assertEqual([s["id"] for s in self.suggest("Peter")], [self.spider_man.pk])
+        self.assertIn(self.superman.pk, [s["id"] for s in self.suggest("steel")])
+
+    def test_limit_and_validation(self):
+        """Test limit handling and required parameters."""
+        self.assertEqual(len(self.suggest("spider", limit=1)), 1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"q": "spi", "limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_saves_invalidate_suggestions(self):
+        """Test renamed and deleted superheroes are reflected immediately."""
+        self.suggest("spider")
+        self.spider_woman.name = "Arachne"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spider_woman.save()
+        self.assertEqual(
+            [s["id"] for s in self.suggest("arach")], [self.spider_woman.pk]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spider_man.delete()
+        self.assertEqual(self.suggest("spidey"), [])
+
+    def test_writes_of_other_workers_invalidate_suggestions(self):
+        """Test a generation bumped by another process rebuilds the trie."""
+        self.suggest("spider")
+        # Another worker's write: the rows change and the shared generation is
+        # bumped, without any signal in this process.
+        Superhero.objects.filter(pk=self.spider_woman.pk).update(name="Arachne")
+        self.assertEqual(len(self.suggest("spider")), 2)
+        cache.bump_generation()
+        self.assertEqual(
+            [s["id"] for s in self.suggest("arach")], [self.spider_woman.pk]
+        )
+
+
+class PrefixTrieTest(TestCase):
+    """Test cases for the in-process autocomplete trie."""
+
+    def test_shorter_completions_rank_first(self):
+        """Test breadth-first lookup favours the closest completions."""
+        trie = PrefixTrie(
+            [
+                (1, "Batman Beyond", None, None),
+                (2, "Batman", "The Dark Knight", "Bruce Wayne"),
+                (3, "Batgirl", None, "Barbara Gordon"),
+            ]
+        )
+        self.assertEqual([s["id"] for s in trie.lookup("bat", 10)], [2, 3, 1])
+        self.assertEqual(
+            trie.lookup("knight", 10)[0]["display_name"], "Batman (The Dark Knight)"
+        )
+        self.assertEqual(trie.lookup("wayne", 10)[0]["id"], 2)
+        self.assertEqual(trie.lookup("joker", 10), [])
+        self.assertEqual(len(trie.lookup("b", 2)), 2)
+
+
+class SuperheroResponseCacheTest(APITestCase):
+    """Test cases for the read endpoint response cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        # Writes only invalidate the cache once they commit, which the test
+        # case's writes never do: start from an empty cache instead.
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.batman = Superhero.objects.create(name="Batman", universe="DC")
+        self.url = reverse("superhero-list")
+
+    def test_repeated_reads_are_served_from_cache(self):
+        """Test a repeated request hits the cache without querying."""
+        first = self.client.get(self.url, {"universe": "DC", "ordering": "name"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"ordering": "name", "universe": "DC"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+    def test_cached_endpoints(self):
+        """Test every read endpoint is cached."""
+        urls = [
+            self.url,
+            reverse("superhero-detail", kwargs={"pk": self.batman.pk}),
+            reverse("superhero-by-universe") + "?universe=DC",
+            reverse("superhero-top-superheroes"),
+            reverse("superhero-villains"),
+            reverse("superhero-stats"),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+    def test_errors_are_not_cached(self):
+        """Test error responses are recomputed."""
+        url = reverse("superhero-by-universe")
+        self.client.get(url)
+        self.assertNotIn("X-Cache", self.client.get(url))
+
+    def test_api_writes_invalidate(self):
+        """Test creates, updates and deletes through the API invalidate entries."""
+        detail = reverse("superhero-detail", kwargs={"pk": self.batman.pk})
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"name": "Robin"}, format="json")
+        self.assertEqual(self.client.get(self.url).data["count"], 2)
+
+        self.client.get(detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail, {"real_name": "Bruce Wayne"}, format="json")
+        self.assertEqual(self.client.get(detail).data["real_name"], "Bruce Wayne")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail)
+        self.assertEqual(self.client.get(self.url).data["count"], 1)
+
+    def test_invalidated_once_writes_commit(self):
+        """Test entries are invalidated when a write commits, not before."""
+        generation = cache.get_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.url, {"name": "Robin"}, format="json")
+        self.assertEqual(cache.get_generation(), generation)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(cache.get_generation(), generation)
+
+    def test_admin_actions_invalidate(self):
+        """Test admin bulk actions invalidate entries."""
+        admin = SuperheroAdmin(Superhero, AdminSite())
+        admin.message_user = lambda *args, **kwargs: None
+        stats_url = reverse("superhero-stats")
+        self.assertEqual(self.client.get(stats_url).data["villains"], 0)
+        admin.make_villain(None, Superhero.objects.all())
+        self.assertEqual(self.client.get(stats_url).data["villains"], 1)
+
+    def test_populate_command_invalidates(self):
+        """Test populate_superheroes invalidates entries."""
+        self.assertEqual(self.client.get(self.url).data["count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("populate_superheroes", stdout=StringIO())
+        self.assertGreater(self.client.get(self.url).data["count"], 1)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        """Test a zero timeout disables the cache."""
+        self.client.get(self.url)
+        self.assertNotIn("X-Cache", self.client.get(self.url))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SuperheroConditionalRequestTest(APITestCase):
+    """Test cases for ETag / Last-Modified conditional requests."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.batman = Superhero.objects.create(name="Batman", universe="DC")
+        self.url = reverse("superhero-list")
+        self.detail_url = reverse("superhero-detail", kwargs={"pk": self.batman.pk})
+
+    def test_validator_headers(self):
+        """Test list and detail responses carry ETag and Last-Modified."""
+        for url in (self.url, self.detail_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response["ETag"].startswith('W/"'))
+                self.assertIn("Last-Modified", response)
+
+    def test_if_none_match_detail(self):
+        """Test a matching detail ETag is answered with 304 from one query."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_none_match_list(self):
+        """Test a matching list ETag is answered with 304 from one query."""
+        etag = self.client.get(self.url, {"universe": "DC"})["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"universe": "DC"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        other = self.client.get(
+            self.url, {"universe": "Marvel"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since is honoured."""
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_produce_new_etags(self):
+        """Test updates and inserts change the ETags."""
+        detail_etag = self.client.get(self.detail_url)["ETag"]
+        list_etag = self.client.get(self.url)["ETag"]
+        self.client.patch(self.detail_url, {"power_level": 9}, format="json")
+        Superhero.objects.create(name="Robin", universe="DC")
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], detail_etag)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_match_check_and_write_share_a_transaction(self):
+        """Test the If-Match check locks the row until the write is done."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        requests = [
+            ("patch", self.detail_url, {"power_level": 7}),
+            ("post", reverse("superhero-toggle-villain", args=[self.batman.pk]), None),
+        ]
+        for method, url, data in requests:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(self.client, method)(
+                        url, data, format="json", HTTP_IF_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                queries = [query["sql"] for query in context.captured_queries]
+                savepoint = queries[0].split()[-1]
+                self.assertEqual(queries[0], f"SAVEPOINT {savepoint}")
+                self.assertIn('"updated_at"', queries[1])
+                write = next(
+                    number
+                    for number, sql in enumerate(queries)
+                    if sql.startswith('UPDATE "superheroes_superhero"')
+                )
+                self.assertIn(f"RELEASE SAVEPOINT {savepoint}", queries[write:])
+                etag = self.client.get(self.detail_url)["ETag"]
+
+    def test_admin_actions_produce_new_etags(self):
+        """Test admin bulk actions change the ETags of the rows they update."""
+        admin = SuperheroAdmin(Superhero, AdminSite())
+        admin.message_user = lambda *args, **kwargs: None
+        detail_etag = self.client.get(self.detail_url)["ETag"]
+        list_etag = self.client.get(self.url)["ETag"]
+        admin.make_villain(None, Superhero.objects.all())
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cached_responses_are_revalidated(self):
+        """Test cache hits still answer conditional requests."""
+        with self.settings(RESPONSE_CACHE_TIMEOUT=60):
+            etag = self.client.get(self.detail_url)["ETag"]
+            with self.assertNumQueries(0):
+                response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match(self):
+        """Test writes with a stale If-Match are rejected."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.patch(
+            self.detail_url, {"power_level": 7}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        stale = self.client.patch(
+            self.detail_url, {"power_level": 8}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(stale.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertIn("error", stale.data)
+        for action in ("superhero-toggle-villain", "superhero-toggle-active"):
+            with self.subTest(action=action):
+                url = reverse(action, kwargs={"pk": self.batman.pk})
+                response = self.client.post(url, HTTP_IF_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, status.HTTP_412_PRECONDITION_FAILED
+                )
+
+        self.batman.refresh_from_db()
+        self.assertEqual(self.batman.power_level, 7)
+        self.assertFalse(self.batman.is_villain)
+
+    def test_invalid_or_missing_pk_is_not_found(self):
+        """Test conditional reads and writes of an unknown id answer 404."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        for pk in ("abc", 0):
+            detail_url = reverse("superhero-detail", kwargs={"pk": pk})
+            toggle_url = reverse("superhero-toggle-villain", kwargs={"pk": pk})
+            requests = (
+                lambda: self.client.get(detail_url),
+                lambda: self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag),
+                lambda: self.client.put(
+                    detail_url, {"name": "Bats"}, format="json", HTTP_IF_MATCH=etag
+                ),
+                lambda: self.client.patch(
+                    detail_url, {"power_level": 2}, format="json", HTTP_IF_MATCH=etag
+                ),
+                lambda: self.client.post(toggle_url, HTTP_IF_MATCH=etag),
+            )
+            for number, send in enumerate(requests):
+                with self.subTest(pk=pk, request=number):
+                    self.assertEqual(send().status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SuperheroBulkTest(StatsConsistencyTestMixin, APITestCase):
+    """Test cases for the bulk create/update/delete endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.batman = Superhero.objects.create(name="Batman", universe="DC")
+        self.robin = Superhero.objects.create(name="Robin", universe="DC")
+
+    def test_bulk_create(self):
+        """Test valid items are created and invalid ones reported."""
+        items = [
+            {"name": "Flash", "universe": "DC", "power_level": 8},
+            {"name": "batman"},
+            {"name": "Storm", "power_level": 11},
+            {"name": "FLASH"},
+            {"name": "Cyclops", "is_villain": True},
+        ]
+        response = self.client.post(
+            reverse("superhero-bulk-create"), items, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["succeeded"], 2)
+        self.assertEqual(response.data["failed"], 3)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "error", "error", "error", "created"],
+        )
+        self.assertIn("name", results[1]["errors"])
+        self.assertIn("power_level", results[2]["errors"])
+        self.assertIn("name", results[3]["errors"])
+        self.assertEqual(Superhero.objects.get(pk=results[0]["id"]).name, "Flash")
+        self.assertEqual(Superhero.objects.count(), 4)
+        self.assertStatsConsistent()
+
+    def test_bulk_create_query_count_does_not_grow_with_batch(self):
+        """Test a batch is validated and inserted with a fixed number of queries."""
+        url = reverse("superhero-bulk-create")
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(url, [{"name": "Hero 0", "universe": "DC"}], format="json")
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(
+                url,
+                [{"name": f"Hero {i}", "universe": "DC"} for i in range(1, 51)],
+                format="json",
+            )
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Superhero.objects.count(), 53)
+
+    def test_bulk_update(self):
+        """Test items are updated by id and conflicts reported."""
+        items = [
+            {"id": self.batman.pk, "power_level": 9, "is_villain": True},
+            {"id": self.robin.pk, "name": "BATMAN"},
+            {"id": 0, "power_level": 2},
+            {"power_level": 2},
+        ]
+        response = self.client.patch(
+            reverse("superhero-bulk-update"), items, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["updated", "error", "error", "error"],
+        )
+        self.assertIn("name", results[1]["errors"])
+
+        updated_at = self.batman.updated_at
+        self.batman.refresh_from_db()
+        self.assertEqual(self.batman.power_level, 9)
+        self.assertTrue(self.batman.is_villain)
+        self.assertGreater(self.batman.updated_at, updated_at)
+        self.robin.refresh_from_db()
+        self.assertEqual(self.robin.name, "Robin")
+        self.assertStatsConsistent()
+
+    def test_bulk_update_locks_the_chunk(self):
+        """Test the rows of a chunk are locked until they are written."""
+        queryset = Superhero.objects.all()
+        with mock.patch.object(
+            type(queryset), "select_for_update", autospec=True, return_value=queryset
+        ) as select_for_update:
+            self.client.patch(
+                reverse("superhero-bulk-update"),
+                [{"id": self.batman.pk, "power_level": 9}],
+                format="json",
+            )
+        select_for_update.assert_called_once()
+        self.batman.refresh_from_db()
+        self.assertEqual(self.batman.power_level, 9)
+
+    def test_bulk_update_allows_renaming_case(self):
+        """Test a superhero can be renamed to another spelling of its name."""
+        response = self.client.patch(
+            reverse("superhero-bulk-update"),
+            [{"id": self.robin.pk, "name": "ROBIN"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.robin.refresh_from_db()
+        self.assertEqual(self.robin.name, "ROBIN")
+
+    def test_bulk_delete(self):
+        """Test ids are deleted and unknown ids reported."""
+        response = self.client.post(
+            reverse("superhero-bulk-delete"), [self.batman.pk, 0], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["deleted", "error"],
+        )
+        self.assertFalse(Superhero.objects.filter(pk=self.batman.pk).exists())
+        self.assertStatsConsistent()
+
+    def test_failed_stats_write_rolls_back_the_chunk(self):
+        """Test bulk writes and their counter updates commit together."""
+        writes = [
+            ("superhero-bulk-create", "post", [{"name": "Flash"}]),
+            ("superhero-bulk-update", "patch", [{"id": self.robin.pk, "age": 20}]),
+            ("superhero-bulk-delete", "post", [self.robin.pk]),
+            ("superhero-toggle-villain-batch", "post", [self.robin.pk]),
+        ]
+        for name, method, payload in writes:
+            with self.subTest(action=name):
+                with mock.patch.object(
+                    stats, "apply_deltas", side_effect=DatabaseError
+                ), self.assertRaises(DatabaseError):
+                    getattr(self.client, method)(reverse(name), payload, format="json")
+                self.assertEqual(
+                    list(Superhero.objects.order_by("pk").values_list("name", "age")),
+                    [("Batman", None), ("Robin", None)],
+                )
+                self.assertFalse(Superhero.objects.get(pk=self.robin.pk).is_villain)
+                self.assertStatsConsistent()
+
+    def test_nothing_references_superheroes(self):
+        """
+        Test no model relates to superheroes: ``bulk_delete`` skips the deletion
+        collector, which would be needed to cascade to such a relation.
+        """
+        self.assertEqual(Superhero._meta.related_objects, ())
+
+    def test_bulk_writes_invalidate_cache(self):
+        """Test bulk writes invalidate cached responses."""
+        url = reverse("superhero-list")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("superhero-bulk-delete"), [self.robin.pk], format="json"
+            )
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 1)
+
+    def test_invalid_payloads(self):
+        """Test non-list, empty and fully invalid payloads are rejected."""
+        url = reverse("superhero-bulk-create")
+        for payload in ({"name": "Flash"}, [], [{"name": ""}]):
+            with self.subTest(payload=payload):
+                response = self.client.post(url, payload, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SuperheroToggleTest(StatsConsistencyTestMixin, APITestCase):
+    """Test cases for the single-statement toggle actions."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.batman = Superhero.objects.create(
+            name="Batman", universe="DC", power_level=6, height=Decimal("188.00")
+        )
+        self.joker = Superhero.objects.create(
+            name="Joker", universe="DC", is_villain=True
+        )
+
+    def test_toggle_is_one_update(self):
+        """Test the flag is flipped in SQL, writing nothing else."""
+        url = reverse("superhero-toggle-villain", kwargs={"pk": self.batman.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        superhero_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"superheroes_superhero"' in query["sql"]
+        ]
+        self.assertEqual(len(superhero_queries), 1)
+        update = superhero_queries[0]
+        self.assertTrue(update.startswith('UPDATE "superheroes_superhero"'))
+        self.assertIn('NOT "superheroes_superhero"."is_villain"', update)
+        self.assertIn("RETURNING", update)
+        self.assertNotIn('"name" =', update)
+
+    def test_toggle_response(self):
+        """Test the response serializes the row returned by the update."""
+        url = reverse("superhero-toggle-active", kwargs={"pk": self.batman.pk})
+        response = self.client.post(url)
+
+        self.assertEqual(response.data["message"], "Batman is now inactive")
+        self.batman.refresh_from_db()
+        self.assertFalse(self.batman.is_active)
+        self.assertEqual(
+            response.data["superhero"],
+            SuperheroDetailSerializer(self.batman).data,
+        )
+        self.assertStatsConsistent()
+
+    def test_toggle_missing_superhero(self):
+        """Test unknown and malformed ids are not found."""
+        for pk in [0, "batman"]:
+            with self.subTest(pk=pk):
+                response = self.client.post(
+                    reverse("superhero-toggle-villain", kwargs={"pk": pk})
+                )
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_toggle(self):
+        """Test a batch is toggled in one go, with per-id results."""
+        response = self.client.post(
+            reverse("superhero-toggle-villain-batch"),
+            [self.batman.pk, self.joker.pk, 0, "x", self.batman.pk],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["succeeded"], 2)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["updated", "updated", "error", "error", "error"],
+        )
+        self.batman.refresh_from_db()
+        self.joker.refresh_from_db()
+        self.assertTrue(self.batman.is_villain)
+        self.assertFalse(self.joker.is_villain)
+        self.assertStatsConsistent()
+
+    def test_batch_toggle_invalidates_cache(self):
+        """Test batch toggles invalidate cached responses."""
+        url = reverse("superhero-villains")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("superhero-toggle-villain-batch"),
+                [self.batman.pk],
+                format="json",
+            )
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class SuperheroConcurrentToggleTest(StatsConsistencyTestMixin, TransactionTestCase):
+    """Test toggles sent in parallel are all applied."""
+
+    def setUp(self):
+        """Skip on in-memory SQLite, whose threads fail on locks instead of waiting."""
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database serving concurrent connections")
+
+    def test_parallel_toggles(self):
+        """Test no toggle is lost when requests race on the same rows."""
+        batman = Superhero.objects.create(name="Batman", universe="DC")
+        joker = Superhero.objects.create(name="Joker", universe="DC")
+        single = reverse("superhero-toggle-villain", kwargs={"pk": batman.pk})
+        batch = reverse("superhero-toggle-villain-batch")
+
+        def send(number):
+            try:
+                client = APIClient()
+                if number % 2:
+                    return client.post(single).status_code
+                return client.post(
+                    batch, [joker.pk, batman.pk], format="json"
+                ).status_code
+            finally:
+                connections.close_all()
+
+        # 15 single and 16 batch toggles of Batman, 16 batch toggles of Joker.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(send, range(31)))
+
+        self.assertEqual(set(statuses), {status.HTTP_200_OK})
+        batman.refresh_from_db()
+        joker.refresh_from_db()
+        self.assertTrue(batman.is_villain)
+        self.assertFalse(joker.is_villain)
+        self.assertStatsConsistent()
+
+
+class SuperheroExportTest(APITestCase):
+    """Test cases for the streaming export endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.url = reverse("superhero-export")
+        Superhero.objects.create(
+            name="Batman", universe="DC", power_level=7, height=Decimal("188.00")
+        )
+        Superhero.objects.create(name="Joker", universe="DC", is_villain=True)
+        Superhero.objects.create(name="Storm, Ororo", universe="Marvel")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson_export(self):
+        """Test NDJSON is the default format with one object per line."""
+        response, content = self.export()
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["name"] for row in rows], ["Batman", "Joker", "Storm, Ororo"]
+        )
+        self.assertEqual(rows[0]["height"], "188.00")
+        self.assertEqual(rows[0]["power_level"], 7)
+
+    def test_csv_export(self):
+        """Test CSV exports start with a header and quote values as needed."""
+        response, content = self.export(format="csv")
+        self.assertIn("superheroes.csv", response["Content-Disposition"])
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][:2], ["id", "name"])
+        self.assertEqual(
+            [row[1] for row in rows[1:]], ["Batman", "Joker", "Storm, Ororo"]
+        )
+
+    def test_export_honours_filters(self):
+        """Test exports only contain rows matching the filters."""
+        _, content = self.export(universe="DC", is_villain="true")
+        self.assertEqual(
+            [json.loads(line)["name"] for line in content.splitlines()], ["Joker"]
+        )
+
+    def test_export_does_not_build_instances(self):
+        """Test rows are streamed as values, not model instances."""
+        with mock.patch.object(
+            Superhero, "from_db", side_effect=AssertionError("instance built")
+        ):
+            self.export(format="csv")
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected."""
+        response = self.client.get(self.url, {"format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ImportSuperheroesCommandTest(StatsConsistencyTestMixin, TestCase):
+    """Test cases for the import_superheroes management command."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.batman = Superhero.objects.create(name="Batman", universe="DC")
+
+    def run_import(self, content, *args, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_superheroes",
+            *args,
+            stdin=StringIO(content),
+            stdout=stdout,
+            stderr=stderr,
+            **options,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_upsert(self):
+        """Test CSV rows are inserted or update the superhero with their name."""
+        content = (
+            "name,universe,power_level,is_villain,real_name\n"
+            "Batman,DC,9,false,Bruce Wayne\n"
+            "Joker,DC,6,true,\n"
+        )
+        stdout, _ = self.run_import(content, format="csv")
+        self.assertIn("Imported 2 superheroes", stdout)
+        self.batman.refresh_from_db()
+        self.assertEqual(self.batman.power_level, 9)
+        self.assertEqual(self.batman.real_name, "Bruce Wayne")
+        joker = Superhero.objects.get(name="Joker")
+        self.assertTrue(joker.is_villain)
+        self.assertIsNone(joker.real_name)
+        self.assertStatsConsistent()
+
+    def test_rejects_are_reported(self):
+        """Test invalid rows are rejected without stopping the import."""
+        content = "\n".join(
+            [
+                json.dumps({"name": "Flash", "power_level": 8}),
+                json.dumps({"name": "Storm", "power_level": 11}),
+                "not json",
+                json.dumps({"name": "BATMAN"}),
+                json.dumps({"name": "Cyclops", "universe": "Narnia"}),
+            ]
+        )
+        stdout, stderr = self.run_import(content, format="ndjson")
+        self.assertIn("Imported 1 superheroes", stdout)
+        self.assertIn("4 rows rejected", stdout)
+        self.assertIn("Line 2", stderr)
+        self.assertEqual(
+            sorted(Superhero.objects.values_list("name", flat=True)),
+            ["Batman", "Flash"],
+        )
+
+    def test_rejects_file(self):
+        """Test rejects can be written to an NDJSON file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rejects.ndjson")
+            self.run_import(
+                '{"name": ""}\n{"name": "Flash"}\n', format="ndjson", rejects=path
+            )
+            with open(path) as rejects:
+                records = [json.loads(line) for line in rejects]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["line"], 1)
+        self.assertIn("name", records[0]["errors"])
+
+    def test_export_round_trip(self):
+        """Test a CSV export can be imported back."""
+        Superhero.objects.create(
+            name="Cyborg", universe="DC", height=Decimal("198.00"), is_active=False
+        )
+        response = APIClient().get(reverse("superhero-export"), {"format": "csv"})
+        content = b"".join(response.streaming_content).decode("utf-8")
+        Superhero.objects.all().delete()
+
+        self.run_import(content, format="csv", batch_size=1)
+        cyborg = Superhero.objects.get(name="Cyborg")
+        self.assertEqual(cyborg.height, Decimal("198.00"))
+        self.assertFalse(cyborg.is_active)
+        self.assertEqual(Superhero.objects.count(), 2)
+
+    def test_format_is_required_for_stdin(self):
+        """Test the format must be given when it cannot be guessed."""
+        with self.assertRaises(CommandError):
+            self.run_import("name\nFlash\n")
+
+
+class GenerateSuperheroesCommandTest(StatsConsistencyTestMixin, TestCase):
+    """Test cases for the generate_superheroes management command."""
+
+    def run_generate(self, **options):
+        stdout = StringIO()
+        call_command("generate_superheroes", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_generate(self):
+        """Test rows are written in chunks and the statistics rebuilt."""
+        stdout = self.run_generate(count=120, seed=1, batch_size=50)
+
+        self.assertIn("Generated 120 superheroes", stdout)
+        names = Superhero.objects.values_list("name", flat=True)
+        self.assertEqual(len({name.lower() for name in names}), 120)
+        self.assertStatsConsistent()
+
+    def test_taken_names(self):
+        """Test generating the same rows twice fails; appending does not."""
+        self.run_generate(count=20, seed=1)
+
+        with self.assertRaisesMessage(CommandError, "Pass --start past the rows"):
+            self.run_generate(count=20, seed=1)
+        self.run_generate(count=20, seed=1, start=20)
+        self.assertEqual(Superhero.objects.count(), 40)
+
+    def test_invalid_options(self):
+        """Test counts and sizes must be positive."""
+        for option in ("count", "workers", "batch_size"):
+            with self.subTest(option=option), self.assertRaises(CommandError):
+                self.run_generate(**{option: 0})
+
+    def test_reproducible(self):
+        """Test the same seed and chunk always generate the same rows."""
+        fields = [field.attname for field in Superhero._meta.concrete_fields][1:-2]
+
+        def rows(seed):
+            return [
+                [getattr(superhero, name) for name in fields]
+                for superhero in generator.generate(100, 150, seed)
+            ]
+
+        self.assertEqual(rows(5), rows(5))
+        self.assertNotEqual(rows(5), rows(6))
+
+    def test_names_are_unique(self):
+        """Test names stay unique past every combination of words."""
+        count = 2 * generator.COMBINATIONS + 10
+        for seed in (0, 7):
+            names = {generator.superhero_name(number, seed) for number in range(count)}
+            self.assertEqual(len(names), count)
+
+    def test_rows_are_valid(self):
+        """Test generated rows pass the model field validation."""
+        superheroes = generator.generate(0, 1000, 3)
+        for superhero in superheroes:
+            superhero.clean_fields()
+        self.assertEqual(
+            {superhero.universe for superhero in superheroes},
+            {"Marvel", "DC", "Custom", "Other"},
+        )
+        self.assertEqual(
+            {superhero.power_level for superhero in superheroes}, set(range(1, 11))
+        )
+
+
+class SuperheroStatsSnapshotTest(StatsConsistencyTestMixin, TestCase):
+    """Test cases for the incrementally maintained statistics snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.batman = Superhero.objects.create(
+            name="Batman", universe="DC", power_level=6
+        )
+        self.joker = Superhero.objects.create(
+            name="Joker", universe="DC", power_level=5, is_villain=True
+        )
+        self.thor = Superhero.objects.create(
+            name="Thor", universe="Marvel", power_level=9, is_active=False
+        )
+
+    def test_failed_stats_write_rolls_back_the_row(self):
+        """Test API writes and their counter updates commit together."""
+        client = APIClient()
+        detail = reverse("superhero-detail", args=[self.batman.pk])
+        requests = [
+            ("post", reverse("superhero-list"), {"name": "Storm"}),
+            ("patch", detail, {"power_level": 9}),
+            ("delete", detail, None),
+        ]
+        for method, url, data in requests:
+            with self.subTest(method=method):
+                with mock.patch.object(
+                    stats, "record", side_effect=DatabaseError("counter lost")
+                ):
+                    with self.assertRaises(DatabaseError):
+                        getattr(client, method)(url, data, format="json")
+                self.assertFalse(Superhero.objects.filter(name="Storm").exists())
+                self.batman.refresh_from_db()
+                self.assertEqual(self.batman.power_level, 6)
+        self.assertStatsConsistent()
+
+    def test_snapshot_tracks_creates(self):
+        """Test created superheroes are counted."""
+        data = stats.snapshot_stats()
+        self.assertEqual(data["total_superheroes"], 3)
+        self.assertEqual(data["villains"], 1)
+        self.assertEqual(data["inactive_superheroes"], 1)
+        self.assertEqual(data["universe_distribution"], {"DC": 2, "Marvel": 1})
+        self.assertEqual(data["power_level_distribution"], {"5": 1, "6": 1, "9": 1})
+        self.assertEqual(data["average_power_level"], 6.67)
+
+    def test_snapshot_tracks_updates_and_deletes(self):
+        """Test saves moving buckets and deletes keep counters accurate."""
+        self.batman.power_level = 7
+        self.batman.is_villain = True
+        self.batman.save()
+        self.assertStatsConsistent()
+
+        fetched = Superhero.objects.only("name").get(pk=self.joker.pk)
+        fetched.universe = "Marvel"
+        fetched.save()
+        self.assertStatsConsistent()
+
+        self.thor.universe = "Other"
+        self.thor.save(update_fields=["name"])
+        self.assertStatsConsistent()
+
+        self.thor.delete()
+        self.assertStatsConsistent()
+
+    def test_deferred_bulk_delete(self):
+        """Test deleting a queryset under deferred() writes correct counters."""
+        with self.assertNumQueries(4):
+            # The collector's select and delete, then one query creating missing
+            # buckets and one adjusting both.
+            with stats.deferred():
+                Superhero.objects.filter(universe="DC").delete()
+        self.assertStatsConsistent()
+        self.assertEqual(stats.snapshot_stats()["total_superheroes"], 1)
+
+    def test_apply_deltas_batches_buckets(self):
+        """Test many buckets, new ones included, are written in two queries."""
+        Superhero.objects.filter(universe="DC").update(power_level=1)
+        Superhero.objects.create(name="Storm", universe="Marvel", power_level=1)
+        deltas = {
+            ("default", ("DC", 6, True, False)): -1,
+            ("default", ("DC", 5, True, True)): -1,
+            ("default", ("DC", 1, True, False)): 1,
+            ("default", ("DC", 1, True, True)): 1,
+            ("default", ("Marvel", 1, True, False)): 0,
+        }
+        with self.assertNumQueries(2):
+            stats.apply_deltas(deltas)
+        self.assertStatsConsistent()
+
+    def test_admin_bulk_actions_update_snapshot(self):
+        """Test admin bulk actions keep the counters in sync."""
+        admin = SuperheroAdmin(Superhero, AdminSite())
+        admin.message_user = lambda *args, **kwargs: None
+        queryset = Superhero.objects.all()
+
+        admin.make_villain(None, queryset)
+        self.assertEqual(stats.snapshot_stats()["villains"], 3)
+        admin.make_inactive(None, queryset)
+        self.assertEqual(stats.snapshot_stats()["active_superheroes"], 0)
+        admin.make_superhero(None, queryset.filter(universe="DC"))
+        admin.make_active(None, queryset.filter(universe="Marvel"))
+        self.assertStatsConsistent()
+
+        admin.delete_queryset(None, queryset.filter(name="Joker"))
+        self.assertStatsConsistent()
+
+    def test_rebuild_command(self):
+        """Test the rebuild command recomputes drifted counters."""
+        SuperheroStatsSnapshot.objects.update(count=42)
+        call_command("rebuild_superhero_stats", stdout=StringIO())
+        self.assertStatsConsistent()
+
+    def test_filtered_stats_are_single_query(self):
+        """Test filtered stats aggregate the matching subset in one query."""
+        url = reverse("superhero-stats")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"universe": "DC", "power_level_min": 6})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["total_superheroes"], 1)
+        self.assertEqual(data["villains"], 0)
+        self.assertEqual(data["average_power_level"], 6.0)
+        self.assertEqual(data["universe_distribution"], {"DC": 1})
+        self.assertEqual(data["power_level_distribution"], {"6": 1})
+
+    def test_filtered_stats_invalid_parameter(self):
+        """Test invalid filter values are rejected."""
+        response = self.client.get(
+            reverse("superhero-stats"), {"power_level_min": "strong"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filtered_stats_empty_subset(self):
+        """Test stats for a subset with no matches."""
+        response = self.client.get(reverse("superhero-stats"), {"universe": "Other"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["total_superheroes"], 0)
+        self.assertEqual(response.json()["average_power_level"], 0)
+
+    def test_stats_endpoint_is_single_query(self):
+        """Test the stats endpoint reads only the snapshot table."""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("superhero-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["total_superheroes"], 3)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastSuperheroListSerializerTest(APITestCase):
+    """Test cases for the fast list serialization path."""
+
+    def setUp(self):
+        """Set up superheroes covering every computed field variation."""
+        self.client = APIClient()
+        for level in range(1, 11):
+            Superhero.objects.create(
+                name=f"Hero {level:02}",
+                alias=f"Alias {level}" if level % 2 else None,
+                universe="DC" if level % 3 else "Marvel",
+                power_level=level,
+                is_villain=level > 7,
+                is_active=level != 4,
+            )
+        Superhero.objects.create(name="Blank Alias", alias="")
+        # Out-of-range levels can only come from raw database writes.
+        Superhero.objects.filter(name="Blank Alias").update(power_level=0)
+
+    def test_output_matches_list_serializer(self):
+        """Test the fast path renders byte-identical JSON."""
+        queryset = Superhero.objects.all()
+        expected = JSONRenderer().render(
+            SuperheroListSerializer(queryset, many=True).data
+        )
+        rows = FastSuperheroListSerializer.values(queryset)
+        self.assertEqual(
+            JSONRenderer().render(FastSuperheroListSerializer(rows).data), expected
+        )
+
+    def test_endpoints_match_list_serializer(self):
+        """Test every list endpoint returns what the list serializer would."""
+        endpoints = [
+            (reverse("superhero-list"), Superhero.objects.all()[:10], "results"),
+            (
+                reverse("superhero-by-universe") + "?universe=dc",
+                Superhero.objects.filter(universe="DC"),
+                "results",
+            ),
+            (
+                reverse("superhero-villains"),
+                Superhero.objects.filter(is_villain=True),
+                "results",
+            ),
+            (
+                reverse("superhero-top-superheroes"),
+                Superhero.objects.filter(is_villain=False).order_by(
+                    "-power_level", "name"
+                )[:10],
+                None,
+            ),
+        ]
+        for url, queryset, key in endpoints:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                if key:
+                    data = data[key]
+                expected = SuperheroListSerializer(queryset, many=True).data
+                self.assertEqual(data, json.loads(JSONRenderer().render(expected)))
+
+    def test_list_does_not_build_instances(self):
+        """Test list pages are built from values rows, not model instances."""
+        with mock.patch.object(
+            Superhero, "from_db", side_effect=AssertionError("instance built")
+        ):
+            response = self.client.get(reverse("superhero-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SuperheroSparseFieldsetTest(APITestCase):
+    """Test cases for the fields and exclude query parameters."""
+
+    def setUp(self):
+        """Set up a superhero with every field filled in."""
+        self.client = APIClient()
+        self.superhero = Superhero.objects.create(
+            name="Flash",
+            alias="The Scarlet Speedster",
+            universe="DC",
+            power_level=8,
+            powers="Super speed",
+            origin_story="Struck by lightning",
+        )
+        self.detail_url = reverse("superhero-detail", args=[self.superhero.pk])
+
+    def test_detail_fields_are_loaded_from_sql(self):
+        """Test a detail response only selects the columns it renders."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.detail_url + "?fields=name,display_name,power_description"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "name": "Flash",
+                "display_name": "Flash (The Scarlet Speedster)",
+                "power_description": "Master",
+            },
+        )
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"alias"', sql)
+        self.assertNotIn('"origin_story"', sql)
+        self.assertNotIn('"powers"', sql)
+
+    def test_detail_exclude(self):
+        """Test excluded fields are left out of a detail response."""
+        response = self.client.get(self.detail_url + "?exclude=origin_story,powers")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertNotIn("origin_story", data)
+        self.assertNotIn("powers", data)
+        self.assertEqual(data["name"], "Flash")
+
+    def test_list_fields(self):
+        """Test list pages keep the requested fields in serializer order."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("superhero-list") + "?fields=universe,name"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["results"], [{"name": "Flash", "universe": "DC"}]
+        )
+        self.assertNotIn('"power_level"', queries.captured_queries[-1]["sql"])
+
+    def test_cursor_pagination_fields(self):
+        """Test keyset pages still get cursors when ordering fields are left out."""
+        Superhero.objects.create(name="Green Lantern", universe="DC")
+        url = reverse("superhero-by-universe") + "?universe=DC&fields=id&page_size=1"
+        data = self.client.get(url).json()
+        self.assertEqual(data["results"], [{"id": self.superhero.pk}])
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertNotEqual(data["results"][0]["id"], self.superhero.pk)
+
+    def test_top_superheroes_fields(self):
+        """Test the top superheroes action honours sparse fieldsets."""
+        response = self.client.get(
+            reverse("superhero-top-superheroes") + "?fields=id,display_name"
+        )
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "id": self.superhero.pk,
+                    "display_name": "Flash (The Scarlet Speedster)",
+                }
+            ],
+        )
+
+    def test_unknown_field(self):
+        """Test unknown field names are rejected with a 400."""
+        for query in ["?fields=name,secret", "?exclude=secret"]:
+            with self.subTest(query=query):
+                response = self.client.get(self.detail_url + query)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("secret", str(response.json()))
+
+    def test_update_response_fields(self):
+        """Test write responses are shaped by the fields parameter."""
+        response = self.client.patch(
+            self.detail_url + "?fields=name,power_level",
+            {"power_level": 9},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"name": "Flash", "power_level": 9})
+        self.superhero.refresh_from_db()
+        self.assertEqual(self.superhero.power_level, 9)
+
+    def test_export_fields(self):
+        """Test exports only contain the selected columns."""
+        response = self.client.get(
+            reverse("superhero-export") + "?format=csv&fields=name,universe"
+        )
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            list(csv.reader(StringIO(body))),
+            [
+                ["name", "universe"],
+                ["Flash", "DC"],
+            ],
+        )
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncSuperheroViewTest(APITestCase):
+    """Test cases for the async read endpoints."""
+
+    def setUp(self):
+        """Set up enough superheroes for two list pages."""
+        self.client = APIClient()
+        for level in range(1, 13):
+            Superhero.objects.create(
+                name=f"Hero {level:02}",
+                universe="DC" if level % 3 else "Marvel",
+                power_level=level % 10 + 1,
+                is_villain=level % 4 == 0,
+            )
+        self.superhero = Superhero.objects.get(name="Hero 01")
+
+    async def assert_same_response(self, path, expected_status=status.HTTP_200_OK):
+        response = await self.async_client.get(f"/api/async/{path}")
+        expected = await sync_to_async(self.client.get)(f"/api/{path}")
+        self.assertEqual(response.status_code, expected_status)
+        self.assertEqual(expected.status_code, expected_status)
+        self.assertEqual(
+            response.content.replace(b"/api/async/", b"/api/"), expected.content
+        )
+
+    async def test_list(self):
+        """Test async list pages match the DRF endpoint."""
+        for query in [
+            "",
+            "?page=2",
+            "?ordering=-power_level&is_villain=false",
+            "?fields=id,name",
+            "?paginate=cursor&page_size=5",
+        ]:
+            with self.subTest(query=query):
+                await self.assert_same_response(f"superheroes/{query}")
+
+    async def test_retrieve(self):
+        """Test async details match the DRF endpoint."""
+        await self.assert_same_response(f"superheroes/{self.superhero.pk}/")
+        await self.assert_same_response(
+            f"superheroes/{self.superhero.pk}/?fields=name,power_description"
+        )
+        await self.assert_same_response(
+            "superheroes/999999/", status.HTTP_404_NOT_FOUND
+        )
+
+    async def test_by_universe(self):
+        """Test the async by_universe endpoint matches the DRF endpoint."""
+        await self.assert_same_response("superheroes/by_universe/?universe=dc")
+        await self.assert_same_response(
+            "superheroes/by_universe/", status.HTTP_400_BAD_REQUEST
+        )
+
+    async def test_stats(self):
+        """Test async statistics match the DRF endpoint."""
+        await self.assert_same_response("superheroes/stats/")
+        await self.assert_same_response("superheroes/stats/?universe=DC")
+
+    async def test_errors(self):
+        """Test API errors are rendered like DRF does."""
+        await self.assert_same_response(
+            "superheroes/?fields=secret", status.HTTP_400_BAD_REQUEST
+        )
+        await self.assert_same_response(
+            "superheroes/?page=9", status.HTTP_404_NOT_FOUND
+        )
+
+    def test_views_are_async(self):
+        """Test the endpoints are served without a sync adapter."""
+        for name in [
+            "superhero-async-list",
+            "superhero-async-stats",
+            "superhero-async-by-universe",
+        ]:
+            with self.subTest(name=name):
+                view = resolve(reverse(name)).func
+                self.assertTrue(view.view_class.view_is_async)
+
+
+class ORJSONTest(APITestCase):
+    """Test cases for the orjson renderer and parser."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        Superhero.objects.create(
+            name="Batman",
+            alias="The Dark Knight",
+            universe="DC",
+            height=Decimal("188.00"),
+            power_level=7,
+        )
+        Superhero.objects.create(name="Storm \u2028 Ororo", universe="Marvel")
+
+    def test_renders_like_json_renderer(self):
+        """Test rendered bytes match DRF's JSONRenderer."""
+        payloads = [
+            {
+                "decimal": Decimal("188.50"),
+                "aware": datetime(2024, 1, 1, 12, 30, 1, 5, tzinfo=dt_timezone.utc),
+                "naive": datetime(2024, 1, 1, 12, 30),
+                "date": date(2024, 1, 1),
+                "lazy": gettext_lazy("lazy"),
+                "separators": "\u2028\u2029",
+                "unicode": "Ororo Munroe \u26a1",
+                1: [None, True, 1.5],
+            },
+            SuperheroDetailSerializer(Superhero.objects.first()).data,
+            SuperheroListSerializer(Superhero.objects.all(), many=True).data,
+            stats.snapshot_stats(),
+            None,
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    ORJSONRenderer().render(payload), JSONRenderer().render(payload)
+                )
+
+    def test_negotiated_per_request(self):
+        """Test ?format=orjson returns the same bytes as ?format=json."""
+        for url in (reverse("superhero-list"), reverse("superhero-stats")):
+            with self.subTest(url=url):
+                expected = self.client.get(url, {"format": "json"}).content
+                response = self.client.get(url, {"format": "orjson"})
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(response.content, expected)
+
+    def test_indented_output_falls_back(self):
+        """Test indented responses are still rendered by the stdlib."""
+        response = self.client.get(
+            reverse("superhero-stats"), HTTP_ACCEPT="application/json; indent=2"
+        )
+        self.assertIn(b'\n  "total_superheroes"', response.content)
+
+    def test_parser(self):
+        """Test request bodies are parsed like the stdlib parser would."""
+        parser = ORJSONParser()
+        body = b'{"name": "Flash", "power_level": 8, "height": 180.5}'
+        self.assertEqual(parser.parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in (b"{", b'{"power_level": NaN}'):
+            with self.subTest(body=invalid):
+                with self.assertRaises(ParseError):
+                    parser.parse(BytesIO(invalid))
+
+    def test_orjson_backend(self):
+        """Test JSON_BACKEND=orjson puts the orjson classes first."""
+        renderers = perform_import(settings.JSON_RENDERERS["orjson"], "renderers")
+        parsers = perform_import(settings.JSON_PARSERS["orjson"], "parsers")
+        self.assertIs(renderers[0], ORJSONRenderer)
+        self.assertIs(parsers[0], ORJSONParser)
+
+        with mock.patch.object(SuperheroViewSet, "parser_classes", parsers):
+            response = self.client.post(
+                reverse("superhero-list"),
+                json.dumps({"name": "Flash", "power_level": 8}),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["power_level"], 8)
+
 
 class SuperheroSerializerTest(TestCase):
     """Test cases for SuperheroDetailSerializer validations."""
@@ -341,3 +1991,210 @@ class SuperheroSerializerTest(TestCase):
             serializer.errors["power_level"][0],
             "Power level must be between 1 and 10.",
         )
+
+    def test_only_name_conflicts_are_duplicate_names(self):
+        """Test other integrity errors are raised rather than reported on name."""
+        Superhero.objects.create(name="Thor")
+        serializer = SuperheroCreateSerializer(data=self.valid_data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+        self.assertEqual(raised.exception.detail["name"], [DUPLICATE_NAME])
+
+        not_null = IntegrityError(
+            "NOT NULL constraint failed: superheroes_superhero.age"
+        )
+        serializer = SuperheroCreateSerializer(data={**self.valid_data, "name": "Loki"})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with mock.patch.object(Superhero, "save", side_effect=not_null):
+            with self.assertRaisesMessage(IntegrityError, "NOT NULL"):
+                serializer.save()
+
+    def test_is_duplicate_name(self):
+        """Test name conflicts are told apart from other constraint errors."""
+        messages = {
+            "UNIQUE constraint failed: index 'superhero_name_lower_uniq'": True,
+            "UNIQUE constraint failed: superheroes_superhero.name": True,
+            "NOT NULL constraint failed: superheroes_superhero.name": False,
+            "CHECK constraint failed: superhero_age_check": False,
+            'duplicate key value violates unique constraint "superhero_name_lower_uniq"'
+            "\nDETAIL:  Key (lower(name::text))=(thor) already exists.": True,
+            'duplicate key value violates unique constraint "superheroes_superhero_'
+            'name_key"': True,
+            'duplicate key value violates unique constraint "superheroes_superhero_'
+            'pkey"': False,
+            'null value in column "name" of relation "superheroes_superhero" '
+            "violates not-null constraint": False,
+        }
+        for message, expected in messages.items():
+            with self.subTest(message=message):
+                self.assertIs(is_duplicate_name(IntegrityError(message)), expected)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SuperheroQueryBudgetTest(QueryBudgetTestMixin, APITestCase):
+    """Test every endpoint stays within its query budget."""
+
+    def setUp(self):
+        """Set up enough superheroes for an N+1 pattern to show."""
+        self.client = APIClient()
+        Superhero.objects.bulk_create(
+            Superhero(
+                name=f"Hero {number}",
+                universe="Marvel" if number % 2 else "DC",
+                power_level=number % 10 + 1,
+                is_villain=number % 3 == 0,
+            )
+            for number in range(30)
+        )
+        stats.rebuild()
+        self.pks = list(Superhero.objects.values_list("pk", flat=True))
+
+    def endpoints(self):
+        """Return ``(action, method, url, data)`` for every superhero endpoint."""
+        pk = self.pks[0]
+        detail = reverse("superhero-detail", args=[pk])
+        return [
+            ("list", "get", reverse("superhero-list") + "?page_size=20", None),
+            (
+                "list",
+                "get",
+                reverse("superhero-list") + "?universe=DC&search=hero&paginate=cursor",
+                None,
+            ),
+            ("retrieve", "get", detail, None),
+            ("create", "post", reverse("superhero-list"), {"name": "Storm"}),
+            ("update", "put", detail, {"name": "Renamed", "universe": "Marvel"}),
+            ("partial_update", "patch", detail, {"power_level": 10}),
+            (
+                "by_universe",
+                "get",
+                reverse("superhero-by-universe") + "?universe=dc",
+                None,
+            ),
+            ("top_superheroes", "get", reverse("superhero-top-superheroes"), None),
+            ("villains", "get", reverse("superhero-villains"), None),
+            ("export", "get", reverse("superhero-export") + "?format=csv", None),
+            (
+                "autocomplete",
+                "get",
+                reverse("superhero-autocomplete") + "?q=her",
+                None,
+            ),
+            (
+                "bulk_create",
+                "post",
+                reverse("superhero-bulk-create"),
+                [{"name": f"New {number}", "universe": "DC"} for number in range(20)],
+            ),
+            (
+                "bulk_update",
+                "patch",
+                reverse("superhero-bulk-update"),
+                [{"id": pk, "is_active": False} for pk in self.pks[1:21]],
+            ),
+            (
+                "toggle_villain",
+                "post",
+                reverse("superhero-toggle-villain", args=[pk]),
+                None,
+            ),
+            (
+                "toggle_active",
+                "post",
+                reverse("superhero-toggle-active", args=[pk]),
+                None,
+            ),
+            (
+                "toggle_villain_batch",
+                "post",
+                reverse("superhero-toggle-villain-batch"),
+                self.pks[1:21],
+            ),
+            (
+                "toggle_active_batch",
+                "post",
+                reverse("superhero-toggle-active-batch"),
+                self.pks[1:21],
+            ),
+            ("bulk_delete", "post", reverse("superhero-bulk-delete"), self.pks[21:]),
+            ("destroy", "delete", detail, None),
+        ]
+
+    def test_viewset_budgets(self):
+        """Test each SuperheroViewSet action is budgeted and within budget."""
+        tested = set()
+        for action, method, url, data in self.endpoints():
+            with self.subTest(action=action, url=url):
+                with self.assertWithinQueryBudget(SuperheroViewSet, action):
+                    response = getattr(self.client, method)(url, data, format="json")
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 300)
+                tested.add(action)
+
+        self.assertQueryBudgetsCovered(SuperheroViewSet, tested)
+
+    def test_bulk_budgets_cover_a_full_chunk(self):
+        """Test bulk writes of a full chunk of every field stay within budget."""
+        fields = {
+            "real_name": "Real",
+            "alias": "Alias",
+            "age": 30,
+            "height": "180.00",
+            "weight": "80.00",
+            "powers": "Flight",
+            "origin_story": "Origin",
+            "is_active": False,
+            "is_villain": True,
+        }
+        items = [
+            {
+                **fields,
+                "name": f"Chunk {number}",
+                "universe": ["DC", "Marvel", "Custom"][number % 3],
+                "power_level": number % 10 + 1,
+            }
+            for number in range(bulk.BATCH_SIZE)
+        ]
+        with self.assertWithinQueryBudget(SuperheroViewSet, "bulk_create"):
+            response = self.client.post(
+                reverse("superhero-bulk-create"), items, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        items = [
+            {**item, "id": result["id"], "name": f"Renamed {index}", "age": 31}
+            for index, (item, result) in enumerate(zip(items, response.data["results"]))
+        ]
+        with self.assertWithinQueryBudget(SuperheroViewSet, "bulk_update"):
+            response = self.client.patch(
+                reverse("superhero-bulk-update"), items, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_budgets_apply_per_chunk(self):
+        """Test batches over one chunk are served within their scaled budget."""
+        count = bulk.BATCH_SIZE * 2 + 1
+        response = self.client.post(
+            reverse("superhero-bulk-create"),
+            [{"name": f"Batch {number}"} for number in range(count)],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = [result["id"] for result in response.data["results"]]
+        for action in ("superhero-toggle-villain-batch", "superhero-bulk-delete"):
+            with self.subTest(action=action):
+                response = self.client.post(reverse(action), ids, format="json")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Superhero.objects.filter(pk__in=ids).exists())
+
+    def test_stats_budget(self):
+        """Test statistics stay within budget, filtered or not."""
+        for query in ["", "?universe=DC&power_level_min=5"]:
+            with self.subTest(query=query):
+                with self.assertWithinQueryBudget(SuperheroStatsView, "get"):
+                    response = self.client.get(reverse("superhero-stats") + query)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertQueryBudgetsCovered(SuperheroStatsView, ["get"])
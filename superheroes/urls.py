@@ -1,6 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import (
+    AsyncSuperheroByUniverseView,
+    AsyncSuperheroDetailView,
+    AsyncSuperheroListView,
+    AsyncSuperheroStatsView,
+)
 from .views import SuperheroStatsView, SuperheroViewSet
 
 # Create router and register viewsets
@@ -14,4 +20,25 @@ urlpatterns = [
     ),
     # API routes
     path("api/", include(router.urls)),
+    # Async (ASGI-native) read endpoints
+    path(
+        "api/async/superheroes/",
+        AsyncSuperheroListView.as_view(),
+        name="superhero-async-list",
+    ),
+    path(
+        "api/async/superheroes/stats/",
+        AsyncSuperheroStatsView.as_view(),
+        name="superhero-async-stats",
+    ),
+    path(
+        "api/async/superheroes/by_universe/",
+        AsyncSuperheroByUniverseView.as_view(),
+        name="superhero-async-by-universe",
+    ),
+    path(
+        "api/async/superheroes/<str:pk>/",
+        AsyncSuperheroDetailView.as_view(),
+        name="superhero-async-detail",
+    ),
 ]
@@ -1,47 +1,142 @@
-from django.db.models import Avg, Count
+import math
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import filters, status
 from rest_framework.decorators import action
+from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
-from rest_framework.views import APIView
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
+from base import tracing
+from base.budgets import QueryBudgetMixin
+from base.replicas import ReplicaReadMixin
+
+from . import bulk, stats
+from .autocomplete import autocomplete
+from .cache import cache_response
+from .conditional import (
+    conditional_response,
+    conditional_write,
+    detail_validators,
+    list_validators,
+)
 from .filters import SuperheroFilter
 from .models import Superhero
+from .pagination import KeysetPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import SuperheroSearchFilter
 from .serializers import (
+    FastSuperheroListSerializer,
+    SuperheroAutocompleteSerializer,
+    SuperheroBulkCreateSerializer,
+    SuperheroBulkResponseSerializer,
+    SuperheroBulkUpdateSerializer,
     SuperheroCreateSerializer,
     SuperheroDetailSerializer,
     SuperheroListSerializer,
     SuperheroStatsSerializer,
     SuperheroUpdateSerializer,
+    select_fields,
+    source_columns,
 )
 
+UNIVERSE_CHOICES = {
+    value.lower(): value for value, _ in Superhero._meta.get_field("universe").choices
+}
+
+
+def universe_lookup(universe):
+    """
+    Build a case-insensitive universe lookup that can use an index.
+
+    Known universes are matched exactly against their canonical spelling so the
+    ``(universe, name)`` index applies; anything else falls back to ``iexact``.
+    """
+    canonical = UNIVERSE_CHOICES.get(universe.lower())
+    if canonical is not None:
+        return Q(universe=canonical)
+    return Q(universe__iexact=universe)
+
+
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields", str, description="Comma-separated fields to include in the response"
+    ),
+    OpenApiParameter(
+        "exclude",
+        str,
+        description="Comma-separated fields to leave out of the response",
+    ),
+]
+
+
+class TracedFilterMixin:
+    """
+    Record the filter, search and ordering parameters of a request on its
+    trace, so slow combinations can be found in the tracing backend.
+    """
+
+    def filter_queryset(self, queryset):
+        if tracing.tracer is not None:
+            params = self.request.query_params
+            names = [
+                *self.filterset_class.base_filters,
+                api_settings.SEARCH_PARAM,
+                api_settings.ORDERING_PARAM,
+            ]
+            applied = {name: params[name] for name in names if name in params}
+            if applied:
+                tracing.annotate(
+                    {
+                        "superheroes.filters": ",".join(sorted(applied)),
+                        **{
+                            f"superheroes.filter.{name}": value
+                            for name, value in applied.items()
+                        },
+                    }
+                )
+        return super().filter_queryset(queryset)
+
 
 @extend_schema_view(
     list=extend_schema(
         summary="List all superheroes",
-        description="Get a paginated list of all superheroes with basic information",
+        description=(
+            "Get a paginated list of all superheroes with basic information. "
+            "Pass paginate=cursor for keyset pagination without page counts."
+        ),
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     ),
     create=extend_schema(
         summary="Create a new superhero",
         description="Create a new superhero with the provided information",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     ),
     retrieve=extend_schema(
         summary="Get superhero details",
         description="Get detailed information about a specific superhero",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     ),
     update=extend_schema(
         summary="Update superhero",
         description="Update all fields of a specific superhero",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     ),
     partial_update=extend_schema(
         summary="Partially update superhero",
         description="Update specific fields of a superhero",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     ),
     destroy=extend_schema(
@@ -50,7 +145,9 @@ from .serializers import (
         tags=["Superheroes"],
     ),
 )
-class SuperheroViewSet(ModelViewSet):
+class SuperheroViewSet(
+    QueryBudgetMixin, ReplicaReadMixin, TracedFilterMixin, ModelViewSet
+):
     """
     ViewSet for managing superheroes.
 
@@ -60,30 +157,187 @@ class SuperheroViewSet(ModelViewSet):
     queryset = Superhero.objects.all()
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        SuperheroSearchFilter,
     ]
     filterset_class = SuperheroFilter
     search_fields = ["name", "real_name", "alias", "powers"]
     ordering_fields = ["name", "power_level", "age", "created_at", "updated_at"]
     ordering = ["name"]
+    keyset_actions = ["by_universe", "villains"]
+    # Read-only actions that may read from a replica (see base.replicas)
+    replica_actions = [
+        "list",
+        "retrieve",
+        "by_universe",
+        "top_superheroes",
+        "villains",
+        "export",
+    ]
+    export_fields = [field.attname for field in Superhero._meta.concrete_fields]
+    export_chunk_size = 2000
+    # Most queries each action may run, whatever the amount of data (see
+    # base.budgets). The list allows for the search engine's one-off
+    # availability check. Writes allow two statistics queries, enough to
+    # create a bucket on the fly, and detail writes the If-Match check. The
+    # budgets of chunked_actions apply per chunk of up to bulk.BATCH_SIZE
+    # items. Export only counts the queries run before its rows stream.
+    query_budgets = {
+        "list": 4,
+        "retrieve": 2,
+        "create": 3,
+        "update": 5,
+        "partial_update": 5,
+        "destroy": 3,
+        "by_universe": 1,
+        "top_superheroes": 1,
+        "villains": 1,
+        "export": 1,
+        "autocomplete": 1,
+        "bulk_create": 4,
+        "bulk_update": 5,
+        "bulk_delete": 4,
+        "toggle_villain": 4,
+        "toggle_active": 4,
+        "toggle_villain_batch": 3,
+        "toggle_active_batch": 3,
+    }
+    # SQLite binds at most 999 parameters per statement, so Django splits the
+    # bulk_create, bulk_update and in_bulk() of a full chunk over several.
+    vendor_query_budgets = {"sqlite": {"bulk_create": 18, "bulk_update": 21}}
+    chunked_actions = {
+        "bulk_create",
+        "bulk_update",
+        "bulk_delete",
+        "toggle_villain_batch",
+        "toggle_active_batch",
+    }
+
+    def query_budget_units(self, handler):
+        """Apply the budgets of chunked actions once per chunk of the batch."""
+        if handler in self.chunked_actions and isinstance(self.request.data, list):
+            return max(1, math.ceil(len(self.request.data) / bulk.BATCH_SIZE))
+        return 1
+
+    @property
+    def paginator(self):
+        """
+        Use keyset pagination for ``?paginate=cursor`` and for the unbounded
+        ``by_universe`` and ``villains`` actions.
+        """
+        if not hasattr(self, "_paginator"):
+            if self.action in self.keyset_actions or (
+                self.request.query_params.get("paginate") == "cursor"
+            ):
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    @cache_response
+    @conditional_response(list_validators)
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        """
+        Return a paginated list of superheroes, serialized through
+        ``FastSuperheroListSerializer`` from the needed columns only.
+        """
+        fields = self.get_selected_fields(FastSuperheroListSerializer.fields)
+        # Keyset cursors are built from the ordering columns of the last row.
+        keyset = isinstance(self.paginator, KeysetPagination)
+        rows = FastSuperheroListSerializer.values(
+            queryset,
+            fields,
+            extra_columns=(
+                self.paginator.cursor_columns(queryset, self) if keyset else ()
+            ),
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                FastSuperheroListSerializer(page, fields).data
+            )
+        return Response(FastSuperheroListSerializer(rows, fields).data)
+
+    def get_selected_fields(self, available):
+        """
+        Return the names of ``available`` picked with ``?fields=`` and
+        ``?exclude=``, or ``None`` when the request selects nothing.
+        """
+        request = getattr(self, "request", None)
+        if request is None:
+            return None
+        params = request.query_params
+        if "fields" not in params and "exclude" not in params:
+            return None
+        return select_fields(available, params.get("fields"), params.get("exclude"))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_selected_fields(
+            self.get_serializer_class().Meta.fields
+        )
+        return context
+
+    def get_queryset(self):
+        """Only load the columns a sparse detail response needs."""
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            fields = self.get_selected_fields(SuperheroDetailSerializer.Meta.fields)
+            if fields is not None:
+                queryset = queryset.only(*source_columns(fields))
+        return queryset
+
+    @cache_response
+    @conditional_response(detail_validators)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_write
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    # The statistics counters are written by model signals, after the row;
+    # one transaction keeps them in step with it.
+    def perform_create(self, serializer):
+        with transaction.atomic(using=router.db_for_write(Superhero)):
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=router.db_for_write(Superhero)):
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(using=router.db_for_write(Superhero)):
+            super().perform_destroy(instance)
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
-        if self.action == "list":
-            return SuperheroListSerializer
-        elif self.action == "create":
-            return SuperheroCreateSerializer
-        elif self.action in ["update", "partial_update"]:
-            return SuperheroUpdateSerializer
-        return SuperheroDetailSerializer
+        with tracing.span(
+            "SuperheroViewSet.get_serializer_class",
+            {"superheroes.action": str(self.action)},
+        ) as span:
+            if self.action == "list":
+                serializer_class = SuperheroListSerializer
+            elif self.action == "create":
+                serializer_class = SuperheroCreateSerializer
+            elif self.action in ["update", "partial_update"]:
+                serializer_class = SuperheroUpdateSerializer
+            else:
+                serializer_class = SuperheroDetailSerializer
+            span.set_attribute("superheroes.serializer", serializer_class.__name__)
+        return serializer_class
 
     @extend_schema(
         summary="Get superheroes by universe",
-        description="Get all superheroes from a specific universe",
+        description="Get a cursor-paginated list of superheroes from a universe",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     )
     @action(detail=False, methods=["get"])
+    @cache_response
     def by_universe(self, request):
         """Get superheroes filtered by universe."""
         universe = request.query_params.get("universe")
@@ -93,22 +347,24 @@ class SuperheroViewSet(ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        superheroes = self.queryset.filter(universe__iexact=universe)
-        serializer = SuperheroListSerializer(superheroes, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(universe_lookup(universe)))
 
     @extend_schema(
         summary="Get top superheroes by power level",
         description="Get superheroes with the highest power levels",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     )
     @action(detail=False, methods=["get"])
+    @cache_response
     def top_superheroes(self, request):
         """Get top superheroes by power level."""
         try:
-            limit = int(request.query_params.get("limit", 10)) 
+            limit = int(request.query_params.get("limit", 10))
             if limit < 0:
-                raise ValueError("Invalid value for 'limit'. Must be an positive integrer")   
+                raise ValueError(
+                    "Invalid value for 'limit'. Must be an positive integrer"
+                )
         except ValueError:
             return Response(
                 {"error": "Invalid value for 'limit'. Must be an integer."},
@@ -117,21 +373,186 @@ class SuperheroViewSet(ModelViewSet):
 
         superheroes = self.queryset.filter(is_villain=False).order_by(
             "-power_level", "name"
-        )[:limit]
-        serializer = SuperheroListSerializer(superheroes, many=True)
-        return Response(serializer.data)
+        )
+        fields = self.get_selected_fields(FastSuperheroListSerializer.fields)
+        rows = FastSuperheroListSerializer.values(superheroes, fields)[:limit]
+        return Response(FastSuperheroListSerializer(rows, fields).data)
 
     @extend_schema(
         summary="Get villains",
-        description="Get all villains (characters marked as villains)",
+        description="Get a cursor-paginated list of characters marked as villains",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         tags=["Superheroes"],
     )
     @action(detail=False, methods=["get"])
+    @cache_response
     def villains(self, request):
         """Get all villains."""
-        villains = self.queryset.filter(is_villain=True)
-        serializer = SuperheroListSerializer(villains, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(is_villain=True))
+
+    @extend_schema(
+        summary="Export superheroes",
+        description=(
+            "Stream every superhero matching the filters as newline-delimited "
+            "JSON (format=ndjson, the default) or CSV (format=csv)"
+        ),
+        responses={(200, "application/x-ndjson"): str, (200, "text/csv"): str},
+        filters=True,
+        parameters=SPARSE_FIELDSET_PARAMETERS,
+        tags=["Superheroes"],
+    )
+    @action(
+        detail=False, methods=["get"], renderer_classes=[NDJSONRenderer, CSVRenderer]
+    )
+    def export(self, request):
+        """Stream the filtered superhero catalogue."""
+        fields = self.get_selected_fields(self.export_fields) or self.export_fields
+        queryset = self.filter_queryset(self.get_queryset())
+        # The response streams after the request's database routing ends, so
+        # resolve the alias now to keep reading from the request's replica.
+        queryset = queryset.using(queryset.db)
+        # values_list() avoids building model instances; iterator() uses a
+        # server-side cursor on PostgreSQL, so memory use stays flat.
+        rows = queryset.values_list(*fields).iterator(chunk_size=self.export_chunk_size)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(fields, rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="superheroes.{renderer.format}"'
+        )
+        return response
+
+    @extend_schema(
+        summary="Autocomplete superhero names",
+        description=(
+            "Get superheroes whose name, alias or real name matches the typed "
+            "text, most similar first"
+        ),
+        parameters=[
+            OpenApiParameter("q", str, required=True, description="Typed text"),
+            OpenApiParameter(
+                "limit", int, description="Maximum number of suggestions (max 50)"
+            ),
+            *SPARSE_FIELDSET_PARAMETERS,
+        ],
+        responses={200: SuperheroAutocompleteSerializer(many=True)},
+        tags=["Superheroes"],
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """Get typeahead suggestions for a partial name."""
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"error": "q parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 10))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "Invalid value for 'limit'. Must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        suggestions = autocomplete(query, min(limit, 50), using=self.queryset.db)
+        fields = self.get_selected_fields(["id", "display_name"])
+        if fields is not None:
+            suggestions = [
+                {name: suggestion[name] for name in fields}
+                for suggestion in suggestions
+            ]
+        return Response(suggestions)
+
+    @extend_schema(
+        summary="Create superheroes in bulk",
+        description=(
+            f"Create up to {bulk.MAX_ITEMS} superheroes in one request. Each item "
+            "is validated and reported on separately."
+        ),
+        request=SuperheroBulkCreateSerializer(many=True),
+        responses={
+            201: SuperheroBulkResponseSerializer,
+            207: SuperheroBulkResponseSerializer,
+        },
+        tags=["Superheroes"],
+    )
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        """Create a batch of superheroes."""
+        return self._bulk_response(
+            request, bulk.bulk_create, success_status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        summary="Update superheroes in bulk",
+        description=(
+            f"Partially update up to {bulk.MAX_ITEMS} superheroes in one request. "
+            "Each item carries the id of the superhero it updates."
+        ),
+        request=SuperheroBulkUpdateSerializer(many=True),
+        responses={
+            200: SuperheroBulkResponseSerializer,
+            207: SuperheroBulkResponseSerializer,
+        },
+        tags=["Superheroes"],
+    )
+    @action(detail=False, methods=["patch"])
+    def bulk_update(self, request):
+        """Update a batch of superheroes."""
+        return self._bulk_response(request, bulk.bulk_update)
+
+    @extend_schema(
+        summary="Delete superheroes in bulk",
+        description=f"Delete up to {bulk.MAX_ITEMS} superheroes by id.",
+        request={"application/json": {"type": "array", "items": {"type": "integer"}}},
+        responses={
+            200: SuperheroBulkResponseSerializer,
+            207: SuperheroBulkResponseSerializer,
+        },
+        tags=["Superheroes"],
+    )
+    @action(detail=False, methods=["post"])
+    def bulk_delete(self, request):
+        """Delete a batch of superheroes."""
+        return self._bulk_response(request, bulk.bulk_delete)
+
+    def _bulk_response(self, request, operation, success_status=status.HTTP_200_OK):
+        """
+        Run a bulk operation on the request's list payload.
+
+        Responds with ``success_status`` when every item succeeded, ``207`` when
+        only some did and ``400`` when none did.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > bulk.MAX_ITEMS:
+            return Response(
+                {"error": f"At most {bulk.MAX_ITEMS} items can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Through the router, so the request is pinned to the primary it wrote to.
+        results = operation(items, using=router.db_for_write(Superhero))
+        failed = sum(result["status"] == "error" for result in results)
+        if not failed:
+            response_status = success_status
+        elif failed < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"succeeded": len(results) - failed, "failed": failed, "results": results},
+            status=response_status,
+        )
 
     @extend_schema(
         summary="Toggle superhero/villain status",
@@ -139,18 +560,15 @@ class SuperheroViewSet(ModelViewSet):
         tags=["Superheroes"],
     )
     @action(detail=True, methods=["post"])
+    @conditional_write
     def toggle_villain(self, request, pk=None):
         """Toggle villain status of a superhero."""
-        superhero = self.get_object()
-        superhero.is_villain = not superhero.is_villain
-        superhero.save()
-
-        serializer = SuperheroDetailSerializer(superhero)
+        superhero = self.toggle_field(pk, "is_villain")
         villain_status = "villain" if superhero.is_villain else "superhero"
         return Response(
             {
                 "message": f"{superhero.name} is now a {villain_status}",
-                "superhero": serializer.data,
+                "superhero": self.get_serializer(superhero).data,
             }
         )
 
@@ -160,76 +578,122 @@ class SuperheroViewSet(ModelViewSet):
         tags=["Superheroes"],
     )
     @action(detail=True, methods=["post"])
+    @conditional_write
     def toggle_active(self, request, pk=None):
         """Toggle active status of a superhero."""
-        superhero = self.get_object()
-        superhero.is_active = not superhero.is_active
-        superhero.save()
-
-        serializer = SuperheroDetailSerializer(superhero)
+        superhero = self.toggle_field(pk, "is_active")
         active_status = "active" if superhero.is_active else "inactive"
         return Response(
             {
                 "message": f"{superhero.name} is now {active_status}",
-                "superhero": serializer.data,
+                "superhero": self.get_serializer(superhero).data,
             }
         )
 
+    def toggle_field(self, pk, field):
+        """Flip ``field`` of the superhero ``pk`` in one ``UPDATE``; return it."""
+        try:
+            queryset = (
+                self.filter_queryset(self.get_queryset())
+                .using(router.db_for_write(Superhero))
+                .filter(pk=pk)
+            )
+            superheroes = bulk.toggle(queryset, field)
+        except (TypeError, ValueError, ValidationError):
+            superheroes = None
+        if not superheroes:
+            raise Http404
+        return superheroes[0]
+
+    @extend_schema(
+        summary="Toggle superhero/villain status in bulk",
+        operation_id="superheroes_toggle_villain_batch",
+        description=(
+            f"Toggle whether up to {bulk.MAX_ITEMS} characters, given by id, are "
+            "superheroes or villains"
+        ),
+        request={"application/json": {"type": "array", "items": {"type": "integer"}}},
+        responses={
+            200: SuperheroBulkResponseSerializer,
+            207: SuperheroBulkResponseSerializer,
+        },
+        tags=["Superheroes"],
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="toggle_villain",
+        url_name="toggle-villain-batch",
+    )
+    def toggle_villain_batch(self, request):
+        """Toggle villain status of a batch of superheroes."""
+        return self._bulk_response(
+            request, partial(bulk.bulk_toggle, field="is_villain")
+        )
 
-class SuperheroStatsView(APIView):
+    @extend_schema(
+        summary="Toggle active status in bulk",
+        operation_id="superheroes_toggle_active_batch",
+        description=(
+            f"Toggle whether up to {bulk.MAX_ITEMS} superheroes, given by id, are "
+            "active"
+        ),
+        request={"application/json": {"type": "array", "items": {"type": "integer"}}},
+        responses={
+            200: SuperheroBulkResponseSerializer,
+            207: SuperheroBulkResponseSerializer,
+        },
+        tags=["Superheroes"],
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="toggle_active",
+        url_name="toggle-active-batch",
+    )
+    def toggle_active_batch(self, request):
+        """Toggle active status of a batch of superheroes."""
+        return self._bulk_response(
+            request, partial(bulk.bulk_toggle, field="is_active")
+        )
+
+
+class SuperheroStatsView(
+    QueryBudgetMixin, ReplicaReadMixin, TracedFilterMixin, GenericAPIView
+):
     """
     View for getting superhero statistics.
+
+    Unfiltered requests are served from the statistics snapshot; requests with
+    ``SuperheroFilter`` parameters aggregate the matching subset in one query.
     """
 
+    queryset = Superhero.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SuperheroFilter
+    pagination_class = None
+    query_budgets = {"get": 1}
+    replica_actions = ["get"]
+
     @extend_schema(
         summary="Get superhero statistics",
-        description="Get comprehensive statistics about all superheroes",
+        description=(
+            "Get comprehensive statistics about all superheroes, or about the "
+            "subset matching the given filters"
+        ),
         responses={200: SuperheroStatsSerializer},
+        filters=True,
         tags=["Superheroes"],
     )
+    @cache_response
     def get(self, request):
         """Get superhero statistics."""
-        total_superheroes = Superhero.objects.count()
-        active_superheroes = Superhero.objects.filter(is_active=True).count()
-        inactive_superheroes = Superhero.objects.filter(is_active=False).count()
-        villains = Superhero.objects.filter(is_villain=True).count()
-        superheroes = Superhero.objects.filter(is_villain=False).count()
-
-        # Average power level
-        avg_power = (
-            Superhero.objects.aggregate(avg_power=Avg("power_level"))["avg_power"] or 0
-        )
-
-        # Universe distribution
-        universe_stats = (
-            Superhero.objects.values("universe")
-            .annotate(count=Count("id"))
-            .order_by("-count")
-        )
-        universe_distribution = {
-            stat["universe"]: stat["count"] for stat in universe_stats
-        }
-
-        # Power level distribution
-        power_stats = (
-            Superhero.objects.values("power_level")
-            .annotate(count=Count("id"))
-            .order_by("power_level")
-        )
-        power_level_distribution = {
-            str(stat["power_level"]): stat["count"] for stat in power_stats
-        }
-
-        stats_data = {
-            "total_superheroes": total_superheroes,
-            "active_superheroes": active_superheroes,
-            "inactive_superheroes": inactive_superheroes,
-            "villains": villains,
-            "superheroes": superheroes,
-            "average_power_level": round(avg_power, 2),
-            "universe_distribution": universe_distribution,
-            "power_level_distribution": power_level_distribution,
-        }
+        if any(name in request.query_params for name in SuperheroFilter.base_filters):
+            stats_data = stats.aggregate_stats(
+                self.filter_queryset(self.get_queryset())
+            )
+        else:
+            stats_data = stats.snapshot_stats()
 
         serializer = SuperheroStatsSerializer(stats_data)
         return Response(serializer.data)